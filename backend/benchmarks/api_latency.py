@@ -0,0 +1,141 @@
+"""
+p50/p99 latency of the profile and search endpoints under concurrent requests.
+
+By default the app is served by uvicorn on a thread of this process (its own event
+loop, startup hooks skipped) against MONGO_URI, and measured twice: with repository
+calls run directly on the server's event loop ("inline", how the endpoints behaved
+before the offload) and offloaded by Database.run ("offload"). With --url, a
+running server is measured as-is.
+
+    pip install httpx
+    python -m benchmarks.api_latency [--requests 400] [--concurrency 32] [--user-id user_001]
+    python -m benchmarks.api_latency --url http://localhost:8000
+
+Search embeds its query through the embedding service, so it needs GEMINI_API_KEY
+(or a warm embedding cache); pass --endpoints profile to skip it.
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+from typing import Any, Dict, List
+import httpx
+from config.database import Database
+from config.indexes import ensure_indexes
+
+QUERIES = ["coffee", "groceries last month", "uber rides", "netflix subscription", "rent payment"]
+
+
+def _paths(endpoints: List[str], user_id: str, count: int) -> List[tuple]:
+    """`count` requests alternating between the chosen endpoints, so they contend with each other."""
+    paths = []
+    for i in range(count):
+        endpoint = endpoints[i % len(endpoints)]
+        if endpoint == "profile":
+            paths.append(("profile", f"/api/v1/users/{user_id}"))
+        else:
+            paths.append(("search", f"/api/v1/transactions/search?query={QUERIES[i % len(QUERIES)]}&limit=5"))
+    return paths
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def measure(client: httpx.AsyncClient, paths: List[tuple], concurrency: int) -> Dict[str, Dict[str, Any]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+
+    async def one(endpoint: str, path: str):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path)
+            elapsed = (time.perf_counter() - started) * 1000
+        latencies.setdefault(endpoint, []).append(elapsed)
+        if response.status_code >= 400:
+            errors[endpoint] = errors.get(endpoint, 0) + 1
+
+    # One warm-up pass per endpoint (connection, caches, index partitions)
+    for endpoint, path in {endpoint: path for endpoint, path in paths}.items():
+        await client.get(path)
+    started = time.perf_counter()
+    await asyncio.gather(*(one(endpoint, path) for endpoint, path in paths))
+    wall = time.perf_counter() - started
+    return {
+        endpoint: {
+            "requests": len(values),
+            "errors": errors.get(endpoint, 0),
+            "p50_ms": round(_percentile(values, 50), 1),
+            "p99_ms": round(_percentile(values, 99), 1),
+            "rps": round(len(values) / wall, 1),
+        }
+        for endpoint, values in latencies.items()
+    }
+
+
+async def _inline(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def _serve():
+    """Starts the app on a free local port in a background thread; returns (server, url)."""
+    import uvicorn
+    from main import app
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    # The client must not share the server's event loop, or inline calls would block it too
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def run_in_process(paths: List[tuple], concurrency: int) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    Database.connect()
+    ensure_indexes(Database.db)
+    server, url = _serve()
+    results = {}
+    offloaded = Database.run
+    try:
+        for mode in ("inline", "offload"):
+            Database.run = offloaded if mode == "offload" else _inline
+            results[mode] = (await run_against(url, paths, concurrency))["server"]
+    finally:
+        Database.run = offloaded
+        server.should_exit = True
+        Database.close()
+    return results
+
+
+async def run_against(url: str, paths: List[tuple], concurrency: int) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        return {"server": await measure(client, paths, concurrency)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent p50/p99 latency of the profile and search endpoints.")
+    parser.add_argument("--url", help="Measure a running server instead of the in-process app")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--user-id", default="user_001")
+    parser.add_argument("--endpoints", nargs="+", choices=["profile", "search"], default=["profile", "search"])
+    args = parser.parse_args()
+
+    paths = _paths(args.endpoints, args.user_id, args.requests)
+    if args.url:
+        results = asyncio.run(run_against(args.url, paths, args.concurrency))
+    else:
+        results = asyncio.run(run_in_process(paths, args.concurrency))
+
+    print(f"{'mode':>8} {'endpoint':>8} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>7}")
+    for mode, endpoints in results.items():
+        for endpoint, row in endpoints.items():
+            print(f"{mode:>8} {endpoint:>8} {row['requests']:>8} {row['errors']:>6} "
+                  f"{row['p50_ms']:>8} {row['p99_ms']:>8} {row['rps']:>7}")
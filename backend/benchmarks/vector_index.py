@@ -0,0 +1,81 @@
+"""
+IVF vs exact vector search: recall@k and per-query latency.
+
+    python -m benchmarks.vector_index [--sizes 10000 100000 1000000] [--dimensions 768]
+"""
+import argparse
+import time
+from typing import Any, Dict, List
+import numpy as np
+from repositories.vector_index import ExactVectorIndex, IVFVectorIndex, _IVFPartition, _Partition, _normalize
+
+
+def _clustered_vectors(n: int, dimensions: int, rng: np.random.Generator, clusters: int = 1000,
+                       spread: float = 2.0, block: int = 100_000) -> np.ndarray:
+    """Unit vectors around `clusters` topics, closer to real embeddings than uniform noise."""
+    topics = _normalize(rng.standard_normal((clusters, dimensions)).astype(np.float32))
+    matrix = np.empty((n, dimensions), dtype=np.float32)
+    for start in range(0, n, block):
+        size = min(block, n - start)
+        noise = rng.standard_normal((size, dimensions)).astype(np.float32) * (spread / np.sqrt(dimensions))
+        matrix[start:start + size] = _normalize(topics[rng.integers(0, clusters, size)] + noise)
+    return matrix
+
+
+def benchmark(sizes=(10_000, 100_000, 1_000_000), dimensions: int = 768, queries: int = 100,
+              k: int = 10, nprobes=(4, 8, 16, 32)) -> List[Dict[str, Any]]:
+    """
+    Recall@k and per-query latency of the IVF index against exact search, on one
+    in-memory partition of synthetic clustered vectors per size (no MongoDB needed).
+    IVF recall depends on how clustered the vectors are, so treat the numbers as
+    relative; queries are perturbed copies of stored vectors.
+    """
+    rows = []
+    for n in sizes:
+        rng = np.random.default_rng(n)
+        matrix = _clustered_vectors(n, dimensions, rng)
+        documents = [{"row": i} for i in range(n)]
+        noise = rng.standard_normal((queries, dimensions)).astype(np.float32) * (0.5 / np.sqrt(dimensions))
+        probes = matrix[rng.integers(0, n, queries)] + noise
+
+        exact = ExactVectorIndex(None)
+        exact_partition = _Partition()
+        exact_partition.documents, exact_partition.matrix = documents, matrix
+        exact._partitions[None] = exact_partition
+        started = time.perf_counter()
+        truth = [{hit["row"] for hit in exact.search(query, limit=k)} for query in probes]
+        exact_ms = (time.perf_counter() - started) * 1000 / queries
+        rows.append({"n": n, "index": "exact", "nprobe": None, "recall": 1.0,
+                     "ms_per_query": round(exact_ms, 3), "build_s": 0.0})
+
+        ivf = IVFVectorIndex(None)
+        ivf_partition = _IVFPartition()
+        ivf_partition.documents, ivf_partition.matrix = documents, matrix
+        started = time.perf_counter()
+        ivf._train(ivf_partition)
+        build_s = time.perf_counter() - started
+        ivf._partitions[None] = ivf_partition
+        for nprobe in nprobes:
+            ivf.nprobe = nprobe
+            started = time.perf_counter()
+            found = [{hit["row"] for hit in ivf.search(query, limit=k)} for query in probes]
+            ivf_ms = (time.perf_counter() - started) * 1000 / queries
+            recall = sum(len(hits & expected) for hits, expected in zip(found, truth)) / (k * queries)
+            rows.append({"n": n, "index": "ivf", "nprobe": nprobe, "recall": round(recall, 3),
+                         "ms_per_query": round(ivf_ms, 3), "build_s": round(build_s, 1)})
+        del matrix, documents, exact, ivf, exact_partition, ivf_partition
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="IVF vs exact vector search: recall@k and latency.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dimensions", type=int, default=768, help="1M x 768 float32 needs ~3 GB of RAM")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'n':>9} {'index':>6} {'nprobe':>6} {'recall@' + str(args.k):>9} {'ms/query':>9} {'build s':>8}")
+    for row in benchmark(args.sizes, args.dimensions, args.queries, args.k):
+        print(f"{row['n']:>9,} {row['index']:>6} {row['nprobe'] or '-':>6} {row['recall']:>9} "
+              f"{row['ms_per_query']:>9} {row['build_s']:>8}")
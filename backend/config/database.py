@@ -1,3 +1,6 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from config.settings import settings
@@ -5,6 +8,7 @@ from config.settings import settings
 class Database:
     client: MongoClient = None
     db = None
+    executor: ThreadPoolExecutor = None
 
     @classmethod
     def connect(cls):
@@ -21,10 +25,30 @@ class Database:
             cls.connect()
         return cls.db[collection_name]
 
+    @classmethod
+    def get_executor(cls) -> ThreadPoolExecutor:
+        """Returns the bounded thread pool that blocking PyMongo calls run on."""
+        if cls.executor is None:
+            cls.executor = ThreadPoolExecutor(
+                max_workers=settings.DB_MAX_WORKERS,
+                thread_name_prefix="mongo"
+            )
+        return cls.executor
+
+    @classmethod
+    async def run(cls, func, *args, **kwargs):
+        """Runs a blocking database call off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cls.get_executor(), functools.partial(func, *args, **kwargs))
+
     @classmethod
     def close(cls):
         """Closes the connection."""
+        if cls.executor:
+            cls.executor.shutdown(wait=True)
+            cls.executor = None
         if cls.client:
             cls.client.close()
             cls.client = None
+            cls.db = None
             print(" MongoDB Connection Closed")
@@ -0,0 +1,191 @@
+"""
+Declarative index registry.
+
+Every index the repositories rely on is declared here and created at startup.
+`find_collscans` runs explain() on each repository query shape; run this module
+directly (python -m config.indexes) to ensure indexes and fail on any COLLSCAN.
+"""
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.database import Database as MongoDatabase
+from pymongo.errors import OperationFailure, PyMongoError
+from pymongo.operations import SearchIndexModel
+from config.settings import settings
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    # Unique key also required by the $merge in AggregateRepository.rebuild
+    "spending_aggregates": [
+        IndexModel(
+            [("user_id", ASCENDING), ("period", ASCENDING), ("dimension", ASCENDING), ("key", ASCENDING)],
+            name="aggregate_key_unique",
+            unique=True
+        ),
+    ],
+    settings.COLLECTION_NAME: [
+        # Keys rows written on the request path, so the vector writer can attach their embeddings
+        IndexModel(
+            [("idempotency_key", ASCENDING)],
+            name="idempotency_key_unique",
+            unique=True,
+            partialFilterExpression={"idempotency_key": {"$exists": True}}
+        ),
+        # Identity of seeded rows for incremental re-seeding (seed_database mode="sync")
+        IndexModel(
+            [("record_key", ASCENDING)],
+            name="record_key_unique",
+            unique=True,
+            partialFilterExpression={"record_key": {"$exists": True}}
+        ),
+        # Rows still waiting for the vector writer (re-queued at startup)
+        IndexModel(
+            [("embedding_pending", ASCENDING)],
+            name="embedding_pending",
+            partialFilterExpression={"embedding_pending": True}
+        ),
+        # Serves get_recent_transactions (prefix) and keyset pagination on (date, _id)
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)], name="user_id_date_id"),
+        # Serves text_search; English stop words keep "the", "at", "my" in a sentence-long
+        # query from matching every description (merchant names still match as typed)
+        IndexModel(
+            [("merchant", TEXT), ("description", TEXT), ("category", TEXT)],
+            name="transactions_text",
+            weights={"merchant": 10, "category": 5, "description": 1},
+            default_language="english"
+        ),
+    ],
+}
+
+# Atlas Vector Search index used by AtlasVectorIndex (only creatable on Atlas)
+VECTOR_INDEXES: Dict[str, SearchIndexModel] = {
+    settings.COLLECTION_NAME: SearchIndexModel(
+        name="vector_index",
+        type="vectorSearch",
+        definition={
+            "fields": [
+                {"type": "vector", "path": "embedding", "numDimensions": 768, "similarity": "cosine"},
+                {"type": "filter", "path": "user_id"},
+                # Structured pre-filters from services.query_parser
+                {"type": "filter", "path": "date"},
+                {"type": "filter", "path": "amount"},
+                {"type": "filter", "path": "category"},
+            ]
+        },
+    ),
+}
+
+# Representative query shape of each repository read: (collection, method, filter, sort)
+QUERY_SHAPES = [
+    ("users", "UserRepository.get_user", {"user_id": "user_001"}, None),
+    ("users", "UserRepository.get_user_by_email", {"email": "someone@example.com"}, None),
+    ("spending_aggregates", "AggregateRepository.get_summary", {"user_id": "user_001"}, None),
+    (settings.COLLECTION_NAME, "TransactionRepository.get_recent_transactions", {"user_id": "user_001"}, [("date", -1)]),
+    (settings.COLLECTION_NAME, "TransactionRepository.list_transactions", {"user_id": "user_001"}, [("date", -1), ("_id", -1)]),
+    (settings.COLLECTION_NAME, "TransactionRepository.pending_embeddings", {"embedding_pending": True}, None),
+    (settings.COLLECTION_NAME, "TransactionRepository.seed_state", {"record_key": {"$in": ["a", "b"]}}, None),
+    (settings.COLLECTION_NAME, "TransactionRepository.existing_idempotency_keys", {"idempotency_key": {"$in": ["a", "b"]}}, None),
+]
+
+
+# Server error codes for an existing index whose options / keys differ under the same name
+INDEX_CONFLICT_CODES = (85, 86)
+
+
+def ensure_indexes(db: MongoDatabase):
+    """
+    Creates any missing indexes. An existing index whose definition changed
+    (e.g. the text index language) is dropped and rebuilt under its name.
+    """
+    for collection_name, models in INDEXES.items():
+        try:
+            created = db[collection_name].create_indexes(models)
+            print(f"🗂️ Indexes ensured on {collection_name}: {', '.join(created)}")
+        except OperationFailure as e:
+            if e.code in INDEX_CONFLICT_CODES:
+                _rebuild_changed_indexes(db[collection_name], models)
+                continue
+            # e.g. duplicate emails blocking a unique index; the app still runs, just slower
+            print(f"⚠️ Could not create indexes on {collection_name}: {e}")
+
+    if settings.VECTOR_INDEX_BACKEND != "atlas":
+        return
+    for collection_name, model in VECTOR_INDEXES.items():
+        collection = db[collection_name]
+        try:
+            name = model.document["name"]
+            definition = model.document["definition"]
+            existing = list(collection.list_search_indexes(name))
+            if not existing:
+                collection.create_search_index(model)
+                print(f"🗂️ Created vector search index '{name}' on {collection_name}")
+            elif _search_fields(existing[0].get("latestDefinition") or existing[0].get("definition")) != _search_fields(definition):
+                # e.g. filter fields added since the index was created; Atlas rebuilds it in place
+                collection.update_search_index(name, definition)
+                print(f"🗂️ Updated vector search index '{name}' on {collection_name}")
+        except PyMongoError as e:
+            print(f"⚠️ Vector search index not ensured on {collection_name} (Atlas only): {e}")
+
+
+def _rebuild_changed_indexes(collection, models: List[IndexModel]):
+    for model in models:
+        name = model.document["name"]
+        try:
+            collection.create_indexes([model])
+        except OperationFailure as e:
+            if e.code not in INDEX_CONFLICT_CODES:
+                print(f"⚠️ Could not create index '{name}' on {collection.name}: {e}")
+                continue
+            try:
+                collection.drop_index(name)
+                collection.create_indexes([model])
+                print(f"🗂️ Rebuilt index '{name}' on {collection.name} with its new definition")
+            except OperationFailure as e:
+                print(f"⚠️ Could not rebuild index '{name}' on {collection.name}: {e}")
+
+
+def _search_fields(definition: Optional[Dict[str, Any]]) -> List[Tuple]:
+    """Order-insensitive view of a search index definition's fields, for comparison."""
+    fields = (definition or {}).get("fields", [])
+    return sorted(tuple(sorted((key, str(value)) for key, value in field.items())) for field in fields)
+
+
+def _stages(plan: Any):
+    """Yields every stage name in an explain() plan tree."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+def find_collscans(db: MongoDatabase) -> List[str]:
+    """Returns the repository methods whose winning plan contains a COLLSCAN."""
+    offenders = []
+    for collection_name, method, query, sort in QUERY_SHAPES:
+        cursor = db[collection_name].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _stages(plan):
+            offenders.append(method)
+    return offenders
+
+
+if __name__ == "__main__":
+    from config.database import Database
+
+    Database.connect()
+    ensure_indexes(Database.db)
+    collscans = find_collscans(Database.db)
+    Database.close()
+    if collscans:
+        print(f"❌ COLLSCAN detected in: {', '.join(collscans)}")
+        sys.exit(1)
+    print("✅ All repository queries use an index.")
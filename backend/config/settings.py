@@ -17,6 +17,87 @@ class Settings:
     
     DB_NAME: str = "neurobank"
     COLLECTION_NAME: str = "transactions"
+    DB_MAX_WORKERS: int = int(os.getenv("DB_MAX_WORKERS", "32"))
+    # Run explain() on repository queries at startup and warn about collection scans
+    VERIFY_QUERY_PLANS: bool = os.getenv("VERIFY_QUERY_PLANS", "false").lower() == "true"
+
+    # Vector Search: "atlas" ($vectorSearch), "exact" (in-process NumPy) or "ivf" (in-process approximate)
+    VECTOR_INDEX_BACKEND: str = os.getenv("VECTOR_INDEX_BACKEND", "atlas")
+    VECTOR_NUM_CANDIDATES: int = int(os.getenv("VECTOR_NUM_CANDIDATES", "100"))
+    VECTOR_IVF_NPROBE: int = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+    # Search: "vector", "lexical" or "hybrid" ($text + vector merged with reciprocal-rank fusion)
+    SEARCH_MODE: str = os.getenv("SEARCH_MODE", "hybrid")
+    SEARCH_RRF_K: int = int(os.getenv("SEARCH_RRF_K", "60"))
+    # Keyword queries up to this many terms skip the embedding when the top $text hit names the merchant
+    SEARCH_LEXICAL_MAX_TERMS: int = int(os.getenv("SEARCH_LEXICAL_MAX_TERMS", "3"))
+    # Embedding storage: float64 (BSON array) | float32 | float16 | int8 (packed binary)
+    EMBEDDING_STORAGE: str = os.getenv("EMBEDDING_STORAGE", "float64")
+
+    # User profile cache TTL (seconds); writes through UserRepository invalidate or patch entries
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "30"))
+
+    # Transaction history paging / export
+    HISTORY_PAGE_MAX: int = int(os.getenv("HISTORY_PAGE_MAX", "200"))
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+    # Avatar Session (Azure STS tokens live 10 minutes; relay credentials longer)
+    AVATAR_TOKEN_TTL: float = float(os.getenv("AVATAR_TOKEN_TTL", "540"))
+    AVATAR_RELAY_TOKEN_TTL: float = float(os.getenv("AVATAR_RELAY_TOKEN_TTL", "3600"))
+    AVATAR_TOKEN_REFRESH_AHEAD: float = float(os.getenv("AVATAR_TOKEN_REFRESH_AHEAD", "0.2"))
+    AVATAR_HTTP_POOL_SIZE: int = int(os.getenv("AVATAR_HTTP_POOL_SIZE", "20"))
+    AVATAR_HTTP_TIMEOUT: float = float(os.getenv("AVATAR_HTTP_TIMEOUT", "10"))
+
+    # WebSocket backplane (e.g. redis://localhost:6379/0); unset = single-process delivery
+    BACKPLANE_URL: str = os.getenv("BACKPLANE_URL")
+    # Reconnect delay after the backplane loses Redis: doubles per failed attempt up to the max
+    BACKPLANE_RECONNECT_BACKOFF: float = float(os.getenv("BACKPLANE_RECONNECT_BACKOFF", "0.5"))
+    BACKPLANE_RECONNECT_MAX: float = float(os.getenv("BACKPLANE_RECONNECT_MAX", "30"))
+    # Per-socket send queue: coalesce snapshots once backed up, evict when full or stalled
+    WS_MAX_QUEUE: int = int(os.getenv("WS_MAX_QUEUE", "32"))
+    WS_COALESCE_AFTER: int = int(os.getenv("WS_COALESCE_AFTER", "4"))
+    WS_SEND_TIMEOUT: float = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+
+    # Semantic answer cache: per user, keyed by question embedding + language + data version
+    RESPONSE_CACHE_THRESHOLD: float = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "50"))
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+
+    # Avatar LLM and per-turn context budget (profile is always kept; spending and transactions are truncated)
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-4o")
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+
+    # Avatar turn budget (seconds) for retrieval + LLM
+    AVATAR_REQUEST_TIMEOUT: float = float(os.getenv("AVATAR_REQUEST_TIMEOUT", "20"))
+
+    # Bulk NDJSON ingestion: rows per insert/embed/balance chunk, validation errors echoed back
+    INGEST_CHUNK_SIZE: int = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+    INGEST_MAX_ERRORS: int = int(os.getenv("INGEST_MAX_ERRORS", "100"))
+    # Embedding calls per ingest chunk run on the request path, so they are sized apart from seeding
+    INGEST_EMBED_BATCH_SIZE: int = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "100"))
+    INGEST_EMBED_CONCURRENCY: int = int(os.getenv("INGEST_EMBED_CONCURRENCY", "2"))
+
+    # Seeding / Embedding Pipeline
+    SEED_BATCH_SIZE: int = int(os.getenv("SEED_BATCH_SIZE", "100"))
+    SEED_CONCURRENCY: int = int(os.getenv("SEED_CONCURRENCY", "4"))
+    SEED_MAX_RETRIES: int = int(os.getenv("SEED_MAX_RETRIES", "3"))
+    SEED_RETRY_BACKOFF: float = float(os.getenv("SEED_RETRY_BACKOFF", "1.0"))
+
+    # Background jobs for post-commit side effects; JOB_STORE=mongo keeps queued jobs across restarts
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_MAX: int = int(os.getenv("JOB_QUEUE_MAX", "10000"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_DEAD_LETTER_MAX: int = int(os.getenv("JOB_DEAD_LETTER_MAX", "1000"))
+    JOB_DRAIN_TIMEOUT: float = float(os.getenv("JOB_DRAIN_TIMEOUT", "10"))
+    JOB_STORE: str = os.getenv("JOB_STORE", "memory")
+
+    # Asynchronous vector-store writes (EmbeddingService.add_to_vector_store)
+    VECTOR_WRITE_BATCH_SIZE: int = int(os.getenv("VECTOR_WRITE_BATCH_SIZE", "32"))
+    VECTOR_WRITE_LINGER: float = float(os.getenv("VECTOR_WRITE_LINGER", "0.05"))
+    VECTOR_WRITE_FLUSH_TIMEOUT: float = float(os.getenv("VECTOR_WRITE_FLUSH_TIMEOUT", "10"))
+
+    # Embedding Cache (LRU in memory, optional SQLite file for warm restarts)
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH")
 
     def validate(self):
         if not self.MONGO_URI:
@@ -15,7 +15,7 @@ class LoginRequest(BaseModel):
 @router.post("/auth/otp")
 async def send_otp(request: OTPRequest):
     """Generates and sends OTP to user's email."""
-    otp = auth_service.generate_otp(request.email)
+    otp = await auth_service.generate_otp(request.email)
     if not otp:
         raise HTTPException(status_code=404, detail="Email not linked to any NeuroBank account.")
         
@@ -26,7 +26,7 @@ async def send_otp(request: OTPRequest):
 @router.post("/auth/login")
 async def login_with_otp(request: LoginRequest):
     """Verifies OTP and returns user session."""
-    user = auth_service.verify_otp(request.email, request.code)
+    user = await auth_service.verify_otp(request.email, request.code)
     
     if not user:
         raise HTTPException(status_code=401, detail="Invalid or expired OTP")
@@ -1,8 +1,18 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 from services.avatar_service import AvatarService
 from services.audio_service import AudioService
+from services.intent_engine import intent_engine
+from services.response_cache import response_cache
+from services.embedding_service import embedding_cache
+from services.websocket_manager import manager
+from config.settings import settings
+from typing import Any, Dict, List
+import asyncio
 import json
 
+# Appended to a streamed answer cut short after some sentences were sent
+TRUNCATION_MARKER = " …"
+
 router = APIRouter()
 avatar_service = AvatarService()
 audio_service = AudioService()
@@ -13,9 +23,11 @@ async def start_avatar_session():
     Returns an Azure Token and ICE config for the frontend to initialize the Avatar.
     """
     try:
-        token = await avatar_service.get_token()
-        # ICE config comes from the Relay Token endpoint
-        relay_token = await avatar_service.get_relay_token()
+        # ICE config comes from the Relay Token endpoint; both are cached and fetched concurrently
+        token, relay_token = await asyncio.gather(
+            avatar_service.get_token(),
+            avatar_service.get_relay_token()
+        )
         
         return {
             "token": token, 
@@ -25,6 +37,19 @@ async def start_avatar_session():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/metrics")
+async def assistant_metrics():
+    """
+    Share of turns answered without a model call, answer and embedding cache counters,
+    and this worker's dashboard WebSocket counters and send-queue depths.
+    """
+    return {
+        "intents": intent_engine.stats(),
+        "response_cache": response_cache.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "websockets": manager.metrics()
+    }
+
 @router.websocket("/ws")
 async def audio_websocket(websocket: WebSocket, user_id: str = "user_001"):
     """
@@ -33,11 +58,84 @@ async def audio_websocket(websocket: WebSocket, user_id: str = "user_001"):
     
     1. Frontend sends text (STT result from Azure SDK).
     2. Backend acts as the 'Brain': Search Vector DB -> Formulate Response.
-    3. Backend sends text back.
+    3. Backend sends text back (whole, or sentence by sentence when "stream" is set).
     4. Frontend sends text to Avatar to speak.
     """
     await websocket.accept()
     print(f"🔌 WebSocket connected for User: {user_id}")
+
+    # Turns are answered in order by a single responder task, so the receive loop
+    # stays free to notice the socket closing and cancel in-flight LLM/search work.
+    inbox: asyncio.Queue = asyncio.Queue()
+
+    async def send(payload: Dict[str, Any]) -> bool:
+        """Returns False, after closing the socket, when the client can't be reached."""
+        try:
+            await websocket.send_json(payload)
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not send to User: {user_id}: {e}")
+            try:
+                await websocket.close()
+            except Exception:
+                pass
+            return False
+
+    async def stream_response(text: str, sentences: List[str]) -> bool:
+        """Forwards each sentence as soon as it is generated, collecting them in `sentences`."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.AVATAR_REQUEST_TIMEOUT
+        stream = audio_service.stream_audio_intent(user_id, text)
+        try:
+            while True:
+                sentence = await asyncio.wait_for(stream.__anext__(), timeout=max(0, deadline - loop.time()))
+                if not await send({
+                    "type": "avatar_response_chunk",
+                    "index": len(sentences),
+                    "text": sentence
+                }):
+                    return False
+                sentences.append(sentence)
+        except StopAsyncIteration:
+            pass
+        finally:
+            await stream.aclose()
+        return True
+
+    async def respond():
+        while True:
+            message = await inbox.get()
+            text = message.get("text")
+            streaming = bool(message.get("stream"))
+            sentences: List[str] = []
+            failed = False
+            try:
+                if streaming:
+                    if not await stream_response(text, sentences):
+                        return
+                    response_text = " ".join(sentences)
+                else:
+                    response_text = await asyncio.wait_for(
+                        audio_service.process_audio_intent(user_id, text),
+                        timeout=settings.AVATAR_REQUEST_TIMEOUT
+                    )
+            except asyncio.TimeoutError:
+                print(f"⏱️ Avatar turn timed out for User: {user_id}")
+                failed = True
+                response_text = "I'm sorry, that took longer than expected. Please ask me again."
+            except Exception as e:
+                print(f"⚠️ Avatar turn failed for User: {user_id}: {e}")
+                failed = True
+                response_text = "I'm sorry, something went wrong while processing your request."
+            # Streaming turns end with the full text so the client can reconcile its transcript
+            end = {"type": "avatar_response_end" if streaming else "avatar_response", "text": response_text}
+            if failed and sentences:
+                # The avatar already spoke these sentences; the apology would never be heard
+                end.update(text=" ".join(sentences) + TRUNCATION_MARKER, truncated=True)
+            if not await send(end):
+                return
+
+    responder = asyncio.create_task(respond())
     
     try:
         while True:
@@ -47,15 +145,14 @@ async def audio_websocket(websocket: WebSocket, user_id: str = "user_001"):
             
             if message.get("type") == "text_input":
                 # Scenario: Frontend does STT, sends text
-                text = message.get("text")
-                response_text = await audio_service.process_audio_intent(user_id, text)
-                await websocket.send_json({
-                    "type": "avatar_response",
-                    "text": response_text
-                })
+                # Set "stream": true to receive avatar_response_chunk messages per sentence,
+                # followed by avatar_response_end with the full text.
+                inbox.put_nowait(message)
             
             # Future: Handle binary audio chunks if we move STT to backend
             # elif message.get("type") == "audio_chunk": ...
 
     except WebSocketDisconnect:
         print("WebSocket disconnected")
+    finally:
+        responder.cancel()
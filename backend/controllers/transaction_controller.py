@@ -1,4 +1,6 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from services.transaction_service import TransactionService
 from typing import List, Dict, Any
 
@@ -6,19 +8,57 @@ router = APIRouter()
 transaction_service = TransactionService()
 
 @router.post("/seed")
-async def seed_data():
+async def seed_data(mode: str = Query("replace", description="replace (clear and reload) or sync (upsert changed rows only)")):
     """Endpoint to seed the database with mock transactions."""
     try:
-        result = transaction_service.seed_database()
+        # Seeding is long-running and blocking; keep it off the event loop
+        result = await run_in_threadpool(transaction_service.seed_database, mode=mode)
         return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ingest")
+async def ingest_transactions(request: Request):
+    """
+    Bulk ingestion of an NDJSON body, one transaction per line:
+    {"user_id": ..., "amount": ..., "merchant": ..., "date": ..., "category": ..., "description": ...}
+    plus an optional "external_id"; a row whose external_id was already ingested is skipped.
+    """
+    return await transaction_service.ingest_stream(request.stream())
+
 @router.get("/search")
-async def search_transactions(query: str = Query(..., description="Natural language query")):
+async def search_transactions(
+    query: str = Query(..., description="Natural language query"),
+    limit: int = Query(5, ge=1, le=50, description="Results to return"),
+    num_candidates: int = Query(None, ge=1, le=10000, description="ANN candidates (Atlas only)")
+):
     """Endpoint to search transactions using natural language."""
     try:
-        results = transaction_service.search_transactions(query)
+        results = await transaction_service.search_transactions(query, limit=limit, num_candidates=num_candidates)
         return {"results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/history/{user_id}")
+async def list_transactions(
+    user_id: str,
+    limit: int = Query(50, ge=1, description="Page size"),
+    cursor: str = Query(None, description="next_cursor from the previous page")
+):
+    """Keyset-paginated transaction history, newest first."""
+    try:
+        return await transaction_service.list_transactions(user_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/export/{user_id}")
+async def export_transactions(user_id: str, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """Streams the full transaction history as NDJSON or CSV."""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        transaction_service.export_transactions(user_id, fmt=format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{user_id}_transactions.{format}"'}
+    )
@@ -1,23 +1,25 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
-from repositories.user_repository import UserRepository
-from repositories.transaction_repository import TransactionRepository
+from repositories.user_repository import AsyncUserRepository
+from repositories.transaction_repository import AsyncTransactionRepository
 
 router = APIRouter()
-user_repository = UserRepository()
-transaction_repository = TransactionRepository()
+user_repository = AsyncUserRepository()
+transaction_repository = AsyncTransactionRepository()
 
 @router.get("/users/{user_id}")
 async def get_user_profile(user_id: str):
-    user = user_repository.get_user(user_id)
+    # Profile and recent transactions are independent, so fetch them concurrently
+    user, recent_transactions = await asyncio.gather(
+        user_repository.get_user(user_id),
+        transaction_repository.get_recent_transactions(user_id, limit=5)
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Calculate Total Balance
     total_balance = sum(acc["balance"] for acc in user.get("accounts", []))
     
-    # Fetch recent transactions
-    recent_transactions = transaction_repository.get_recent_transactions(user_id, limit=5)
-    
     return {
         "user_id": user["user_id"],
         "name": user["name"],
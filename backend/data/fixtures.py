@@ -0,0 +1,226 @@
+"""
+Lazy fixture sources for seeding.
+
+Readers stream JSONL (.jsonl/.ndjson) and CSV files, optionally gzipped, one
+record at a time, so multi-million-row fixtures never sit in memory. The
+synthetic generators produce users and transactions in the same schema as
+data/mock_data.py.
+"""
+import csv
+import gzip
+import hashlib
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+import numpy as np
+
+# (merchant, category, min amount, max amount, description)
+MERCHANTS = [
+    ("Whole Foods", "Groceries", 20, 180, "Weekly grocery shopping."),
+    ("Loblaws", "Groceries", 15, 160, "Groceries and household items."),
+    ("Walmart", "Groceries", 10, 200, "Groceries and essentials."),
+    ("Starbucks", "Dining", 4, 18, "Coffee and a pastry."),
+    ("Uber Eats", "Dining", 18, 75, "Dinner delivery."),
+    ("The Keg", "Dining", 60, 220, "Dinner with friends."),
+    ("Presto", "Transport", 3, 160, "Transit fare reload."),
+    ("Shell", "Transport", 40, 110, "Gas fill-up."),
+    ("Uber", "Transport", 9, 60, "Ride across town."),
+    ("Netflix", "Subscription", 16, 24, "Monthly streaming subscription fee."),
+    ("Spotify", "Subscription", 11, 17, "Monthly music streaming subscription."),
+    ("Rogers", "Utilities", 80, 140, "Mobile and internet bill."),
+    ("Hydro One", "Utilities", 60, 220, "Monthly electricity bill."),
+    ("Amazon", "Shopping", 12, 300, "Online order."),
+    ("IKEA", "Shopping", 30, 600, "Furniture and home goods."),
+    ("Shoppers Drug Mart", "Health", 8, 120, "Pharmacy purchase."),
+    ("Cineplex", "Entertainment", 14, 60, "Movie tickets."),
+    ("Best Buy", "Electronics", 25, 1800, "Electronics purchase."),
+]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Tremblay", "Gagnon", "Roy", "Smith", "Brown", "Singh", "Nguyen", "Martin", "Lee", "Wilson"]
+
+TRANSACTION_FIELDS = ["user_id", "amount", "merchant", "date", "category", "description"]
+
+
+def _open(path: Path, mode: str = "rt"):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode, encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _format(path: Path) -> str:
+    suffixes = [s for s in path.suffixes if s != ".gz"]
+    return suffixes[-1].lstrip(".") if suffixes else ""
+
+
+def _revive_dates(value: Any) -> Any:
+    """Turns ISO strings under *date keys back into datetimes (JSON has no date type)."""
+    if isinstance(value, dict):
+        revived = {}
+        for key, item in value.items():
+            if key.endswith("date") and isinstance(item, str):
+                try:
+                    item = datetime.fromisoformat(item)
+                except ValueError:
+                    pass
+            revived[key] = _revive_dates(item)
+        return revived
+    if isinstance(value, list):
+        return [_revive_dates(item) for item in value]
+    return value
+
+
+def read_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with _open(path) as handle:
+        for line in handle:
+            if line.strip():
+                yield _revive_dates(json.loads(line))
+
+
+def read_csv(path: Path) -> Iterator[Dict[str, Any]]:
+    """Flat transaction rows; amount and date are converted to their schema types."""
+    with _open(path) as handle:
+        for row in csv.DictReader(handle):
+            row["amount"] = float(row["amount"])
+            row["date"] = datetime.fromisoformat(row["date"])
+            yield row
+
+
+def read_fixture(path: str) -> Iterator[Dict[str, Any]]:
+    """Streams records from a .jsonl/.ndjson/.csv file (optionally .gz)."""
+    path = Path(path)
+    fmt = _format(path)
+    if fmt in ("jsonl", "ndjson"):
+        return read_jsonl(path)
+    if fmt == "csv":
+        return read_csv(path)
+    raise ValueError(f"Unsupported fixture format '{path.name}'. Expected .jsonl, .ndjson or .csv (optionally .gz)")
+
+
+def write_fixture(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """Writes records as JSONL or CSV (by extension); returns the row count."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with _open(path, "wt") as handle:
+        if _format(path) == "csv":
+            writer = csv.DictWriter(handle, fieldnames=TRANSACTION_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for record in records:
+                writer.writerow({**record, "date": record["date"].isoformat()})
+                count += 1
+        else:
+            for record in records:
+                handle.write(json.dumps(record, default=lambda v: v.isoformat()) + "\n")
+                count += 1
+    return count
+
+
+def synthetic_user_id(index: int) -> str:
+    return f"user_{index + 1:06d}"
+
+
+def synthetic_anchor(now: datetime = None) -> datetime:
+    """
+    Midnight of `now` (default today): the date synthetic data is generated relative to.
+    The same seed and anchor always yield the same rows, so a resumed or repeated run
+    regenerates identical dates and record keys.
+    """
+    now = now or datetime.now()
+    return datetime(now.year, now.month, now.day)
+
+
+def generate_users(count: int, seed: int = 42, now: datetime = None) -> Iterator[Dict[str, Any]]:
+    """Yields `count` users with accounts, a mortgage, a credit card and two bills."""
+    now = synthetic_anchor(now)
+    for i in range(count):
+        rng = random.Random(f"{seed}:user:{i}")
+        user_id = synthetic_user_id(i)
+        suffix = user_id.split("_")[1]
+        yield {
+            "user_id": user_id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "email": f"{user_id}@example.com",
+            "phone": f"+1-416-555-{i % 10000:04d}",
+            "risk_score": rng.randint(10, 99),
+            "credit_score": rng.randint(580, 850),
+            "accounts": [
+                {"account_id": f"acc_{suffix}_chq", "type": "Chequing", "balance": round(rng.uniform(200, 8000), 2), "currency": "CAD"},
+                {"account_id": f"acc_{suffix}_sav", "type": "Savings", "balance": round(rng.uniform(0, 40000), 2), "currency": "CAD"},
+            ],
+            "loans": [
+                {
+                    "loan_id": f"loan_{suffix}_mtg",
+                    "type": "Mortgage",
+                    "original_amount": 350000.00,
+                    "remaining_balance": round(rng.uniform(20000, 340000), 2),
+                    "interest_rate": round(rng.uniform(2.5, 6.5), 2),
+                    "next_payment_date": (now + timedelta(days=rng.randint(1, 30))).replace(hour=0, minute=0, second=0, microsecond=0),
+                }
+            ],
+            "credit_cards": [
+                {
+                    "card_id": f"cc_{suffix}_{rng.randint(1000, 9999)}",
+                    "name": rng.choice(["Infinite Visa", "Cash Back Mastercard", "Avion Visa"]),
+                    "limit": 5000.00,
+                    "current_balance": round(rng.uniform(0, 4000), 2),
+                    "due_date": (now + timedelta(days=rng.randint(1, 28))).replace(hour=0, minute=0, second=0, microsecond=0),
+                }
+            ],
+            "bills": [
+                {
+                    "bill_id": f"bill_{suffix}_hydro",
+                    "merchant": "Hydro One",
+                    "amount": round(rng.uniform(60, 220), 2),
+                    "due_date": (now + timedelta(days=rng.randint(1, 28))).replace(hour=0, minute=0, second=0, microsecond=0),
+                    "status": "Unpaid",
+                    "category": "Utilities",
+                },
+                {
+                    "bill_id": f"bill_{suffix}_rent",
+                    "merchant": "Landlord Corp",
+                    "amount": 1200.00,
+                    "due_date": (now + timedelta(days=rng.randint(1, 28))).replace(hour=0, minute=0, second=0, microsecond=0),
+                    "status": "Unpaid",
+                    "category": "Rent",
+                },
+            ],
+        }
+
+
+def generate_transactions(user_count: int, per_user: int, seed: int = 42, days: int = 365,
+                          now: datetime = None) -> Iterator[Dict[str, Any]]:
+    """Yields `per_user` transactions for each of `user_count` synthetic users over the last `days` days."""
+    now = synthetic_anchor(now)
+    for i in range(user_count):
+        rng = random.Random(f"{seed}:tx:{i}")
+        user_id = synthetic_user_id(i)
+        for _ in range(per_user):
+            merchant, category, low, high, description = rng.choice(MERCHANTS)
+            yield {
+                "user_id": user_id,
+                "amount": round(rng.uniform(low, high), 2),
+                "merchant": merchant,
+                "date": now - timedelta(seconds=rng.randint(0, days * 86400)),
+                "category": category,
+                "description": description,
+            }
+
+
+class HashEmbeddingBackend:
+    """
+    Deterministic stand-in for EmbeddingService when building load-test datasets:
+    equal texts get equal unit vectors, with no API calls.
+    """
+
+    def __init__(self, dimensions: int = 768):
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dimensions)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
@@ -1,12 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes.transaction_routes import api_router
-from controllers.avatar_controller import router as avatar_router
+from controllers.avatar_controller import router as avatar_router, avatar_service
 from controllers.auth_controller import router as auth_router
 from controllers.user_controller import router as user_router
 from routes.realtime_routes import router as realtime_router
 from routes.agent_routes import router as agent_router
 from config.database import Database
+from config.settings import settings
+from config.indexes import ensure_indexes, find_collscans
+from services.websocket_manager import manager
+from services.vector_store_writer import vector_store_writer
+from services.invalidation import invalidation_bus
+from services.job_queue import job_queue
+import services.jobs  # registers the background job handlers
 
 app = FastAPI(title="NeuroBank-Guardian API", version="0.1.0")
 
@@ -33,11 +40,25 @@ app.include_router(user_router, prefix="/api/v1")
 async def startup_event():
     try:
         Database.connect()
+        ensure_indexes(Database.db)
+        if settings.VERIFY_QUERY_PLANS:
+            for method in find_collscans(Database.db):
+                print(f"⚠️ {method} is doing a COLLSCAN")
     except Exception as e:
         print(f"⚠️ Initial Database Connection Failed: {e}")
+    await avatar_service.start()
+    await manager.start()
+    invalidation_bus.attach(manager.backplane)
+    await vector_store_writer.start()
+    await job_queue.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    # Drain background jobs and queued vector writes while the database and sockets are still open
+    await job_queue.stop()
+    await vector_store_writer.close()
+    await avatar_service.close()
+    await manager.stop()
     try:
         Database.close()
     except Exception:
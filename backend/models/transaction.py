@@ -1,6 +1,41 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Any, Dict
 from datetime import datetime
+import numpy as np
+from bson.binary import Binary, BinaryVectorDtype
+
+# Supported on-disk representations for TransactionInDB.embedding:
+#   float64 - plain BSON array of doubles (~9.9 KB for 768 dims)
+#   float32 - BSON binary vector, subtype 9 (~3.1 KB)
+#   float16 - raw little-endian halves in a user-defined binary subtype (~1.6 KB)
+#   int8    - BSON binary vector, max-abs quantized to [-127, 127] (~0.8 KB)
+EMBEDDING_FORMATS = ("float64", "float32", "float16", "int8")
+FLOAT16_SUBTYPE = 0x80
+
+def encode_embedding(vector: List[float], fmt: str = "float64") -> Any:
+    """Packs an embedding for storage. int8 drops the scale, which cosine similarity ignores."""
+    if fmt == "float64":
+        return list(vector)
+    if fmt == "float32":
+        return Binary.from_vector(np.asarray(vector, dtype=np.float32).tolist(), BinaryVectorDtype.FLOAT32)
+    if fmt == "float16":
+        return Binary(np.asarray(vector, dtype="<f2").tobytes(), FLOAT16_SUBTYPE)
+    if fmt == "int8":
+        values = np.asarray(vector, dtype=np.float64)
+        peak = np.abs(values).max() if values.size else 0.0
+        scale = 127.0 / peak if peak else 0.0
+        return Binary.from_vector(np.round(values * scale).astype(int).tolist(), BinaryVectorDtype.INT8)
+    raise ValueError(f"Unknown embedding format '{fmt}'. Expected one of: {', '.join(EMBEDDING_FORMATS)}")
+
+def decode_embedding(value: Any) -> List[float]:
+    """Inverse of encode_embedding; accepts any stored representation."""
+    if value is None:
+        return None
+    if isinstance(value, Binary):
+        if value.subtype == FLOAT16_SUBTYPE:
+            return np.frombuffer(bytes(value), dtype="<f2").astype(np.float32).tolist()
+        return [float(x) for x in value.as_vector().data]
+    return list(value)
 
 class TransactionBase(BaseModel):
     user_id: str
@@ -11,12 +46,72 @@ class TransactionBase(BaseModel):
     description: str
 
 class TransactionCreate(TransactionBase):
-    pass
+    # Id assigned by the sending feed; a re-sent row with the same id is skipped
+    external_id: Optional[str] = None
 
 class TransactionInDB(TransactionBase):
     id: Optional[str] = Field(None, alias="_id")
     embedding: Optional[List[float]] = None
 
+    @field_validator("embedding", mode="before")
+    @classmethod
+    def unpack_embedding(cls, value):
+        return decode_embedding(value)
+
     class Config:
         populate_by_name = True
         arbitrary_types_allowed = True
+
+class TransactionFilters(BaseModel):
+    """
+    Structured pre-filters for transaction search (see services.query_parser).
+    date_to is exclusive; amounts are inclusive.
+    """
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    categories: Optional[List[str]] = None
+
+    def is_empty(self) -> bool:
+        return not any(value is not None for value in self.model_dump().values())
+
+    def to_mongo(self) -> Dict[str, Any]:
+        """MQL clauses valid both in find() and in a $vectorSearch filter."""
+        clauses: Dict[str, Any] = {}
+        if self.date_from or self.date_to:
+            clauses["date"] = {}
+            if self.date_from:
+                clauses["date"]["$gte"] = self.date_from
+            if self.date_to:
+                clauses["date"]["$lt"] = self.date_to
+        if self.min_amount is not None or self.max_amount is not None:
+            clauses["amount"] = {}
+            if self.min_amount is not None:
+                clauses["amount"]["$gte"] = self.min_amount
+            if self.max_amount is not None:
+                clauses["amount"]["$lte"] = self.max_amount
+        if self.categories:
+            clauses["category"] = {"$in": self.categories}
+        return clauses
+
+    def matches(self, transaction: Dict[str, Any]) -> bool:
+        """Same semantics as to_mongo(), for the in-process vector indexes."""
+        date = transaction.get("date")
+        if isinstance(date, str):
+            try:
+                date = datetime.fromisoformat(date)
+            except ValueError:
+                date = None
+        if self.date_from and (date is None or date < self.date_from):
+            return False
+        if self.date_to and (date is None or date >= self.date_to):
+            return False
+        amount = transaction.get("amount")
+        if self.min_amount is not None and (amount is None or amount < self.min_amount):
+            return False
+        if self.max_amount is not None and (amount is None or amount > self.max_amount):
+            return False
+        if self.categories and transaction.get("category") not in self.categories:
+            return False
+        return True
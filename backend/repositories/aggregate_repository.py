@@ -0,0 +1,100 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List
+from pymongo import UpdateOne
+from config.database import Database
+from config.settings import settings
+from repositories.async_repository import AsyncRepository
+
+# Aggregated dimensions; "all" is the all-time period next to each "YYYY-MM" month
+DIMENSIONS = ("category", "merchant")
+# Money moving in or between the user's own accounts is not spending
+NON_SPENDING_CATEGORIES = ("Income", "Transfer")
+
+def _period(date: Any) -> str:
+    if isinstance(date, datetime):
+        return date.strftime("%Y-%m")
+    return str(date)[:7]
+
+class AggregateRepository:
+    """
+    Materialized spending totals per (user_id, period, dimension, key), e.g.
+    (user_001, "2025-10", "category", "Groceries") -> {total, count}.
+    Maintained incrementally on every write and rebuildable from the transactions collection.
+    """
+
+    def __init__(self):
+        self.collection = Database.get_collection("spending_aggregates")
+        self.transactions = Database.get_collection(settings.COLLECTION_NAME)
+
+    def apply(self, transactions: List[Dict[str, Any]]):
+        """Folds new transactions into the aggregates with one bulk write of $inc upserts."""
+        deltas = defaultdict(lambda: [0.0, 0])
+        for tx in transactions:
+            # Merchant totals only track spending, so payroll never ranks as a "top merchant"
+            dimensions = ("category",) if tx.get("category") in NON_SPENDING_CATEGORIES else DIMENSIONS
+            for period in (_period(tx["date"]), "all"):
+                for dimension in dimensions:
+                    delta = deltas[(tx["user_id"], period, dimension, tx.get(dimension) or "Other")]
+                    delta[0] += tx.get("amount", 0)
+                    delta[1] += 1
+        if not deltas:
+            return None
+        return self.collection.bulk_write([
+            UpdateOne(
+                {"user_id": user_id, "period": period, "dimension": dimension, "key": key},
+                {"$inc": {"total": round(total, 2), "count": count}},
+                upsert=True
+            )
+            for (user_id, period, dimension, key), (total, count) in deltas.items()
+        ], ordered=False)
+
+    def get_summary(self, user_id: str) -> List[Dict[str, Any]]:
+        """All aggregate rows for a user (a few dozen documents, served from the index)."""
+        return list(self.collection.find({"user_id": user_id}, {"_id": 0, "user_id": 0}))
+
+    def rebuild(self, user_id: str = None):
+        """Recomputes aggregates server-side from the transactions collection."""
+        match = {"user_id": user_id} if user_id else {}
+        self.collection.delete_many(match)
+        month = {
+            "$cond": [
+                {"$eq": [{"$type": "$date"}, "date"]},
+                {"$dateToString": {"format": "%Y-%m", "date": "$date"}},
+                {"$substrCP": [{"$toString": "$date"}, 0, 7]}
+            ]
+        }
+        keys = [
+            {"period": period, "dimension": dimension, "key": {"$ifNull": [f"${dimension}", "Other"]}}
+            for period in (month, "all")
+            for dimension in DIMENSIONS
+        ]
+        self.transactions.aggregate([
+            {"$match": match},
+            {"$project": {"user_id": 1, "amount": 1, "category": 1, "keys": keys}},
+            {"$unwind": "$keys"},
+            {"$match": {"$or": [{"keys.dimension": "category"}, {"category": {"$nin": list(NON_SPENDING_CATEGORIES)}}]}},
+            {"$group": {
+                "_id": {"user_id": "$user_id", "period": "$keys.period", "dimension": "$keys.dimension", "key": "$keys.key"},
+                "total": {"$sum": "$amount"},
+                "count": {"$sum": 1}
+            }},
+            {"$project": {
+                "_id": 0,
+                "user_id": "$_id.user_id",
+                "period": "$_id.period",
+                "dimension": "$_id.dimension",
+                "key": "$_id.key",
+                "total": {"$round": ["$total", 2]},
+                "count": 1
+            }},
+            {"$merge": {
+                "into": self.collection.name,
+                "on": ["user_id", "period", "dimension", "key"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }}
+        ])
+
+class AsyncAggregateRepository(AsyncRepository):
+    sync_class = AggregateRepository
@@ -0,0 +1,24 @@
+import functools
+from config.database import Database
+
+class AsyncRepository:
+    """
+    Awaitable facade over a synchronous repository.
+    Exposes the same method surface, but every call runs on the Database executor
+    so a slow Mongo query never blocks the event loop.
+    """
+    sync_class = None
+
+    def __init__(self, repository=None):
+        self.sync = repository or self.sync_class()
+
+    def __getattr__(self, name):
+        attr = getattr(self.sync, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await Database.run(attr, *args, **kwargs)
+
+        return call
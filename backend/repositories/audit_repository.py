@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Any, Dict
+from config.database import Database
+from repositories.async_repository import AsyncRepository
+
+class AuditRepository:
+    """Append-only log of money-moving events (written from background jobs)."""
+
+    def __init__(self):
+        self.collection = Database.get_collection("audit_log")
+
+    def record(self, user_id: str, event: str, details: Dict[str, Any], event_id: str = None):
+        """Inserts one audit entry; `event_id` makes a retried write a no-op."""
+        entry = {"user_id": user_id, "event": event, "details": details, "at": datetime.utcnow()}
+        if event_id:
+            return self.collection.update_one({"_id": event_id}, {"$setOnInsert": entry}, upsert=True)
+        return self.collection.insert_one(entry)
+
+class AsyncAuditRepository(AsyncRepository):
+    sync_class = AuditRepository
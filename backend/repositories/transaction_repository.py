@@ -1,47 +1,201 @@
-from typing import List, Dict, Any
+import hashlib
+import json
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from config.database import Database
+from repositories.async_repository import AsyncRepository
+from repositories.vector_index import get_vector_index, PROJECTED_FIELDS
 from config.settings import settings
+from models.transaction import encode_embedding, TransactionFilters
+
+# Identity of a seeded transaction; the description is content, so an edit is an update, not a new row
+RECORD_KEY_FIELDS = ("user_id", "date", "merchant", "amount")
+FINGERPRINT_FIELDS = {"_id", "_seq", "embedding", "score", "idempotency_key", "record_key", "content_hash", "text_hash"}
+
+
+def _digest(raw: str) -> str:
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def fingerprint(transaction: Dict[str, Any], text_key: str = "description") -> Dict[str, str]:
+    """record_key (identity), content_hash (every stored field) and text_hash (the embedded text)."""
+    content = {k: v for k, v in transaction.items() if k not in FINGERPRINT_FIELDS}
+    return {
+        "record_key": _digest("|".join(str(transaction.get(field)) for field in RECORD_KEY_FIELDS)),
+        "content_hash": _digest(json.dumps(content, sort_keys=True, default=str)),
+        "text_hash": _digest(str(transaction.get(text_key))),
+    }
+
 
 class TransactionRepository:
     def __init__(self):
         self.collection = Database.get_collection(settings.COLLECTION_NAME)
+        self.vector_index = get_vector_index(self.collection)
 
     def create_many(self, transactions: List[Dict[str, Any]]):
         """Bulk inserts transactions."""
         # Clean collection for demo purposes (optional, good for seeding)
         # self.collection.delete_many({}) 
-        return self.collection.insert_many(transactions)
+        result = self.collection.insert_many([self._pack(tx) for tx in transactions])
+        self.vector_index.add(transactions)
+        return result
+
+    def insert_unordered(self, transactions: List[Dict[str, Any]]) -> List[int]:
+        """
+        Unordered bulk insert of one ingestion chunk. Rows whose idempotency_key is
+        already stored are skipped; returns the indices of the rows actually written.
+        """
+        try:
+            self.collection.insert_many([dict(self._pack(tx)) for tx in transactions], ordered=False)
+            failed = set()
+        except BulkWriteError as e:
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+            failed = {error["index"] for error in e.details["writeErrors"]}
+        written = [i for i in range(len(transactions)) if i not in failed]
+        self.vector_index.add([transactions[i] for i in written])
+        return written
+
+    def existing_idempotency_keys(self, keys: List[str]) -> set:
+        """The subset of `keys` already stored."""
+        cursor = self.collection.find({"idempotency_key": {"$in": keys}}, {"_id": 0, "idempotency_key": 1})
+        return {doc["idempotency_key"] for doc in cursor}
+
+    def insert_pending(self, transaction: Dict[str, Any]):
+        """
+        Stores a new transaction on the request path, before it has a vector. The row
+        keeps `embedding_pending` until the vector writer fills in its embedding.
+        """
+        self.collection.insert_one({**self._pack(transaction), "embedding_pending": True})
+
+    def set_embeddings(self, transactions: List[Dict[str, Any]]) -> int:
+        """Fills in the embeddings of pending rows by idempotency_key; returns how many rows were updated."""
+        operations = [
+            UpdateOne(
+                {"idempotency_key": tx["idempotency_key"]},
+                {"$set": {"embedding": self._pack({"embedding": tx["embedding"]})["embedding"]},
+                 "$unset": {"embedding_pending": ""}}
+            )
+            for tx in transactions
+        ]
+        updated = self.collection.bulk_write(operations, ordered=False).matched_count
+        self.vector_index.add(transactions)
+        return updated
+
+    def pending_embeddings(self, limit: int = 10000) -> List[Dict[str, Any]]:
+        """Rows stored by insert_pending whose embedding was never written (e.g. a restart)."""
+        projection = {"_id": 0, "idempotency_key": 1, **{field: 1 for field in PROJECTED_FIELDS}}
+        return list(self.collection.find({"embedding_pending": True}, projection).limit(limit))
+
+    def backfill_fingerprints(self, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Adds record_key/content_hash/text_hash to rows stored without them (seeded
+        before fingerprints existed), so a sync matches them instead of inserting
+        copies. A row whose record_key another row already has (an identical purchase)
+        is left unkeyed. Returns how many rows were keyed and how many were duplicates.
+        """
+        counts = {"backfilled": 0, "duplicates": 0}
+        criteria: Dict[str, Any] = {"record_key": {"$exists": False}}
+        while True:
+            legacy = list(
+                self.collection.find(criteria, {"embedding": 0, "embedding_pending": 0}).sort("_id", 1).limit(batch_size)
+            )
+            if not legacy:
+                return counts
+            operations = [UpdateOne({"_id": doc["_id"]}, {"$set": fingerprint(doc)}) for doc in legacy]
+            try:
+                counts["backfilled"] += self.collection.bulk_write(operations, ordered=False).modified_count
+            except BulkWriteError as e:
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+                counts["backfilled"] += e.details["nModified"]
+                counts["duplicates"] += len(e.details["writeErrors"])
+            # Keyset on _id so rows left unkeyed are not fetched again
+            criteria = {"record_key": {"$exists": False}, "_id": {"$gt": legacy[-1]["_id"]}}
+
+    def seed_state(self, record_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored content/text hashes for the given record_keys (absent keys are new rows)."""
+        cursor = self.collection.find(
+            {"record_key": {"$in": record_keys}}, {"_id": 0, "record_key": 1, "content_hash": 1, "text_hash": 1}
+        )
+        return {doc["record_key"]: doc for doc in cursor}
+
+    def sync_many(self, transactions: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Upserts fingerprinted transactions by record_key. Rows without an embedding
+        keep the stored one (only their other fields changed). Local vector indexes
+        are not patched; reset them once the sync is done.
+        """
+        operations = []
+        for tx in transactions:
+            packed = {k: v for k, v in self._pack(tx).items() if k != "idempotency_key"}
+            update: Dict[str, Any] = {"$set": packed}
+            if tx.get("idempotency_key"):
+                update["$setOnInsert"] = {"idempotency_key": tx["idempotency_key"]}
+            operations.append(UpdateOne({"record_key": tx["record_key"]}, update, upsert=True))
+        try:
+            result = self.collection.bulk_write(operations, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            # A new record_key whose idempotency_key is already stored (e.g. written by
+            # the vector writer) is the same transaction; leave the stored row alone
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+            result = e.details
+        inserted = len(result.get("upserted", []))
+        duplicates = len(result.get("writeErrors", []))
+        return {"inserted": inserted, "updated": len(transactions) - inserted - duplicates, "unchanged": duplicates}
+
+    @staticmethod
+    def _pack(transaction: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Stores the embedding in the configured EMBEDDING_STORAGE format, and ISO date
+        strings as BSON dates so (date, _id) ordering and range filters see one type.
+        """
+        packed = transaction
+        if isinstance(transaction.get("date"), str):
+            try:
+                packed = {**packed, "date": datetime.fromisoformat(transaction["date"])}
+            except ValueError:
+                pass
+        if packed.get("embedding") and settings.EMBEDDING_STORAGE != "float64":
+            packed = {**packed, "embedding": encode_embedding(packed["embedding"], settings.EMBEDDING_STORAGE)}
+        return packed
     
     def clear_collection(self):
          self.collection.delete_many({})
+         self.vector_index.reset()
 
-    def vector_search(self, query_embedding: List[float], user_id: str = None, limit: int = 5) -> List[Dict[str, Any]]:
-        """Performs vector search using the defined index."""
-        pipeline = [
-            {
-                "$vectorSearch": {
-                    "index": "vector_index",
-                    "path": "embedding",
-                    "queryVector": query_embedding,
-                    "numCandidates": 100,
-                    "limit": limit,
-                    "filter": {"user_id": {"$eq": user_id}} if user_id else {}
-                }
-            },
-            {
-                "$project": {
-                    "_id": 0,
-                    "user_id": 1,
-                    "amount": 1,
-                    "merchant": 1,
-                    "date": 1,
-                    "category": 1,
-                    "description": 1,
-                    "score": {"$meta": "vectorSearchScore"}
-                }
-            }
-        ]
-        return list(self.collection.aggregate(pipeline))
+    def vector_search(
+        self,
+        query_embedding: List[float],
+        user_id: str = None,
+        limit: int = 5,
+        filters: TransactionFilters = None,
+        num_candidates: int = None
+    ) -> List[Dict[str, Any]]:
+        """Performs vector search using the configured index backend, pre-filtered by `filters`."""
+        return self.vector_index.search(
+            query_embedding, user_id=user_id, limit=limit, filters=filters, num_candidates=num_candidates
+        )
+
+    def text_search(
+        self,
+        query: str,
+        user_id: str = None,
+        limit: int = 5,
+        filters: TransactionFilters = None
+    ) -> List[Dict[str, Any]]:
+        """Keyword search over merchant/description/category via the text index, best match first."""
+        criteria: Dict[str, Any] = {"$text": {"$search": query}}
+        if user_id:
+            criteria["user_id"] = user_id
+        if filters:
+            criteria.update(filters.to_mongo())
+        projection = {"_id": 0, **{field: 1 for field in PROJECTED_FIELDS}, "score": {"$meta": "textScore"}}
+        return list(self.collection.find(criteria, projection).sort([("score", {"$meta": "textScore"})]).limit(limit))
 
     def get_recent_transactions(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Fetches recent transactions sorted by date."""
@@ -49,3 +203,36 @@ class TransactionRepository:
             {"user_id": user_id},
             {"_id": 0, "embedding": 0}
         ).sort("date", -1).limit(limit))
+
+    def list_transactions(
+        self,
+        user_id: str,
+        limit: int = 50,
+        after: Optional[Tuple[Any, ObjectId]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Keyset page of a user's history ordered by (date, _id) descending.
+        Pass the (date, _id) of the last row of the previous page as `after`.
+        """
+        query: Dict[str, Any] = {"user_id": user_id}
+        if after:
+            date, last_id = after
+            query["$or"] = [
+                {"date": {"$lt": date}},
+                {"date": date, "_id": {"$lt": last_id}}
+            ]
+        return list(self.collection.find(
+            query,
+            {"embedding": 0}
+        ).sort([("date", -1), ("_id", -1)]).limit(limit))
+
+    def iter_transactions(self, user_id: str, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Streams a user's full history from a server cursor, `batch_size` documents per round trip."""
+        with self.collection.find(
+            {"user_id": user_id},
+            {"_id": 0, "embedding": 0}
+        ).sort([("date", -1), ("_id", -1)]).batch_size(batch_size) as cursor:
+            yield from cursor
+
+class AsyncTransactionRepository(AsyncRepository):
+    sync_class = TransactionRepository
@@ -0,0 +1,101 @@
+import copy
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from config.settings import settings
+
+class UserProfileCache:
+    """
+    Short-TTL read-through cache for user documents, shared by the dashboard,
+    agent and avatar paths. Thread-safe (repositories run on the Database executor).
+
+    Every write bumps a per-user version, and invalidate() without a user bumps a
+    global epoch; a read that started before either can't store its (stale) result,
+    so invalidation always wins. A version is (epoch, per-user count): bumping the
+    epoch retires every per-user count, so they are dropped instead of growing forever.
+
+    Each worker process has its own cache; writes call `on_invalidate(user_id)`
+    (wired to the backplane by services.invalidation) so the others drop theirs.
+    """
+
+    # Per-user counts kept before they are folded into an epoch bump
+    MAX_TRACKED_VERSIONS = 10000
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._versions: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.on_invalidate: Optional[Callable[[Optional[str]], None]] = None
+
+    def version(self, user_id: str) -> Tuple[int, int]:
+        with self._lock:
+            return self._version(user_id)
+
+    def _version(self, user_id: str) -> Tuple[int, int]:
+        return self._epoch, self._versions.get(user_id, 0)
+
+    def _bump(self, user_id: str):
+        if len(self._versions) >= self.MAX_TRACKED_VERSIONS and user_id not in self._versions:
+            # Reads in flight for any user now fail put(); cached entries stay valid
+            self._epoch += 1
+            self._versions.clear()
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > time.monotonic():
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self._entries.pop(user_id, None)
+            self.misses += 1
+            return None
+
+    def put(self, user_id: str, user: Dict[str, Any], version: Tuple[int, int]):
+        """Stores a freshly read document unless a write happened since `version` was taken."""
+        with self._lock:
+            if self._version(user_id) == version:
+                self._entries[user_id] = (time.monotonic() + self.ttl, copy.deepcopy(user))
+
+    def patch(self, user_id: str, fields: Dict[str, Any]):
+        """Applies post-write field values to a cached entry instead of dropping it."""
+        with self._lock:
+            self._bump(user_id)
+            entry = self._entries.get(user_id)
+            if entry:
+                entry[1].update(copy.deepcopy(fields))
+        # Other workers don't have the new fields; they drop their entry instead
+        if self.on_invalidate:
+            self.on_invalidate(user_id)
+
+    def invalidate(self, user_id: str = None, propagate: bool = True):
+        """Drops one user's entry, or every entry when user_id is None."""
+        with self._lock:
+            self.invalidations += 1
+            if user_id is None:
+                self._epoch += 1
+                self._versions.clear()
+                self._entries.clear()
+            else:
+                self._bump(user_id)
+                self._entries.pop(user_id, None)
+        if propagate and self.on_invalidate:
+            self.on_invalidate(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+user_cache = UserProfileCache(ttl=settings.USER_CACHE_TTL)
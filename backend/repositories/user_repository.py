@@ -1,5 +1,9 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 from config.database import Database
+from repositories.async_repository import AsyncRepository
+from repositories.user_cache import user_cache
 from config.settings import settings
 
 class UserRepository:
@@ -9,11 +13,55 @@ class UserRepository:
     def create_many(self, users: List[Dict[str, Any]]):
         """Bulk inserts users."""
         self.collection.delete_many({})  # Clear for demo
-        return self.collection.insert_many(users)
+        result = self.collection.insert_many(users)
+        user_cache.invalidate()
+        return result
+
+    def insert_many(self, users: List[Dict[str, Any]]) -> int:
+        """
+        Unordered insert of one chunk of users; user_ids already stored are skipped
+        (unique index), so a resumed seed can replay a chunk. Returns how many were new.
+        """
+        try:
+            inserted = len(self.collection.insert_many([dict(user) for user in users], ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+            inserted = e.details["nInserted"]
+        user_cache.invalidate()
+        return inserted
+
+    def sync_many(self, users: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Upserts users by user_id, writing only those that differ from the stored document."""
+        stored = {
+            doc["user_id"]: doc
+            for doc in self.collection.find({"user_id": {"$in": [user["user_id"] for user in users]}}, {"_id": 0})
+        }
+        changed = [user for user in users if stored.get(user["user_id"]) != user]
+        inserted = 0
+        if changed:
+            result = self.collection.bulk_write(
+                [ReplaceOne({"user_id": user["user_id"]}, dict(user), upsert=True) for user in changed], ordered=False
+            )
+            inserted = len(result.upserted_ids)
+            for user in changed:
+                user_cache.invalidate(user["user_id"])
+        return {"inserted": inserted, "updated": len(changed) - inserted, "unchanged": len(users) - len(changed)}
+
+    def clear_collection(self):
+        self.collection.delete_many({})
+        user_cache.invalidate()
 
     def get_user(self, user_id: str) -> Dict[str, Any]:
-        """Retrieves a user by user_id."""
-        return self.collection.find_one({"user_id": user_id})
+        """Retrieves a user by user_id (read-through the shared profile cache)."""
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+        version = user_cache.version(user_id)
+        user = self.collection.find_one({"user_id": user_id})
+        if user:
+            user_cache.put(user_id, user, version)
+        return user
 
     def get_user_by_email(self, email: str) -> Dict[str, Any]:
         """Retrieves a user by email."""
@@ -25,7 +73,122 @@ class UserRepository:
             {"user_id": user_id, "accounts.type": account_type},
             {"$set": {"accounts.$.balance": new_balance}}
         )
+        user_cache.invalidate(user_id)
 
     def update_user(self, user_id: str, updates: Dict[str, Any]):
         """Generic update for user document fields."""
         self.collection.update_one({"user_id": user_id}, {"$set": updates})
+        user_cache.invalidate(user_id)
+
+    def increment_primary_balance(self, user_id: str, delta: float) -> Optional[Dict[str, Any]]:
+        """Atomically adds `delta` to the user's first account; returns the updated account."""
+        user = self.collection.find_one_and_update(
+            {"user_id": user_id, "accounts.0": {"$exists": True}},
+            {"$inc": {"accounts.0.balance": delta}},
+            projection={"_id": 0, "accounts": {"$slice": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        user_cache.invalidate(user_id)
+        return user["accounts"][0] if user else None
+
+    def increment_primary_balances(self, deltas: Dict[str, float]) -> Dict[str, Dict[str, Any]]:
+        """
+        Batch form of increment_primary_balance: one $inc per user in a single bulk write.
+        Returns each existing user's updated first account.
+        """
+        if not deltas:
+            return {}
+        self.collection.bulk_write([
+            UpdateOne({"user_id": user_id, "accounts.0": {"$exists": True}}, {"$inc": {"accounts.0.balance": delta}})
+            for user_id, delta in deltas.items()
+        ], ordered=False)
+        for user_id in deltas:
+            user_cache.invalidate(user_id)
+        users = self.collection.find(
+            {"user_id": {"$in": list(deltas)}},
+            {"_id": 0, "user_id": 1, "accounts": {"$slice": 1}}
+        )
+        return {user["user_id"]: user["accounts"][0] for user in users if user.get("accounts")}
+
+    @staticmethod
+    def find_account(accounts: List[Dict[str, Any]], account: str) -> Optional[Dict[str, Any]]:
+        """The account with this account_id, else the first whose type equals `account` (case-insensitive)."""
+        if not account:
+            return None
+        for acc in accounts:
+            if acc.get("account_id") == account:
+                return acc
+        wanted = account.strip().casefold()
+        return next((acc for acc in accounts if acc.get("type", "").casefold() == wanted), None)
+
+    def apply_payment(
+        self,
+        user_id: str,
+        source_type: str,
+        amount: float,
+        target_type: str = None,
+        card_id: str = None,
+        bill_id: str = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Debits `amount` from the source account and applies the matching credit (account,
+        card or bill) in a single conditional update. Source and target are an account_id
+        or an exact account type, resolved to one account_id each, so exactly one element
+        is debited and one credited.
+        The update only matches if that source balance covers the amount, every target
+        exists and a bill is still unpaid, so concurrent actions can't overdraw, pay a
+        bill twice or lose each other's writes.
+        Returns the post-update accounts/credit_cards/bills, or None if the guard failed.
+        Raises ValueError when source and target are the same account.
+        """
+        user = self.get_user(user_id)
+        accounts = user.get("accounts", []) if user else []
+        source = self.find_account(accounts, source_type)
+        target = self.find_account(accounts, target_type) if target_type else None
+        if not source or (target_type and not target):
+            return None
+        if target and target["account_id"] == source["account_id"]:
+            raise ValueError(f"Cannot transfer from {source['type']} to itself")
+
+        funded = {"account_id": source["account_id"], "balance": {"$gte": amount}}
+        query = {"user_id": user_id, "accounts": {"$elemMatch": funded}}
+        update = {"$inc": {"accounts.$[src].balance": -amount}}
+        array_filters = [{"src.account_id": source["account_id"], "src.balance": {"$gte": amount}}]
+
+        if target:
+            query["accounts.account_id"] = {"$all": [source["account_id"], target["account_id"]]}
+            update["$inc"]["accounts.$[dst].balance"] = amount
+            array_filters.append({"dst.account_id": target["account_id"]})
+        if card_id:
+            query["credit_cards.card_id"] = card_id
+            update["$inc"]["credit_cards.$[card].current_balance"] = -amount
+            array_filters.append({"card.card_id": card_id})
+        if bill_id:
+            # Only an unpaid bill matches, so a second concurrent confirmation can't pay it twice
+            query["bills"] = {"$elemMatch": {"bill_id": bill_id, "status": "Unpaid"}}
+            update["$set"] = {"bills.$[bill].status": "Paid"}
+            array_filters.append({"bill.bill_id": bill_id, "bill.status": "Unpaid"})
+
+        user = self.collection.find_one_and_update(
+            query,
+            update,
+            projection={"_id": 0, "accounts": 1, "credit_cards": 1, "bills": 1},
+            array_filters=array_filters,
+            return_document=ReturnDocument.AFTER
+        )
+
+        # Card balances never go below zero; clamp conditionally so concurrent payments stay safe
+        if user and card_id:
+            for cc in user.get("credit_cards", []):
+                if cc["card_id"] == card_id and cc["current_balance"] < 0:
+                    self.collection.update_one(
+                        {"user_id": user_id, "credit_cards": {"$elemMatch": {"card_id": card_id, "current_balance": {"$lt": 0}}}},
+                        {"$set": {"credit_cards.$.current_balance": 0}}
+                    )
+                    cc["current_balance"] = 0
+        if user:
+            user_cache.patch(user_id, user)
+        return user
+
+class AsyncUserRepository(AsyncRepository):
+    sync_class = UserRepository
@@ -0,0 +1,411 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+import numpy as np
+from pymongo.collection import Collection
+from config.settings import settings
+from models.transaction import encode_embedding, decode_embedding, TransactionFilters
+
+# Fields returned by every backend, matching the Atlas $project stage
+PROJECTED_FIELDS = ("user_id", "amount", "merchant", "date", "category", "description")
+
+
+class VectorIndex:
+    """Pluggable backend behind TransactionRepository.vector_search."""
+
+    def search(
+        self,
+        query_embedding: List[float],
+        user_id: str = None,
+        limit: int = 5,
+        filters: TransactionFilters = None,
+        num_candidates: int = None
+    ) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def add(self, documents: List[Dict[str, Any]]):
+        """Called after documents are inserted so local indexes stay in sync."""
+
+    def reset(self):
+        """Called after the collection is cleared."""
+
+    def invalidate(self, user_ids: Optional[List[str]] = None, propagate: bool = True):
+        """Drops cached state for `user_ids` (None = everything) so it reloads from the collection."""
+
+
+class AtlasVectorIndex(VectorIndex):
+    """MongoDB Atlas $vectorSearch (the index lives server-side, nothing to sync)."""
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def search(
+        self,
+        query_embedding: List[float],
+        user_id: str = None,
+        limit: int = 5,
+        filters: TransactionFilters = None,
+        num_candidates: int = None
+    ) -> List[Dict[str, Any]]:
+        storage = settings.EMBEDDING_STORAGE
+        if storage == "float16":
+            raise ValueError("float16 embeddings are not searchable by Atlas; use the exact or ivf backend")
+        # Atlas expects the query vector in the same representation as the indexed vectors
+        if storage in ("float32", "int8"):
+            query_embedding = encode_embedding(query_embedding, storage)
+        # Pre-filter inside the ANN search (fields declared as "filter" in config.indexes)
+        clauses = [{"user_id": {"$eq": user_id}}] if user_id else []
+        if filters:
+            clauses += [{field: condition} for field, condition in filters.to_mongo().items()]
+        pipeline = [
+            {
+                "$vectorSearch": {
+                    "index": "vector_index",
+                    "path": "embedding",
+                    "queryVector": query_embedding,
+                    "numCandidates": max(num_candidates or settings.VECTOR_NUM_CANDIDATES, limit),
+                    "limit": limit,
+                    "filter": {"$and": clauses} if len(clauses) > 1 else (clauses[0] if clauses else {})
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    **{field: 1 for field in PROJECTED_FIELDS},
+                    "score": {"$meta": "vectorSearchScore"}
+                }
+            }
+        ]
+        return list(self.collection.aggregate(pipeline))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class _Partition:
+    """Documents and unit-length vectors for one user (or for all users when user_id is None)."""
+
+    def __init__(self):
+        self.documents: List[Dict[str, Any]] = []
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self._pending: List[np.ndarray] = []
+        # idempotency_keys already held, so a row announced by another worker isn't added twice
+        self.keys: Set[str] = set()
+
+    def add(self, document: Dict[str, Any], vector: np.ndarray, key: Optional[str] = None) -> bool:
+        if key:
+            if key in self.keys:
+                return False
+            self.keys.add(key)
+        self.documents.append(document)
+        self._pending.append(vector)
+        return True
+
+    def vectors(self) -> np.ndarray:
+        if self._pending:
+            pending = np.vstack(self._pending)
+            self.matrix = pending if self.matrix.size == 0 else np.vstack([self.matrix, pending])
+            self._pending = []
+        return self.matrix
+
+
+class LocalVectorIndex(VectorIndex):
+    """
+    In-process index partitioned per user_id.
+    A partition is loaded lazily from the `embedding` field the first time it is
+    searched, then kept in sync through add(). Scores use the same scale as Atlas
+    cosine similarity: (1 + cos) / 2.
+
+    Loading reads from MongoDB outside the index lock (one load at a time per
+    partition), so a cold user never blocks searches for the others.
+
+    Every worker process holds its own partitions. add() calls `on_add(keys)` with the
+    idempotency_keys of the new rows, and the other workers fetch just those rows into
+    the partitions they hold; rows without a key fall back to `on_invalidate(user_ids)`.
+    reset() calls `on_invalidate(None)`. Both hooks are wired to the backplane by
+    services.invalidation. Rows written behind the index's back (e.g. sync_many) need
+    a reset().
+    """
+
+    # Set by services.invalidation; None for a single process
+    on_invalidate: Optional[Callable[[Optional[List[str]]], None]] = None
+    on_add: Optional[Callable[[List[str]], None]] = None
+
+    def __init__(self, collection: Collection):
+        self.collection = collection
+        self._partitions: Dict[Optional[str], _Partition] = {}
+        self._lock = threading.RLock()
+        self._load_locks: Dict[Optional[str], threading.Lock] = {}
+        # Partitions being loaded that were written or invalidated meanwhile; the load is
+        # still used by the search that triggered it but isn't kept
+        self._loading: Set[Optional[str]] = set()
+        self._stale: Set[Optional[str]] = set()
+
+    def _new_partition(self) -> _Partition:
+        return _Partition()
+
+    def _load(self, user_id: Optional[str]) -> _Partition:
+        partition = self._new_partition()
+        query = {"embedding": {"$exists": True, "$ne": []}}
+        if user_id:
+            query["user_id"] = user_id
+        projection = {"_id": 0, "embedding": 1, "idempotency_key": 1, **{field: 1 for field in PROJECTED_FIELDS}}
+        for doc in self.collection.find(query, projection):
+            vector = decode_embedding(doc.pop("embedding"))
+            key = doc.pop("idempotency_key", None)
+            partition.add(doc, _normalize(np.asarray(vector, dtype=np.float32)), key)
+        self._after_load(partition)
+        return partition
+
+    def _after_load(self, partition: _Partition):
+        """Hook for approximate indexes to train once the partition is loaded."""
+
+    def _partition(self, user_id: Optional[str]) -> _Partition:
+        with self._lock:
+            partition = self._partitions.get(user_id)
+            if partition is not None:
+                return partition
+            load_lock = self._load_locks.setdefault(user_id, threading.Lock())
+        with load_lock:
+            with self._lock:
+                # Another search may have loaded it while this one waited
+                partition = self._partitions.get(user_id)
+                if partition is not None:
+                    return partition
+                self._loading.add(user_id)
+            partition = None
+            try:
+                partition = self._load(user_id)
+            finally:
+                with self._lock:
+                    self._loading.discard(user_id)
+                    if partition is not None and user_id not in self._stale:
+                        self._partitions[user_id] = partition
+                    self._stale.discard(user_id)
+                    self._load_locks.pop(user_id, None)
+            return partition
+
+    def _mark_stale(self, user_ids: Optional[List[Optional[str]]]):
+        """Call with the lock held."""
+        self._stale.update(self._loading if user_ids is None else self._loading.intersection(user_ids))
+
+    def _add_local(self, documents: List[Dict[str, Any]]) -> Set[Optional[str]]:
+        """Adds rows to the loaded partitions; returns the user_ids of the rows with an embedding."""
+        user_ids = set()
+        with self._lock:
+            for doc in documents:
+                if not doc.get("embedding"):
+                    continue
+                user_ids.add(doc.get("user_id"))
+                vector = _normalize(np.asarray(decode_embedding(doc["embedding"]), dtype=np.float32))
+                projected = {field: doc.get(field) for field in PROJECTED_FIELDS}
+                # Only partitions that are already loaded need updating; others load fresh
+                for key in (doc.get("user_id"), None):
+                    if key in self._partitions:
+                        self._partitions[key].add(projected, vector, doc.get("idempotency_key"))
+            self._mark_stale([*user_ids, None] if user_ids else [])
+        return user_ids
+
+    def add(self, documents: List[Dict[str, Any]]):
+        embedded = [doc for doc in documents if doc.get("embedding")]
+        user_ids = self._add_local(embedded)
+        if not embedded:
+            return
+        keys = [doc.get("idempotency_key") for doc in embedded]
+        if all(keys) and self.on_add:
+            self.on_add(keys)
+        elif self.on_invalidate:
+            self.on_invalidate(sorted(user_id for user_id in user_ids if user_id))
+
+    def add_stored(self, keys: List[str]):
+        """
+        Applies another worker's add(): fetches the rows with these idempotency_keys
+        into the partitions this process holds. Nothing is read when none are loaded.
+        """
+        with self._lock:
+            if not self._partitions and not self._loading:
+                return
+        projection = {"_id": 0, "embedding": 1, "idempotency_key": 1, **{field: 1 for field in PROJECTED_FIELDS}}
+        query = {"idempotency_key": {"$in": keys}, "embedding": {"$exists": True, "$ne": []}}
+        self._add_local(list(self.collection.find(query, projection)))
+
+    def reset(self):
+        self.invalidate()
+
+    def invalidate(self, user_ids: Optional[List[str]] = None, propagate: bool = True):
+        with self._lock:
+            if user_ids is None:
+                self._partitions = {}
+                self._mark_stale(None)
+            else:
+                # The all-users partition contains every user's rows
+                for key in (*user_ids, None):
+                    self._partitions.pop(key, None)
+                self._mark_stale([*user_ids, None])
+        if propagate and self.on_invalidate:
+            self.on_invalidate(user_ids)
+
+    def search(
+        self,
+        query_embedding: List[float],
+        user_id: str = None,
+        limit: int = 5,
+        filters: TransactionFilters = None,
+        num_candidates: int = None
+    ) -> List[Dict[str, Any]]:
+        """num_candidates only applies to Atlas; local indexes size their own candidate sets."""
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        partition = self._partition(user_id)
+        with self._lock:
+            matrix = partition.vectors()
+            if matrix.size == 0:
+                return []
+            if filters and not filters.is_empty():
+                # Filter first, then score only the survivors exactly (no probe misses)
+                rows = np.fromiter(
+                    (i for i, doc in enumerate(partition.documents) if filters.matches(doc)), dtype=np.int64
+                )
+                if rows.size == 0:
+                    return []
+            else:
+                rows = self._candidates(partition, query)
+            # Scoring every row in place avoids copying the whole matrix per query
+            scores = matrix @ query if rows is None else matrix[rows] @ query
+            if rows is None:
+                rows = np.arange(len(scores))
+            documents = partition.documents
+
+        top = np.argpartition(-scores, limit - 1)[:limit] if len(scores) > limit else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [
+            {**documents[rows[i]], "score": float((1.0 + scores[i]) / 2.0)}
+            for i in top
+        ]
+
+    def _candidates(self, partition: _Partition, query: np.ndarray) -> Optional[np.ndarray]:
+        """Row indices to score; None (exact search) scores every row."""
+        return None
+
+
+class ExactVectorIndex(LocalVectorIndex):
+    """Brute-force cosine similarity with NumPy: perfect recall, O(n) per query."""
+
+
+class _IVFPartition(_Partition):
+    def __init__(self):
+        super().__init__()
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[List[int]] = []
+        self.trained_size = 0
+
+
+class IVFVectorIndex(LocalVectorIndex):
+    """
+    Approximate inverted-file index: vectors are clustered with spherical k-means
+    into ~sqrt(n) lists and a query only scores the `nprobe` closest lists.
+    Small partitions fall back to exact search; a partition is retrained once it
+    has doubled in size since the last training.
+    """
+
+    MIN_TRAIN_SIZE = 1000
+    KMEANS_ITERATIONS = 10
+    TRAIN_SAMPLE_PER_LIST = 64
+
+    def __init__(self, collection: Collection, nprobe: int = None):
+        super().__init__(collection)
+        self.nprobe = nprobe or settings.VECTOR_IVF_NPROBE
+
+    def _new_partition(self) -> _Partition:
+        return _IVFPartition()
+
+    def _after_load(self, partition: _IVFPartition):
+        self._train(partition)
+
+    def _train(self, partition: _IVFPartition):
+        matrix = partition.vectors()
+        n = matrix.shape[0]
+        partition.trained_size = n
+        if n < self.MIN_TRAIN_SIZE:
+            partition.centroids = None
+            return
+
+        rng = np.random.default_rng(0)
+        k = max(1, int(np.sqrt(n)))
+        # k-means runs on a sample (as IVF implementations do); every row is assigned once at the end
+        sample = matrix[np.sort(rng.choice(n, size=min(n, k * self.TRAIN_SAMPLE_PER_LIST), replace=False))]
+        centroids = sample[rng.choice(len(sample), size=k, replace=False)]
+        for _ in range(self.KMEANS_ITERATIONS):
+            assignments = self._assign(sample, centroids)
+            order = np.argsort(assignments, kind="stable")
+            members, starts = np.unique(assignments[order], return_index=True)
+            # Clusters left empty keep their previous centroid
+            centroids = centroids.copy()
+            centroids[members] = np.add.reduceat(sample[order], starts, axis=0)
+            centroids = _normalize(centroids)
+
+        assignments = self._assign(matrix, centroids)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(k + 1))
+        partition.centroids = centroids
+        partition.lists = [order[bounds[c]:bounds[c + 1]].tolist() for c in range(k)]
+
+    @staticmethod
+    def _assign(matrix: np.ndarray, centroids: np.ndarray, block: int = 65536) -> np.ndarray:
+        """Nearest centroid per row, in blocks so n x k scores never materialize at once."""
+        return np.concatenate([
+            np.argmax(matrix[start:start + block] @ centroids.T, axis=1)
+            for start in range(0, matrix.shape[0], block)
+        ])
+
+    def _candidates(self, partition: _IVFPartition, query: np.ndarray) -> Optional[np.ndarray]:
+        matrix = partition.vectors()
+        n = matrix.shape[0]
+        if n >= 2 * max(partition.trained_size, self.MIN_TRAIN_SIZE // 2):
+            self._train(partition)
+        if partition.centroids is None:
+            return None
+
+        # Rows added since training are not in any list yet; assign them now
+        assigned = sum(len(rows) for rows in partition.lists)
+        if assigned < n:
+            new_rows = np.arange(assigned, n)
+            nearest = np.argmax(matrix[new_rows] @ partition.centroids.T, axis=1)
+            for row, c in zip(new_rows, nearest):
+                partition.lists[c].append(int(row))
+
+        probes = np.argsort(-(partition.centroids @ query))[:self.nprobe]
+        return np.fromiter((row for c in probes for row in partition.lists[c]), dtype=np.int64)
+
+
+_BACKENDS = {
+    "atlas": AtlasVectorIndex,
+    "exact": ExactVectorIndex,
+    "ivf": IVFVectorIndex,
+}
+_instances: Dict[str, VectorIndex] = {}
+
+
+def invalidate_local_indexes(user_ids: Optional[List[str]] = None):
+    """Applies another worker's invalidation to this process's indexes (without re-publishing)."""
+    for index in list(_instances.values()):
+        index.invalidate(user_ids, propagate=False)
+
+
+def add_stored_to_local_indexes(keys: List[str]):
+    """Applies another worker's add() to this process's indexes (without re-publishing)."""
+    for index in list(_instances.values()):
+        if isinstance(index, LocalVectorIndex):
+            index.add_stored(keys)
+
+
+def get_vector_index(collection: Collection) -> VectorIndex:
+    """Returns the process-wide index for VECTOR_INDEX_BACKEND (atlas | exact | ivf)."""
+    backend = settings.VECTOR_INDEX_BACKEND.lower()
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown VECTOR_INDEX_BACKEND '{backend}'. Expected one of: {', '.join(_BACKENDS)}")
+    if backend not in _instances:
+        _instances[backend] = _BACKENDS[backend](collection)
+    return _instances[backend]
+
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from services.agent_service import AgentService
+from services.job_queue import job_queue
+from services.vector_store_writer import vector_store_writer
 from pydantic import BaseModel
 
 class ExecuteActionRequest(BaseModel):
@@ -19,3 +21,8 @@ async def execute_agent_action(request: ExecuteActionRequest):
     if result["status"] == "error":
         raise HTTPException(status_code=400, detail=result["message"])
     return result
+
+@router.get("/jobs")
+async def background_job_metrics():
+    """Queue depth, retry/dead-letter counters and dead-lettered jobs of the background workers."""
+    return {**job_queue.metrics(), "vector_writer": vector_store_writer.metrics()}
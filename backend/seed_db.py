@@ -1,16 +1,127 @@
-from services.transaction_service import TransactionService
-from data.mock_data import MOCK_USERS, MOCK_TRANSACTIONS
+"""
+Seeds MongoDB with users and embedded transactions.
+
+    python seed_db.py                                        # built-in mock data
+    python seed_db.py --users users.jsonl --transactions transactions.csv.gz --checkpoint seed.ckpt
+    python seed_db.py --synthetic 1000 1000 --fake-embeddings  # 1,000 users x 1,000 transactions
+    python seed_db.py --synthetic 1000 1000 --now 2025-01-31 --checkpoint seed.ckpt  # reproducible dates
+    python seed_db.py --synthetic 1000 1000 --write-fixtures fixtures/   # write files, don't seed
+    python seed_db.py --users users.jsonl --transactions transactions.csv --mode sync  # re-seed changes only
+
+Fixture files are streamed (.jsonl/.ndjson/.csv, optionally .gz), so their size
+is not bounded by memory. With --checkpoint an interrupted run resumes where it stopped.
+--mode sync upserts instead of wiping: unchanged rows are skipped and only
+transactions whose description changed are re-embedded.
+"""
+import argparse
 import asyncio
+import os
+import time
+from datetime import datetime
+from config.database import Database
+from config.indexes import ensure_indexes
+from services.transaction_service import TransactionService, SEED_MODES
+from services.seed_checkpoint import SeedCheckpoint
+from services.embedding_service import EmbeddingService
+from services.invalidation import invalidation_bus, RESPONSE_CACHE, VECTOR_INDEX
+from data.fixtures import read_fixture, write_fixture, generate_users, generate_transactions, synthetic_anchor, HashEmbeddingBackend
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the NeuroBank database.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--synthetic", nargs=2, type=int, metavar=("USERS", "PER_USER"),
+                        help="generate USERS users with PER_USER transactions each")
+    source.add_argument("--transactions", help="transactions fixture (.jsonl/.ndjson/.csv, optionally .gz)")
+    parser.add_argument("--users", help="users fixture (.jsonl/.ndjson, optionally .gz)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for --synthetic")
+    parser.add_argument("--now", type=datetime.fromisoformat, metavar="YYYY-MM-DD",
+                        help="date --synthetic dates are relative to (default today); pass the same date to resume another day")
+    parser.add_argument("--write-fixtures", metavar="DIR", help="with --synthetic: write users.jsonl.gz and transactions.csv.gz to DIR instead of seeding")
+    parser.add_argument("--mode", choices=SEED_MODES, default="replace",
+                        help="replace: clear and reload (default); sync: upsert changed rows, re-embed changed text only")
+    parser.add_argument("--batch-size", type=int, help="rows per embedding/insert batch (default SEED_BATCH_SIZE)")
+    parser.add_argument("--concurrency", type=int, help="embedding batches in flight (default SEED_CONCURRENCY)")
+    parser.add_argument("--checkpoint", help="progress file; rerunning with it resumes an interrupted seed")
+    parser.add_argument("--fake-embeddings", action="store_true", help="deterministic hash vectors instead of OpenAI (load testing)")
+    args = parser.parse_args(argv)
+    if args.write_fixtures and not args.synthetic:
+        parser.error("--write-fixtures requires --synthetic")
+    return args
+
+
+def sources(args):
+    """Returns (users, transactions, description); None means the mock data."""
+    if args.synthetic:
+        user_count, per_user = args.synthetic
+        now = synthetic_anchor(args.now)
+        return (
+            generate_users(user_count, seed=args.seed, now=now),
+            generate_transactions(user_count, per_user, seed=args.seed, now=now),
+            {"synthetic": [user_count, per_user], "seed": args.seed, "now": now.date().isoformat()},
+        )
+    users = read_fixture(args.users) if args.users else None
+    transactions = read_fixture(args.transactions) if args.transactions else None
+    files = {"users": args.users, "transactions": args.transactions}
+    return users, transactions, {name: os.path.abspath(path) for name, path in files.items() if path} or {"mock": True}
+
+
+def progress_printer(interval: float = 2.0):
+    last = [0.0]
+
+    def report(stats):
+        now = time.monotonic()
+        if now - last[0] < interval:
+            return
+        last[0] = now
+        print(f"⏳ {stats['rows']:,} rows embedded | {stats['rows_per_second']:,} rows/s | "
+              f"{stats['failed_rows']:,} failed | {stats['elapsed_seconds']}s")
+
+    return report
+
+
+def seed(argv=None):
+    args = parse_args(argv)
+    users, transactions, source = sources(args)
+
+    if args.write_fixtures:
+        users_path = os.path.join(args.write_fixtures, "users.jsonl.gz")
+        transactions_path = os.path.join(args.write_fixtures, "transactions.csv.gz")
+        print(f"📝 Wrote {write_fixture(users_path, users):,} users to {users_path}")
+        print(f"📝 Wrote {write_fixture(transactions_path, transactions):,} transactions to {transactions_path}")
+        return
 
-def seed():
     print("🌱 Initializing Seed Script...")
+    Database.connect()
+    # The app creates these at startup; a seed against a fresh database needs them too:
+    # record_key/idempotency_key dedupe resumed and synced rows, and the aggregate $merge
+    # requires its unique key index
+    ensure_indexes(Database.db)
     service = TransactionService()
-    
     print("🔄 Seeding Database...")
-    result = service.seed_database()
-    
+    result = service.seed_database(
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        users=users,
+        transactions=transactions,
+        checkpoint=SeedCheckpoint(args.checkpoint, source=source),
+        embedding_backend=HashEmbeddingBackend(EmbeddingService.DIMENSIONS) if args.fake_embeddings else None,
+        on_progress=progress_printer(),
+        mode=args.mode,
+    )
     print(f"✅ Result: {result}")
+    # Running workers keep per-process vector partitions and cached answers
+    asyncio.run(notify_workers())
     print("🎉 Database seeding complete!")
 
+
+async def notify_workers():
+    try:
+        await invalidation_bus.announce(VECTOR_INDEX, {"user_ids": None})
+        await invalidation_bus.announce(RESPONSE_CACHE, {"user_id": None})
+    except Exception as e:
+        print(f"⚠️ Could not notify running workers; restart them to see the new data: {e}")
+
+
 if __name__ == "__main__":
     seed()
@@ -1,9 +1,12 @@
 from datetime import datetime
-from repositories.user_repository import UserRepository
-from services.websocket_manager import manager
+from repositories.user_repository import AsyncUserRepository, UserRepository
+from repositories.transaction_repository import AsyncTransactionRepository
+from services.response_cache import response_cache
+from services.jobs import after_commit
 import asyncio
 
 from services.embedding_service import EmbeddingService
+from services.vector_store_writer import new_idempotency_key
 
 class AgentService:
     @staticmethod
@@ -20,8 +23,8 @@ class AgentService:
 
     @staticmethod
     async def get_suggestions(user_id: str):
-        repo = UserRepository()
-        user = repo.get_user(user_id)
+        repo = AsyncUserRepository()
+        user = await repo.get_user(user_id)
         if not user:
             return []
         
@@ -89,10 +92,7 @@ class AgentService:
 
     @staticmethod
     async def execute_action(user_id: str, action_payload: dict):
-        repo = UserRepository()
-        user = repo.get_user(user_id)
-        if not user:
-            return {"status": "error", "message": "User not found"}
+        repo = AsyncUserRepository()
 
         # Simulate processing delay for "Agentic Realism" - REMOVED for speed
         # await asyncio.sleep(1.5)
@@ -110,60 +110,51 @@ class AgentService:
                  target_type = action_payload.get("to_account_type", "Savings")
                  if "chequing" in target_type.lower():
                      source_type = "Savings"
-        
-        source_acc = next((acc for acc in user["accounts"] if source_type.lower() in acc["type"].lower()), None)
-        if not source_acc:
-            return {"status": "error", "message": f"Source account {source_type} not found"}
-            
-        if source_acc["balance"] < amount:
-             return {"status": "error", "message": f"Insufficient funds in {source_type}"}
 
-        # 2. Math Calculation (Real-Time Cache) - Deduct from Source
-        new_source_balance = AgentService.calculate_live_balance(source_acc["balance"], amount, "subtract")
-        source_acc["balance"] = new_source_balance
-        
-        updated_accounts = [source_acc.copy()] # Start with source account
+        target_type = None
+        if action_type == "TRANSFER":
+            target_type = action_payload.get("to_account_type") or "Savings"
+            if target_type.lower() == source_type.lower():
+                return {"status": "error", "message": f"Cannot transfer from {source_type} to itself"}
+
+        # 2. Atomic, conditional update: debit the source only if it covers the amount,
+        #    and credit the destination account / card / bill in the same write.
+        card_id = action_payload.get("card_id") if action_type == "PAY_CC" else None
+        bill_id = action_payload.get("bill_id") if action_type == "PAY_BILL" else None
+        try:
+            user = await repo.apply_payment(
+                user_id, source_type, amount, target_type=target_type, card_id=card_id, bill_id=bill_id
+            )
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+        if not user:
+            return await AgentService._explain_failed_action(repo, user_id, source_type, target_type, card_id, bill_id)
+
+        # Cached answers quoted the old balances
+        response_cache.invalidate(user_id)
+
+        # 3. Collect post-update values for the real-time payload
+        moved = {
+            acc["account_id"] for acc in (
+                UserRepository.find_account(user["accounts"], source_type),
+                UserRepository.find_account(user["accounts"], target_type),
+            ) if acc
+        }
+
+        def involved(acc):
+            return acc.get("account_id") in moved
+
+        updated_accounts = [{**acc, "balance": round(acc["balance"], 2)} for acc in user["accounts"] if involved(acc)]
         updated_credit_cards = []
-        
-        # 3. Handle Action Types
-        # If it was a bill, mark as paid
-        if action_type == "PAY_BILL":
-             bill_id = action_payload.get("bill_id")
-             if "bills" in user:
-                 for b in user["bills"]:
-                     if b["bill_id"] == bill_id:
-                         b["status"] = "Paid"
-
-        # If paying Credit Card
-        elif action_type == "PAY_CC":
-             card_id = action_payload.get("card_id")
-             if "credit_cards" in user:
-                 for cc in user["credit_cards"]:
-                     if cc["card_id"] == card_id:
-                         # Deduct amount from CC Balance
-                         cc["current_balance"] = max(0, round(cc["current_balance"] - amount, 2)) 
-                         
-                         cc_copy = cc.copy()
-                         if isinstance(cc_copy.get("due_date"), datetime):
-                             cc_copy["due_date"] = cc_copy["due_date"].isoformat()
-                         updated_credit_cards.append(cc_copy)
-
-        # INTERNAL TRANSFER LOGIC
-        elif action_type == "TRANSFER":
-            target_type = action_payload.get("to_account_type", "").lower()
-            
-            # Find destination account
-            dest_acc = next((acc for acc in user["accounts"] if target_type in acc["type"].lower()), None)
-            
-            if dest_acc:
-                # Math Add to Destination
-                new_dest_balance = AgentService.calculate_live_balance(dest_acc["balance"], amount, "add")
-                dest_acc["balance"] = new_dest_balance
-                updated_accounts.append(dest_acc.copy())
-            else:
-                return {"status": "error", "message": f"Destination account '{target_type}' not found"}
-
-        # 4. Vector Database Update (RAG Sync)
+        if action_type == "PAY_CC":
+            for cc in user.get("credit_cards", []):
+                if cc["card_id"] == card_id:
+                    cc_copy = cc.copy()
+                    if isinstance(cc_copy.get("due_date"), datetime):
+                        cc_copy["due_date"] = cc_copy["due_date"].isoformat()
+                    updated_credit_cards.append(cc_copy)
+
+        # 4. Store the transaction row now; its embedding (RAG sync) is computed in the background
         embedding_service = EmbeddingService()
         transaction_record = {
             "date": datetime.now().isoformat(),
@@ -172,24 +163,20 @@ class AgentService:
             "category": "Bill Payment" if action_type == "PAY_BILL" else "Debt Repayment",
             "description": f"Agent executed action: {action_payload.get('title')}"
         }
-        await embedding_service.add_to_vector_store(transaction_record)
+        stored = {**transaction_record, "user_id": user_id}
+        stored["idempotency_key"] = new_idempotency_key()
+        await AsyncTransactionRepository().insert_pending(stored)
+        key = await embedding_service.add_to_vector_store(stored)
 
         # Calculate True Total Balance (Sum of all liquid accounts)
         new_total_balance = round(sum(acc["balance"] for acc in user["accounts"]), 2)
         
         # Get Chequing Balance for legacy field
         chequing_ref = next((acc for acc in user["accounts"] if "chequing" in acc["type"].lower()), None)
-        new_chequing_balance = chequing_ref["balance"] if chequing_ref else 0
+        new_chequing_balance = round(chequing_ref["balance"], 2) if chequing_ref else 0
 
-        # 4.5 Persist Changes to Database (CRITICAL FIX)
-        repo.update_user(user_id, {
-            "accounts": user["accounts"],
-            "credit_cards": user.get("credit_cards", []),
-            "bills": user.get("bills", [])
-        })
-
-        # 5. Push Granular Real-Time Update
-        await manager.send_personal_message({
+        # 5. Push Granular Real-Time Update (plus aggregates and audit) from background workers
+        update_payload = {
             "type": "full_state_update", 
             "new_total_balance": new_total_balance,
             "new_chequing_balance": new_chequing_balance,
@@ -197,6 +184,34 @@ class AgentService:
             "updated_credit_cards": updated_credit_cards, 
             "latest_transaction": transaction_record,
             "agent_message": f"Successfully executed: {action_payload.get('title')}"
-        }, user_id)
+        }
+        await after_commit(
+            user_id, f"agent.{action_type}", {**transaction_record, "user_id": user_id}, update_payload,
+            # Transfers between the user's own accounts are not spending
+            update_aggregates=action_type != "TRANSFER",
+            event_id=key
+        )
 
         return {"status": "success", "new_balance": new_total_balance}
+
+    @staticmethod
+    async def _explain_failed_action(repo, user_id: str, source_type: str, target_type: str, card_id: str, bill_id: str):
+        """Works out why the conditional update matched nothing (error path only)."""
+        user = await repo.get_user(user_id)
+        if not user:
+            return {"status": "error", "message": "User not found"}
+        accounts = user.get("accounts", [])
+        source_acc = UserRepository.find_account(accounts, source_type)
+        if not source_acc:
+            return {"status": "error", "message": f"Source account {source_type} not found"}
+        if target_type and not UserRepository.find_account(accounts, target_type):
+            return {"status": "error", "message": f"Destination account '{target_type.lower()}' not found"}
+        if card_id and not any(cc["card_id"] == card_id for cc in user.get("credit_cards", [])):
+            return {"status": "error", "message": f"Credit card {card_id} not found"}
+        if bill_id:
+            bill = next((b for b in user.get("bills", []) if b["bill_id"] == bill_id), None)
+            if not bill:
+                return {"status": "error", "message": f"Bill {bill_id} not found"}
+            if bill.get("status") != "Unpaid":
+                return {"status": "error", "message": f"Bill {bill_id} is already paid"}
+        return {"status": "error", "message": f"Insufficient funds in {source_type}"}
@@ -1,88 +1,167 @@
+import asyncio
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from services.transaction_service import TransactionService
-from repositories.user_repository import UserRepository
+from repositories.user_repository import AsyncUserRepository
+from services.language import detect_language
+from services.response_cache import response_cache
+from services.intent_engine import intent_engine, render, format_money
+from services.context_builder import context_builder, count_tokens, SYSTEM_PROMPT
 from config.settings import settings
 import azure.cognitiveservices.speech as speechsdk
+import re
+
+# Sentence boundary: terminal punctuation followed by whitespace, or a line break.
+# "$2,453.82" stays intact because the decimal point is not followed by a space.
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n+")
+MIN_SENTENCE_CHARS = 12
+
+def split_sentences(buffer: str):
+    """
+    Splits streamed text into complete sentences.
+    Returns (sentences, remainder); the remainder is the unfinished tail.
+    Very short fragments are merged forward so TTS doesn't get choppy.
+    """
+    parts = SENTENCE_BOUNDARY.split(buffer)
+    remainder = parts.pop()
+    sentences = []
+    pending = ""
+    for part in parts:
+        pending = f"{pending} {part}".strip() if pending else part.strip()
+        if len(pending) >= MIN_SENTENCE_CHARS:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        remainder = f"{pending} {remainder}"
+    return sentences, remainder
 
 class AudioService:
     def __init__(self):
         self.transaction_service = TransactionService()
-        self.user_repository = UserRepository()
+        self.user_repository = AsyncUserRepository()
         self.speech_key = settings.AZURE_SPEECH_KEY
         self.speech_region = settings.AZURE_SPEECH_REGION
         # Initialize OpenAI
-        self.llm = ChatOpenAI(model="gpt-4o", openai_api_key=settings.OPENAI_API_KEY, temperature=0)
+        # stream_usage so streamed turns also report token usage (incl. cached prompt tokens)
+        self.llm = ChatOpenAI(model=settings.LLM_MODEL, openai_api_key=settings.OPENAI_API_KEY, temperature=0, stream_usage=True)
         self.pending_confirmations = {} # Stores pending actions waiting for "YES AI"
 
     async def process_audio_intent(self, user_id: str, recognized_text: str):
         """
         Takes recognized text, searches the vault, and returns a SMART response using Gemini.
         """
+        reply, messages, cache_ticket = await self._prepare_turn(user_id, recognized_text)
+        if reply is not None:
+            return reply
+
+        ai_response = await self.llm.ainvoke(messages)
+        response_text = ai_response.content
+        self._log_usage(ai_response.usage_metadata)
+        if cache_ticket:
+            response_cache.store(user_id, *cache_ticket, response_text)
+        
+        print(f"🗣️ [AVATAR] Response: {response_text}\n")
+        return response_text
+
+    async def stream_audio_intent(self, user_id: str, recognized_text: str):
+        """
+        Streaming variant of process_audio_intent.
+        Yields the answer one sentence at a time as the model generates it,
+        so the avatar can start speaking before the completion is finished.
+        """
+        reply, messages, cache_ticket = await self._prepare_turn(user_id, recognized_text)
+        if reply is not None:
+            yield reply
+            return
+
+        buffer = ""
+        answer = ""
+        usage = None
+        async for chunk in self.llm.astream(messages):
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata
+            buffer += chunk.content
+            answer += chunk.content
+            sentences, buffer = split_sentences(buffer)
+            for sentence in sentences:
+                yield sentence
+        if buffer.strip():
+            yield buffer.strip()
+        self._log_usage(usage)
+        # Only a fully streamed answer is cached
+        if cache_ticket:
+            response_cache.store(user_id, *cache_ticket, answer)
+
+    @staticmethod
+    def _log_usage(usage):
+        """Prints the provider-reported token usage for a turn."""
+        if not usage:
+            return
+        cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+        print(f"🧮 [AI] Usage: {usage.get('input_tokens')} prompt ({cached} cached), {usage.get('output_tokens')} completion")
+
+    async def _prepare_turn(self, user_id: str, recognized_text: str):
+        """
+        Runs everything that happens before the LLM call.
+        Returns (reply, None, None) when the turn is answered directly, otherwise
+        (None, messages, cache_ticket); cache_ticket is (embedding, language, data version)
+        to store the generated answer under, or None when the answer must not be cached.
+        """
         print(f"\n🎤 [USER] input: '{recognized_text}'")
         
-        # --- PHASE 0: HANDLE PENDING CONFIRMATIONS (YES AI) ---
+        # --- PHASE 0: HANDLE PENDING CONFIRMATIONS (YES AI / OUI IA) ---
         from services.agent_service import AgentService 
+        language = detect_language(recognized_text)
 
         if user_id in self.pending_confirmations:
             pending_action = self.pending_confirmations[user_id]
-            # Normalize: lower case -> remove punctuation
-            norm_text = recognized_text.lower().replace('.', '').replace(',', '').strip()
-            
-            # Flexible "YES AI" check handling punctuation variants like "Yes, A.I."
-            if "yes ai" in norm_text:
+            reply = intent_engine.classify_reply(recognized_text)
+
+            if reply == "confirm":
                 # EXECUTE
                 print(f"🚀 [AGENT] User Confirmed. Executing: {pending_action['title']}")
-                execution_result = await AgentService.execute_action(user_id, pending_action)
-                del self.pending_confirmations[user_id] # Clear state
-                
+                del self.pending_confirmations[user_id] # Clear state before executing so it can't run twice
+                # Shielded: a timeout or closed socket must not abort a half-applied payment
+                execution_result = await asyncio.shield(AgentService.execute_action(user_id, pending_action))
+                intent_engine.record("confirm")
+
                 if execution_result['status'] == 'success':
-                    return f"Authentication confirmed. Payment of ${pending_action['amount']} to {pending_action.get('merchant', 'merchant')} is successful. Your updated balance is ${execution_result['new_balance']}."
-                else:
-                    return f"System Error: {execution_result.get('message', 'Could not complete transaction')}."
-            
-            elif "no" in norm_text or "cancel" in norm_text:
+                    return render(
+                        "confirmed", language,
+                        amount=format_money(pending_action['amount'], language),
+                        merchant=pending_action.get('merchant', 'merchant'),
+                        balance=format_money(execution_result['new_balance'], language)
+                    ), None, None
+                return render("failed", language, message=execution_result.get('message', 'Could not complete transaction')), None, None
+
+            if reply == "cancel":
                 del self.pending_confirmations[user_id]
-                return "Understood. The transaction has been cancelled. Is there anything else I can help you with?"
-            
-            else:
-                # If they say something else, remind them or treat as cancel?
-                # For safety, let's treat non-confirmation as "Still waiting" or "Cancel". 
-                # Let's simple return a prompt to be clear.
-                return "I am waiting for your authorization. Please say 'YES AI' to confirm this transaction, or 'Cancel' to stop."
+                intent_engine.record("cancel")
+                return render("cancelled", language), None, None
+
+            # Anything else: keep waiting rather than guessing
+            intent_engine.record("awaiting")
+            return render("awaiting", language), None, None
         
         # --- NORMAL FLOW ---
-        print(f"🔍 [SYSTEM] Fetching context for User: {user_id}...")
-        
-        # 1. Fetch User Profile (Balance, Accounts, Name)
-        user_profile = self.user_repository.get_user(user_id)
-        profile_context = ""
-        if user_profile:
-             accounts = user_profile.get("accounts", [])
-             loans = user_profile.get("loans", [])
-             cc = user_profile.get("credit_cards", [])
-             
-             profile_context += f"User Name: {user_profile.get('name')}\n"
-             profile_context += "ACCOUNTS:\n" + "\n".join([f"- {acc['type']}: ${acc['balance']} {acc['currency']}" for acc in accounts]) + "\n"
-             if loans:
-                 profile_context += "LOANS:\n" + "\n".join([f"- {l['type']}: Remaining ${l['remaining_balance']}" for l in loans]) + "\n"
-             if cc:
-                 profile_context += "CREDIT CARDS:\n" + "\n".join([f"- Card ending {c['card_id'][-4:]}: Balance ${c['current_balance']} / Limit ${c['limit']}" for c in cc]) + "\n"
-        
-        # 2. Search Vector Vault (Transactions)
-        search_results = self.transaction_service.search_transactions(recognized_text, user_id=user_id)
-        
-        # 3. Prepare Context for AI
-        transaction_context = "No specific transactions found."
-        if search_results:
-             transaction_context = "\n".join([f"- {tx['date']}: {tx['merchant']} for ${tx['amount']} ({tx['category']}) - {tx['description']}" for tx in search_results])
-
-        # --- NEW: ACTIVE AGENTIC INTENT EXECUTION ---
-        intent_response = ""
         normalized_text = recognized_text.lower()
-        
+        wants_action = "pay" in normalized_text or "transfer" in normalized_text or "send" in normalized_text
+
+        # --- PHASE 1: DETERMINISTIC FAST PATH ---
+        # Balance / card balance / due-date questions are answered from templates, no model call.
+        # Classified before the action triggers: "when is my payment due" is not a request to pay.
+        intent = intent_engine.classify(recognized_text)
+        if intent:
+            user_profile = await self.user_repository.get_user(user_id)
+            if user_profile:
+                print(f"⚡ [INTENT] Answered '{intent}' from profile data ({language})")
+                intent_engine.record(intent)
+                return intent_engine.answer(intent, user_profile, language), None, None
+
+        # --- PHASE 2: STAGE ACTIVE AGENTIC INTENTS FOR CONFIRMATION ---
         # Trigger: "pay" AND ("credit" OR "visa" OR "bill" OR "hydro" OR "rent")
-        if "pay" in normalized_text or "transfer" in normalized_text or "send" in normalized_text:
+        if wants_action:
+            user_profile = await self.user_repository.get_user(user_id)
             action_payload = None
             amount_to_pay = 0
             target_name = ""
@@ -172,58 +251,55 @@ class AudioService:
             if action_payload:
                 print(f"🔒 [AGENT] Requiring Confirmation for: {action_payload['title']}")
                 self.pending_confirmations[user_id] = action_payload
-                
-                intent_response = f"[SYSTEM: I have prepared the transaction. ASK THE USER: 'I can process a {action_payload.get('title')} of ${action_payload['amount']}. To confirm, please say YES AI.']"
+                intent_engine.record("confirm_prompt")
+                return render(
+                    "confirm_prompt", language,
+                    title=action_payload.get('title'),
+                    amount=format_money(action_payload['amount'], language)
+                ), None, None
 
+        # --- PHASE 3: SEMANTIC ANSWER CACHE ---
+        # Near-duplicate questions against unchanged data reuse the earlier answer.
+        # Action requests are never cached: they must stage a fresh confirmation.
+        query_embedding = await self.transaction_service.embedding_service.aembed_query(recognized_text)
+        cache_ticket = None
+        if not wants_action:
+            cached_answer, data_version = response_cache.lookup(user_id, query_embedding, language)
+            if cached_answer is not None:
+                print(f"⚡ [CACHE] Reusing answer for a similar question ({language})")
+                intent_engine.record("cache")
+                return cached_answer, None, None
+            cache_ticket = (query_embedding, language, data_version)
 
-
-        full_context = f"""
-        === USER PROFILE ===
-        {profile_context}
+        print(f"🔍 [SYSTEM] Fetching context for User: {user_id}...")
         
-        === RELEVANT TRANSACTIONS ===
-        {transaction_context}
-
-        === SYSTEM ACTION ===
-        {intent_response}
-        """
-
-        print(f"📄 [DATA] Full Context:\n{full_context}")
+        # 1 & 2. Fetch User Profile, Spending Totals and Search Vector Vault concurrently (independent steps)
+        user_profile, spending, search_results = await asyncio.gather(
+            self.user_repository.get_user(user_id),
+            self.transaction_service.get_spending_summary(user_id),
+            self.transaction_service.search_transactions(
+                recognized_text, user_id=user_id, query_embedding=query_embedding
+            )
+        )
+        # 3. Prepare Context for AI: compact tables, truncated to the token budget
+        full_context, report = context_builder.build(user_profile, spending, search_results)
+        question = f"Context:\n{full_context}\n\nUser Question: {recognized_text}"
+        # Counted per turn rather than at import, so startup never waits on the tokenizer
+        prompt_tokens = count_tokens(SYSTEM_PROMPT) + count_tokens(question)
+        print(
+            f"🧮 [AI] Prompt ~{prompt_tokens} tokens (context {report['context_tokens']}/{report['budget']}, "
+            f"{report['transactions']} transactions, {report['transactions_dropped']} dropped)"
+        )
 
         # 4. Generate Smart Response
         print("🤖 [AI] Analyzing details and formatting response...")
-        
-        system_prompt = """You are NeuroBank Guardian, a secure and highly knowledgeable Bilingual Banking Expert.
-        
-        YOUR ROLE:
-        1. Contextual Banking Assistant: Use the provided 'USER PROFILE', 'ACCOUNTS', and 'RELEVANT TRANSACTIONS' to answer personal banking questions (e.g., "What is my balance?", "Did I pay Netflix?").
-        2. General Banking Educator: If the user asks about general banking concepts (e.g., "What is an e-Transfer?", "How do I apply for a loan?", "What is a credit score?"), you MUST provide a detailed, easy-to-understand explanation.
-        
-        GUIDELINES FOR GENERAL QUESTIONS:
-        - Explain the concept simply.
-        - If applicable (like for loans or mortgages), list the "Required Documents" for application.
-        - Be helpful and proactive.
-        
-        LANGUAGE INSTRUCTION:
-        - DETECT the language of the user's input (English or French).
-        - REPLY IN THE IDENTICAL LANGUAGE.
-        - If the user speaks French, your entire response (including banking terms) must be in French.
-
-        STRICT RULES:
-        - If asked about personal data (balance, transactions) and it's NOT in the context, say you don't have that specific data.
-        - Do not hallucinate personal numbers.
-        - Be professional, secure, and friendly."""
-        
         messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"Context:\n{full_context}\n\nUser Question: {recognized_text}")
+            # Static system prompt first so the provider can reuse its cached prefix
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(content=question)
         ]
-        
-        ai_response = self.llm.invoke(messages)
-        response_text = ai_response.content
-        
-        print(f"🗣️ [AVATAR] Response: {response_text}\n")
-        return response_text
+        intent_engine.record(None)
+        return None, messages, cache_ticket
 
     def create_speech_recognizer(self):
         """
@@ -2,7 +2,7 @@ import random
 import string
 import os
 from typing import Dict, Optional
-from repositories.user_repository import UserRepository
+from repositories.user_repository import AsyncUserRepository
 # from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
 from pydantic import EmailStr
 from dotenv import load_dotenv
@@ -17,13 +17,13 @@ otp_store: Dict[str, str] = {}
 
 class AuthService:
     def __init__(self):
-        self.user_repository = UserRepository()
+        self.user_repository = AsyncUserRepository()
 
-    def generate_otp(self, email: str) -> Optional[str]:
+    async def generate_otp(self, email: str) -> Optional[str]:
         """
         Generates a 6-digit OTP only if the user exists in DB.
         """
-        user = self.user_repository.get_user_by_email(email)
+        user = await self.user_repository.get_user_by_email(email)
         if not user:
             print(f"⚠️ [AUTH] Attempted login for unregistered email: {email}")
             return None # User does not exist
@@ -51,7 +51,7 @@ class AuthService:
         pass
 
 
-    def verify_otp(self, email: str, code: str) -> Optional[dict]:
+    async def verify_otp(self, email: str, code: str) -> Optional[dict]:
         """
         Verifies the OTP and returns the linked User Object from DB.
         """
@@ -64,6 +64,6 @@ class AuthService:
         del otp_store[email] # One-time use
         
         # LINKING: Find the REAL User Object in DB by email
-        user = self.user_repository.get_user_by_email(email)
+        user = await self.user_repository.get_user_by_email(email)
         
         return user
@@ -1,10 +1,85 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
 import aiohttp
 from config.settings import settings
 
+class _CachedToken:
+    def __init__(self, value: Any, ttl: float, refresh_ahead: float):
+        now = time.monotonic()
+        self.value = value
+        self.expires_at = now + ttl
+        # Start a background refresh once this fraction of the TTL has elapsed
+        self.refresh_at = now + ttl * (1 - refresh_ahead)
+
 class AvatarService:
-    def __init__(self):
+    def __init__(self, sts_url: str = None, relay_url: str = None):
         self.speech_key = settings.AZURE_SPEECH_KEY
         self.speech_region = settings.AZURE_SPEECH_REGION
+        # URLs are overridable so the service can run against a local stub server
+        self.sts_url = sts_url or f"https://{self.speech_region}.api.cognitive.microsoft.com/sts/v1.0/issueToken"
+        # Note: The host might differ slightly per region, but usually follows this pattern or similar.
+        # For standard regions: {region}.tts.speech.microsoft.com
+        self.relay_url = relay_url or f"https://{self.speech_region}.tts.speech.microsoft.com/cognitiveservices/avatar/relay/token/v1"
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._tokens: Dict[str, _CachedToken] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def start(self):
+        """Opens the app-lifetime pooled HTTP session (called at startup)."""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=settings.AVATAR_HTTP_POOL_SIZE, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.AVATAR_HTTP_TIMEOUT)
+            )
+
+    async def close(self):
+        """Closes the pooled session (called at shutdown)."""
+        for task in self._inflight.values():
+            task.cancel()
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            await self.start()
+        return self.session
+
+    async def _cached(self, name: str, ttl: float, fetch: Callable[[], Awaitable[Any]]):
+        """
+        TTL cache with refresh-ahead: fresh tokens are returned immediately, tokens
+        near expiry trigger a background refresh, and expired tokens are refetched.
+        Concurrent callers share a single in-flight fetch.
+        """
+        entry = self._tokens.get(name)
+        now = time.monotonic()
+        if entry and now < entry.expires_at:
+            if now >= entry.refresh_at:
+                self._refresh(name, ttl, fetch)
+            return entry.value
+        # shield: a caller being cancelled must not cancel the fetch other callers share
+        return await asyncio.shield(self._refresh(name, ttl, fetch))
+
+    def _refresh(self, name: str, ttl: float, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(name)
+        if task is None:
+            async def run():
+                value = await fetch()
+                if value is not None:
+                    self._tokens[name] = _CachedToken(value, ttl, settings.AVATAR_TOKEN_REFRESH_AHEAD)
+                return value
+
+            def done(finished: asyncio.Task):
+                self._inflight.pop(name, None)
+                if not finished.cancelled() and finished.exception():
+                    print(f"⚠️ Failed to refresh {name}: {finished.exception()}")
+
+            task = asyncio.create_task(run())
+            task.add_done_callback(done)
+            self._inflight[name] = task
+        return task
 
     async def get_token(self):
         """
@@ -12,20 +87,21 @@ class AvatarService:
         """
         if not self.speech_key or not self.speech_region:
             raise ValueError("Azure Speech Key/Region not configured.")
+        return await self._cached("sts_token", settings.AVATAR_TOKEN_TTL, self._fetch_token)
 
-        fetch_token_url = f"https://{self.speech_region}.api.cognitive.microsoft.com/sts/v1.0/issueToken"
+    async def _fetch_token(self):
         headers = {
             'Ocp-Apim-Subscription-Key': self.speech_key
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(fetch_token_url, headers=headers) as response:
-                if response.status == 200:
-                    token = await response.text()
-                    return token
-                else:
-                    error_text = await response.text()
-                    raise Exception(f"Failed to issue SDK token: {response.status} - {error_text}")
+        session = await self._get_session()
+        async with session.post(self.sts_url, headers=headers) as response:
+            if response.status == 200:
+                token = await response.text()
+                return token
+            else:
+                error_text = await response.text()
+                raise Exception(f"Failed to issue SDK token: {response.status} - {error_text}")
 
     async def get_relay_token(self):
         """
@@ -34,20 +110,18 @@ class AvatarService:
         """
         if not self.speech_key or not self.speech_region:
              return None 
+        return await self._cached("relay_token", settings.AVATAR_RELAY_TOKEN_TTL, self._fetch_relay_token)
 
-        # Note: The host might differ slightly per region, but usually follows this pattern or similar.
-        # For standard regions: {region}.tts.speech.microsoft.com
-        url = f"https://{self.speech_region}.tts.speech.microsoft.com/cognitiveservices/avatar/relay/token/v1"
+    async def _fetch_relay_token(self):
         headers = {
             'Ocp-Apim-Subscription-Key': self.speech_key
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    # Fallback or log error
-                    print(f"⚠️ Failed to get Relay Token: {response.status}")
-                    return None
-
+        session = await self._get_session()
+        async with session.get(self.relay_url, headers=headers) as response:
+            if response.status == 200:
+                return await response.json()
+            else:
+                # Fallback or log error
+                print(f"⚠️ Failed to get Relay Token: {response.status}")
+                return None
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+from config.settings import settings
+
+# deliver(user_id, message) -> True if this worker holds a socket for the user
+Deliver = Callable[[str, Dict[str, Any]], Awaitable[bool]]
+# Receives worker-level events (e.g. cache invalidations) published by other workers
+EventHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class Backplane:
+    """
+    Routes personal WebSocket messages to the worker that holds the user's socket.
+    Any worker can publish; every subscribed worker tries local delivery.
+    Worker-level events (publish_event) reach every worker except the sender.
+    """
+    event_handler: Optional[EventHandler] = None
+
+    async def start(self, deliver: Deliver):
+        self.deliver = deliver
+
+    async def publish(self, user_id: str, message: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def publish_event(self, event: Dict[str, Any]):
+        """A single process has no other workers to tell."""
+
+    async def stop(self):
+        pass
+
+class InMemoryBackplane(Backplane):
+    """Single-process backplane: publishing is direct local delivery."""
+
+    async def publish(self, user_id: str, message: Dict[str, Any]):
+        if not await self.deliver(user_id, message):
+            print(f"⚠️ [WS] User {user_id} not connected. Message dropped.")
+
+class RedisBackplane(Backplane):
+    """
+    Redis pub/sub backplane for multi-worker / multi-pod deployments.
+    Requires the optional `redis` package (pip install redis).
+    """
+    CHANNEL = "neurobank:ws:personal"
+    EVENTS_CHANNEL = "neurobank:events"
+
+    def __init__(self, url: str):
+        self.url = url
+        self.origin = uuid.uuid4().hex  # lets a worker ignore its own events
+        self.client = None
+        self.pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("BACKPLANE_URL is set but the 'redis' package is not installed") from e
+
+        self._stopping = False
+        self.client = redis.from_url(self.url)
+        await self._subscribe()
+        self._listener = asyncio.create_task(self._listen())
+        print(f"📡 [WS] Backplane subscribed to {self.CHANNEL}")
+
+    async def _subscribe(self):
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(self.CHANNEL, self.EVENTS_CHANNEL)
+
+    async def publish(self, user_id: str, message: Dict[str, Any]):
+        payload = json.dumps({"user_id": user_id, "message": message}, default=str)
+        await self.client.publish(self.CHANNEL, payload)
+
+    async def publish_event(self, event: Dict[str, Any]):
+        payload = json.dumps({**event, "origin": self.origin}, default=str)
+        await self.client.publish(self.EVENTS_CHANNEL, payload)
+
+    async def _listen(self):
+        """
+        Dispatches messages until stopped. When the Redis connection drops, it
+        resubscribes with exponential backoff; messages published meanwhile are lost
+        (pub/sub has no replay).
+        """
+        backoff = settings.BACKPLANE_RECONNECT_BACKOFF
+        while not self._stopping:
+            try:
+                if self.pubsub is None:
+                    await self._subscribe()
+                    print(f"📡 [WS] Backplane reconnected to {self.CHANNEL}")
+                    backoff = settings.BACKPLANE_RECONNECT_BACKOFF
+                async for item in self.pubsub.listen():
+                    await self._dispatch(item)
+                raise ConnectionError("subscription ended")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._stopping:
+                    return
+                print(f"⚠️ [WS] Backplane lost Redis ({e!r}); reconnecting in {backoff:.1f}s")
+                await self._discard_pubsub()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, settings.BACKPLANE_RECONNECT_MAX)
+
+    async def _dispatch(self, item: Dict[str, Any]):
+        try:
+            channel = item["channel"].decode() if isinstance(item["channel"], bytes) else item["channel"]
+            envelope = json.loads(item["data"])
+            if channel == self.EVENTS_CHANNEL:
+                if envelope.get("origin") != self.origin and self.event_handler:
+                    await self.event_handler(envelope)
+                return
+            await self.deliver(envelope["user_id"], envelope["message"])
+        except Exception as e:
+            print(f"❌ [WS] Backplane delivery failed: {e}")
+
+    async def _discard_pubsub(self):
+        pubsub, self.pubsub = self.pubsub, None
+        if pubsub:
+            try:
+                await pubsub.close()
+            except Exception:
+                pass
+
+    async def stop(self):
+        # Flag first so the listener treats the closed subscription as a stop, not a lost connection
+        self._stopping = True
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        # Closing the connection also ends its subscriptions server-side
+        await self._discard_pubsub()
+        if self.client:
+            await self.client.close()
+            self.client = None
+
+def create_backplane() -> Backplane:
+    """Redis when BACKPLANE_URL is set, otherwise in-process delivery."""
+    if settings.BACKPLANE_URL:
+        return RedisBackplane(settings.BACKPLANE_URL)
+    return InMemoryBackplane()
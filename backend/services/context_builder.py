@@ -0,0 +1,183 @@
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from config.settings import settings
+
+try:
+    import tiktoken
+except ImportError:  # token counts fall back to a chars/4 estimate
+    tiktoken = None
+
+# Identical on every turn (no per-user or per-turn text), so providers can cache it as a prompt prefix
+SYSTEM_PROMPT = """You are NeuroBank Guardian, a secure and highly knowledgeable Bilingual Banking Expert.
+
+YOUR ROLE:
+1. Contextual Banking Assistant: Use the provided context to answer personal banking questions (e.g., "What is my balance?", "Did I pay Netflix?"). For totals ("How much did I spend on food this month?") use SPENDING, which is exact; TRANSACTIONS is only the most relevant sample.
+2. General Banking Educator: If the user asks about general banking concepts (e.g., "What is an e-Transfer?", "How do I apply for a loan?", "What is a credit score?"), you MUST provide a detailed, easy-to-understand explanation.
+
+CONTEXT FORMAT:
+- Each section starts with a header line "SECTION: column|column|...", followed by one row per line with the same columns.
+- Amounts are in the account currency; dates are YYYY-MM-DD.
+
+GUIDELINES FOR GENERAL QUESTIONS:
+- Explain the concept simply.
+- If applicable (like for loans or mortgages), list the "Required Documents" for application.
+- Be helpful and proactive.
+
+LANGUAGE INSTRUCTION:
+- DETECT the language of the user's input (English or French).
+- REPLY IN THE IDENTICAL LANGUAGE.
+- If the user speaks French, your entire response (including banking terms) must be in French.
+
+STRICT RULES:
+- If asked about personal data (balance, transactions) and it's NOT in the context, say you don't have that specific data.
+- Do not hallucinate personal numbers.
+- Be professional, secure, and friendly."""
+
+_encoding = None
+_encoding_loader: Optional[threading.Thread] = None
+
+
+def _load_encoding():
+    global _encoding
+    try:
+        # May download the BPE file (no timeout in tiktoken); set TIKTOKEN_CACHE_DIR to ship it
+        _encoding = tiktoken.encoding_for_model(settings.LLM_MODEL)
+    except Exception as e:
+        # Unknown model, or the BPE file can't be downloaded (offline)
+        print(f"⚠️ tiktoken unavailable for {settings.LLM_MODEL}; estimating tokens: {e}")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Tokens for the configured chat model; ~4 chars per token if tiktoken is unavailable.
+    The encoding loads on a background thread, so no caller waits on its download;
+    counts are estimates until it is ready.
+    """
+    global _encoding_loader
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    if tiktoken is not None and _encoding_loader is None:
+        _encoding_loader = threading.Thread(target=_load_encoding, name="tiktoken-loader", daemon=True)
+        _encoding_loader.start()
+    return (len(text) + 3) // 4
+
+
+def _date(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+def _money(value: Any) -> str:
+    return f"{value:.2f}" if isinstance(value, (int, float)) else str(value)
+
+
+def _section(title: str, columns: List[str], rows: List[List[Any]]) -> str:
+    lines = [f"{title}: {'|'.join(columns)}"]
+    lines += ["|".join(str(cell) for cell in row) for row in rows]
+    return "\n".join(lines)
+
+
+class ContextBuilder:
+    """
+    Renders the per-turn context as compact pipe-separated tables within a token budget.
+
+    Sections are added in priority order: profile (always), spending totals,
+    then transactions ranked by relevance score until the budget is spent.
+    """
+
+    def __init__(self, budget: int = None):
+        self.budget = budget or settings.CONTEXT_TOKEN_BUDGET
+
+    @staticmethod
+    def profile_section(profile: Optional[Dict[str, Any]]) -> str:
+        if not profile:
+            return "PROFILE: none"
+        parts = [f"NAME: {profile.get('name')}"]
+        parts.append(_section(
+            "ACCOUNTS", ["type", "balance", "currency"],
+            [[acc["type"], _money(acc["balance"]), acc.get("currency", "")] for acc in profile.get("accounts", [])]
+        ))
+        if profile.get("credit_cards"):
+            parts.append(_section(
+                "CARDS", ["name", "ending", "balance", "limit", "due"],
+                [[c["name"], c["card_id"][-4:], _money(c["current_balance"]), _money(c["limit"]), _date(c.get("due_date"))]
+                 for c in profile["credit_cards"]]
+            ))
+        if profile.get("loans"):
+            parts.append(_section(
+                "LOANS", ["type", "remaining", "rate"],
+                [[l["type"], _money(l["remaining_balance"]), l.get("interest_rate", "")] for l in profile["loans"]]
+            ))
+        unpaid = [b for b in profile.get("bills", []) if b.get("status") != "Paid"]
+        if unpaid:
+            parts.append(_section(
+                "UNPAID_BILLS", ["merchant", "amount", "due"],
+                [[b["merchant"], _money(b["amount"]), _date(b.get("due_date"))] for b in unpaid]
+            ))
+        return "\n".join(parts)
+
+    @staticmethod
+    def spending_rows(spending: Optional[Dict[str, Any]]) -> List[List[Any]]:
+        """period|spent|top categories; months newest first, then all time."""
+        if not spending:
+            return []
+        rows = []
+        periods = list(spending.get("months", {}).items()) + [("all", spending.get("all_time"))]
+        for period, summary in periods:
+            if not summary or not summary.get("categories"):
+                continue
+            categories = ", ".join(f"{name} {_money(v['total'])}x{v['count']}" for name, v in summary["categories"].items())
+            rows.append([period, _money(summary["total"]), categories])
+        merchants = (spending.get("all_time") or {}).get("top_merchants") or {}
+        if merchants:
+            rows.append(["top_merchants", "", ", ".join(f"{name} {_money(v['total'])}" for name, v in merchants.items())])
+        return rows
+
+    def build(
+        self,
+        profile: Optional[Dict[str, Any]],
+        spending: Optional[Dict[str, Any]],
+        transactions: List[Dict[str, Any]],
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Returns (context, report) where report has token and truncation counts."""
+        sections = [self.profile_section(profile)]
+        used = count_tokens(sections[0])
+
+        spending_rows = []
+        for row in self.spending_rows(spending):
+            cost = count_tokens("|".join(str(cell) for cell in row)) + 1
+            if used + cost > self.budget:
+                break
+            spending_rows.append(row)
+            used += cost
+        if spending_rows:
+            sections.append(_section("SPENDING", ["period", "spent", "by_category"], spending_rows))
+
+        ranked = sorted(transactions, key=lambda tx: -(tx.get("score") or 0.0))
+        transaction_rows = []
+        for tx in ranked:
+            row = [_date(tx.get("date")), tx.get("merchant"), _money(tx.get("amount")), tx.get("category"), tx.get("description")]
+            cost = count_tokens("|".join(str(cell) for cell in row)) + 1
+            if used + cost > self.budget:
+                break
+            transaction_rows.append(row)
+            used += cost
+        if transaction_rows:
+            sections.append(_section("TRANSACTIONS", ["date", "merchant", "amount", "category", "description"], transaction_rows))
+        else:
+            sections.append("TRANSACTIONS: none found")
+
+        context = "\n\n".join(sections)
+        report = {
+            "context_tokens": count_tokens(context),
+            "budget": self.budget,
+            "transactions": len(transaction_rows),
+            "transactions_dropped": len(ranked) - len(transaction_rows),
+            "spending_rows_dropped": len(self.spending_rows(spending)) - len(spending_rows),
+        }
+        return context, report
+
+
+context_builder = ContextBuilder()
@@ -0,0 +1,111 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+from config.settings import settings
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Lazily groups an iterable into lists of at most `size` items."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class EmbeddingPipeline:
+    """
+    Embeds documents in batches on a bounded worker pool and streams
+    every finished batch into a sink (e.g. TransactionRepository.create_many).
+
+    The embedding backend only needs an `embed_documents(texts)` method,
+    so a fake backend can be swapped in for local runs.
+    """
+
+    def __init__(
+        self,
+        embedding_backend,
+        batch_size: int = None,
+        concurrency: int = None,
+        max_retries: int = None,
+        retry_backoff: float = None,
+        text_key: str = "description",
+    ):
+        self.embedding_backend = embedding_backend
+        self.batch_size = max(1, batch_size or settings.SEED_BATCH_SIZE)
+        self.concurrency = max(1, concurrency or settings.SEED_CONCURRENCY)
+        self.max_retries = settings.SEED_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = settings.SEED_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.text_key = text_key
+
+    def _embed_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Embeds one batch, retrying with exponential backoff."""
+        texts = [doc[self.text_key] for doc in batch]
+        attempt = 0
+        while True:
+            try:
+                vectors = self.embedding_backend.embed_documents(texts)
+                break
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self.retry_backoff * (2 ** attempt))
+                attempt += 1
+
+        documents = []
+        for doc, vector in zip(batch, vectors):
+            doc = doc.copy()
+            doc["embedding"] = vector
+            documents.append(doc)
+        return documents
+
+    def run(
+        self,
+        documents: Iterable[Dict[str, Any]],
+        sink: Callable[[List[Dict[str, Any]]], Any],
+        on_progress: Callable[[Dict[str, Any]], None] = None,
+    ) -> Dict[str, Any]:
+        """
+        Consumes `documents` lazily; at most `concurrency` batches are held in memory.
+        Returns throughput stats once every batch has been embedded and written.
+        """
+        stats = {"rows": 0, "batches": 0, "failed_rows": 0, "failed_batches": 0}
+        started = time.perf_counter()
+
+        def drain(futures):
+            for future in futures:
+                batch_size = in_flight.pop(future)
+                try:
+                    sink(future.result())
+                    stats["rows"] += batch_size
+                    stats["batches"] += 1
+                except Exception as e:
+                    print(f"⚠️ Failed to embed or store batch of {batch_size} transactions: {e}")
+                    stats["failed_rows"] += batch_size
+                    stats["failed_batches"] += 1
+                if on_progress:
+                    on_progress(self._snapshot(stats, started))
+
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for batch in batched(documents, self.batch_size):
+                if len(in_flight) >= self.concurrency:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    drain(done)
+                in_flight[executor.submit(self._embed_batch, batch)] = len(batch)
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                drain(done)
+
+        return self._snapshot(stats, started)
+
+    @staticmethod
+    def _snapshot(stats: Dict[str, Any], started: float) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - started
+        return {
+            **stats,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(stats["rows"] / elapsed, 1) if elapsed > 0 else 0.0,
+        }
@@ -1,21 +1,66 @@
 from langchain_openai import OpenAIEmbeddings
 from config.settings import settings
+from services.embedding_cache import EmbeddingCache
+
+# Shared across every EmbeddingService instance in the process
+embedding_cache = EmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_SIZE,
+    disk_path=settings.EMBEDDING_CACHE_PATH
+)
 
 class EmbeddingService:
+    MODEL = "text-embedding-3-small"
+    DIMENSIONS = 768
+
     def __init__(self):
         # Using 768 dimensions to match MongoDB vector index
         # (originally created for Google's embedding-001 model)
         self.embeddings_model = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            dimensions=768,
+            model=self.MODEL,
+            dimensions=self.DIMENSIONS,
             openai_api_key=settings.OPENAI_API_KEY
         )
+        self.cache = embedding_cache
+
+    def _cache_key(self, text: str) -> str:
+        return EmbeddingCache.make_key(self.MODEL, self.DIMENSIONS, text)
 
     def embed_query(self, text: str):
-        return self.embeddings_model.embed_query(text)
+        key = self._cache_key(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.embeddings_model.embed_query(text)
+            self.cache.put(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str):
+        """Non-blocking variant of embed_query for request paths."""
+        key = self._cache_key(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = await self.embeddings_model.aembed_query(text)
+            self.cache.put(key, vector)
+        return vector
     
     def embed_documents(self, texts: list[str]):
-        return self.embeddings_model.embed_documents(texts)
+        keys = [self._cache_key(text) for text in texts]
+        vectors = [self.cache.get(key) for key in keys]
+
+        # Only send each distinct uncached text to the API once
+        missing = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None and key not in missing:
+                missing[key] = text
+        if missing:
+            computed = self.embeddings_model.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), computed))
+            self.cache.put_many(fresh)
+            vectors = [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
+        return vectors
+
+    def cache_stats(self):
+        """Hit/miss/eviction counters for the shared embedding cache."""
+        return self.cache.stats()
 
 
     def embed_transaction(self, transaction: dict):
@@ -23,9 +68,12 @@ class EmbeddingService:
         text = f"{transaction['date']} {transaction['merchant']} {transaction['amount']} {transaction['category']} {transaction['description']}"
         return self.embed_query(text)
 
-    # Placeholder for vector store update
-    async def add_to_vector_store(self, transaction: dict):
-        """Encodes and adds a new transaction to the vector database."""
-        vector = self.embed_transaction(transaction)
-        # In a real app, you would push this 'vector' + 'metadata' to Pinecone/MongoDB Atlas
-        print(f"✅ [VECTOR DB] Added new transaction vector for {transaction['merchant']}")
+    async def add_to_vector_store(self, transaction: dict) -> str:
+        """
+        Queues a stored transaction (see TransactionRepository.insert_pending) to have
+        its embedding computed and attached in the background; returns its idempotency key.
+        """
+        from services.vector_store_writer import vector_store_writer
+        key = await vector_store_writer.add(transaction)
+        print(f"📥 [VECTOR DB] Queued transaction vector for {transaction['merchant']}")
+        return key
@@ -0,0 +1,205 @@
+"""
+Deterministic fast path for simple banking turns.
+
+Short questions about balances, card balances and due dates, plus the
+confirm / cancel replies to a staged action, are answered from templates
+filled with profile data, in English or French, without a model call.
+Anything with words outside an intent's vocabulary falls back to the LLM.
+The labelled corpus lives in tests/test_intent_engine.py.
+"""
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# Filler words that never change the meaning of a short request
+STOPWORDS = {
+    "what", "what's", "whats", "is", "are", "my", "the", "a", "of", "me", "tell", "show", "check", "give",
+    "please", "can", "could", "you", "i", "do", "have", "hey", "hi", "how", "much", "in", "on", "current",
+    "right", "now", "today", "all", "total", "guardian",
+    "quel", "quelle", "quels", "quelles", "est", "sont", "mon", "ma", "mes", "le", "la", "les", "l'", "de",
+    "du", "des", "moi", "montre", "montre-moi", "donne", "donne-moi", "dis-moi", "c'est", "quoi", "combien",
+    "j'ai", "ai", "je", "dans", "sur", "s'il", "te", "vous", "plaît", "plait", "actuel", "actuelle", "bonjour",
+}
+
+# intent -> (words that must appear, words that may appear besides STOPWORDS)
+INTENT_VOCABULARY = {
+    "card_balance": (
+        {"card", "cards", "visa", "carte", "cartes", "crédit", "credit"},
+        {"balance", "balances", "solde", "soldes", "owe", "dois", "credit", "crédit", "card", "cards", "carte",
+         "cartes", "visa", "infinite", "à", "a"},
+    ),
+    "due_dates": (
+        {"due", "échéance", "échéances", "echeance", "echeances", "bills", "bill", "factures", "facture"},
+        {"when", "due", "date", "dates", "bill", "bills", "payment", "payments", "upcoming", "next", "unpaid",
+         "quand", "échéance", "échéances", "echeance", "echeances", "facture", "factures", "paiement",
+         "paiements", "prochain", "prochaine", "prochains", "prochaines", "à", "a", "dues", "dû", "impayées",
+         "impayees", "pour", "doivent", "sont-elles", "sont-ils", "être", "etre", "payées", "payees", "dates", "mes"},
+    ),
+    "balance": (
+        {"balance", "balances", "solde", "soldes"},
+        {"balance", "balances", "solde", "soldes", "account", "accounts", "chequing", "checking", "savings",
+         "bank", "compte", "comptes", "chèques", "cheques", "épargne", "epargne", "bancaire", "bancaires"},
+    ),
+}
+
+CONFIRM = re.compile(r"\b(?:yes|oui)\s*(?:ai|a i|ia|i a)\b")
+CANCEL = re.compile(r"\b(?:no|non|cancel|annuler|annule|stop|arrête|arrete)\b")
+TOKEN = re.compile(r"[\wàâçéèêëîïôûùüÿœ'-]+")
+
+TEMPLATES = {
+    "balance": {
+        "en": "Here are your balances: {accounts}.",
+        "fr": "Voici vos soldes : {accounts}.",
+    },
+    "card_balance": {
+        "en": "Your {name} balance is {balance} of a {limit} limit, due {due}.",
+        "fr": "Votre carte {name} a un solde de {balance} sur une limite de {limit}, à payer le {due}.",
+    },
+    "no_cards": {
+        "en": "You don't have any credit cards on file.",
+        "fr": "Vous n'avez aucune carte de crédit à votre dossier.",
+    },
+    "due_dates": {
+        "en": "Upcoming due dates: {items}.",
+        "fr": "Prochaines échéances : {items}.",
+    },
+    "nothing_due": {
+        "en": "You have no unpaid bills or card balances due.",
+        "fr": "Vous n'avez aucune facture impayée ni solde de carte à payer.",
+    },
+    "confirm_prompt": {
+        "en": "I can process a {title} of {amount}. To confirm, please say YES AI.",
+        "fr": "Je peux effectuer : {title}, pour {amount}. Pour confirmer, dites OUI IA.",
+    },
+    "confirmed": {
+        "en": "Authentication confirmed. Payment of {amount} to {merchant} is successful. Your updated balance is {balance}.",
+        "fr": "Authentification confirmée. Le paiement de {amount} à {merchant} est effectué. Votre nouveau solde est de {balance}.",
+    },
+    "failed": {
+        "en": "System Error: {message}.",
+        "fr": "Erreur système : {message}.",
+    },
+    "cancelled": {
+        "en": "Understood. The transaction has been cancelled. Is there anything else I can help you with?",
+        "fr": "Entendu. La transaction a été annulée. Puis-je vous aider avec autre chose ?",
+    },
+    "awaiting": {
+        "en": "I am waiting for your authorization. Please say 'YES AI' to confirm this transaction, or 'Cancel' to stop.",
+        "fr": "J'attends votre autorisation. Dites « OUI IA » pour confirmer cette transaction, ou « Annuler » pour l'arrêter.",
+    },
+}
+
+MONTHS_FR = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août",
+             "septembre", "octobre", "novembre", "décembre"]
+
+
+def format_money(amount: float, language: str) -> str:
+    if language == "fr":
+        return f"{amount:,.2f}".replace(",", " ").replace(".", ",") + " $"
+    return f"${amount:,.2f}"
+
+
+def format_date(value: Any, language: str) -> str:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if not isinstance(value, datetime):
+        return str(value)
+    if language == "fr":
+        return f"{value.day} {MONTHS_FR[value.month - 1]}"
+    return value.strftime("%B %d").replace(" 0", " ")
+
+
+def render(template: str, language: str, **values) -> str:
+    return TEMPLATES[template][language].format(**values)
+
+
+class IntentEngine:
+    """Classifies and answers simple turns; counts how many turns skip the model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.served: Dict[str, int] = {}
+
+    @staticmethod
+    def classify(text: str) -> Optional[str]:
+        """Returns a profile intent name, or None when the question needs the LLM."""
+        tokens = [t.strip("'-") for t in TOKEN.findall(text.casefold())]
+        words = {t for t in tokens if t and t not in STOPWORDS}
+        if not words:
+            return None
+        for intent, (heads, allowed) in INTENT_VOCABULARY.items():
+            if words & heads and words <= allowed | heads:
+                return intent
+        return None
+
+    @staticmethod
+    def classify_reply(text: str) -> str:
+        """Reply to a staged action: "confirm", "cancel" or "other"."""
+        normalized = " ".join(TOKEN.findall(text.casefold().replace(".", " ").replace(",", " ")))
+        if CONFIRM.search(normalized):
+            return "confirm"
+        if CANCEL.search(normalized):
+            return "cancel"
+        return "other"
+
+    @staticmethod
+    def answer(intent: str, profile: Dict[str, Any], language: str) -> str:
+        if intent == "balance":
+            accounts = ", ".join(
+                f"{acc['type']} {format_money(acc['balance'], language)}" for acc in profile.get("accounts", [])
+            )
+            return render("balance", language, accounts=accounts)
+
+        if intent == "card_balance":
+            cards = profile.get("credit_cards", [])
+            if not cards:
+                return render("no_cards", language)
+            return " ".join(
+                render(
+                    "card_balance", language,
+                    name=c["name"],
+                    balance=format_money(c["current_balance"], language),
+                    limit=format_money(c["limit"], language),
+                    due=format_date(c.get("due_date"), language)
+                )
+                for c in cards
+            )
+
+        # due_dates: unpaid bills and card balances, soonest first
+        due = [(b["due_date"], b["merchant"], b["amount"]) for b in profile.get("bills", []) if b.get("status") != "Paid"]
+        due += [(c["due_date"], c["name"], c["current_balance"]) for c in profile.get("credit_cards", [])
+                if c.get("current_balance", 0) > 0 and c.get("due_date")]
+        if not due:
+            return render("nothing_due", language)
+        due.sort(key=lambda item: str(item[0]) if not isinstance(item[0], datetime) else item[0].isoformat())
+        joiner = " le " if language == "fr" else " on "
+        items = "; ".join(
+            f"{name} {format_money(amount, language)}{joiner}{format_date(date, language)}" for date, name, amount in due
+        )
+        return render("due_dates", language, items=items)
+
+    def record(self, intent: Optional[str]):
+        """Counts one assistant turn; intent is None when the LLM answered it."""
+        with self._lock:
+            self.turns += 1
+            if intent:
+                self.served[intent] = self.served.get(intent, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            served = sum(self.served.values())
+            return {
+                "turns": self.turns,
+                "served_without_model": served,
+                "served_share": round(served / self.turns, 3) if self.turns else 0.0,
+                "by_intent": dict(self.served),
+            }
+
+
+intent_engine = IntentEngine()
+
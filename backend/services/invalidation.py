@@ -0,0 +1,112 @@
+"""
+Cross-worker cache invalidation.
+
+The user profile cache, the semantic response cache and the local vector index
+partitions live in each worker process. Every local invalidation is also published on the backplane
+(services.backplane) and replayed by the other workers, so a write served by one
+worker doesn't leave stale answers or vectors in the rest. New vectors are announced
+by idempotency_key, and the other workers fetch just those rows into their partitions.
+"""
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Union
+from config.database import Database
+from services.backplane import Backplane, create_backplane
+from services.response_cache import response_cache
+from repositories.user_cache import user_cache
+from repositories.vector_index import LocalVectorIndex, invalidate_local_indexes, add_stored_to_local_indexes
+
+USER_CACHE = "user_cache.invalidate"
+RESPONSE_CACHE = "response_cache.invalidate"
+VECTOR_INDEX = "vector_index.invalidate"
+VECTOR_ROWS = "vector_index.add"
+
+Handler = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+
+class InvalidationBus:
+    def __init__(self):
+        self._handlers: Dict[str, Handler] = {}
+        self._backplane: Optional[Backplane] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sending: Set[asyncio.Task] = set()
+
+    def register(self, topic: str, handler: Handler):
+        """`handler(payload)` applies another worker's invalidation locally; it may be a coroutine."""
+        self._handlers[topic] = handler
+
+    def attach(self, backplane: Backplane):
+        """Call from the server's event loop once the backplane is started."""
+        self._backplane = backplane
+        self._loop = asyncio.get_running_loop()
+        backplane.event_handler = self._receive
+
+    def publish(self, topic: str, payload: Dict[str, Any]):
+        """Fire-and-forget; callable from the event loop or a worker thread. No-op when detached."""
+        if self._backplane is None:
+            return
+        event = {"topic": topic, "payload": payload}
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            task = self._loop.create_task(self._send(event))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+        else:
+            asyncio.run_coroutine_threadsafe(self._send(event), self._loop)
+
+    async def announce(self, topic: str, payload: Dict[str, Any]):
+        """
+        Publishes one event from a process outside the server (e.g. seed_db.py), over
+        a short-lived backplane connection. No-op without BACKPLANE_URL.
+        """
+        async def no_delivery(user_id: str, message: Dict[str, Any]) -> bool:
+            return False
+
+        backplane = create_backplane()
+        await backplane.start(no_delivery)
+        try:
+            await backplane.publish_event({"topic": topic, "payload": payload})
+        finally:
+            await backplane.stop()
+
+    async def _send(self, event: Dict[str, Any]):
+        try:
+            await self._backplane.publish_event(event)
+        except Exception as e:
+            print(f"⚠️ [INVALIDATE] Could not publish {event['topic']}: {e}")
+
+    async def _receive(self, event: Dict[str, Any]):
+        handler = self._handlers.get(event.get("topic"))
+        if handler:
+            result = handler(event.get("payload") or {})
+            if inspect.isawaitable(result):
+                await result
+
+
+invalidation_bus = InvalidationBus()
+
+invalidation_bus.register(USER_CACHE, lambda payload: user_cache.invalidate(payload.get("user_id"), propagate=False))
+user_cache.on_invalidate = lambda user_id: invalidation_bus.publish(USER_CACHE, {"user_id": user_id})
+
+
+def _invalidate_answers(payload: Dict[str, Any]):
+    # Events may arrive out of order; answers rebuilt here must not read a profile
+    # cached before the write whose user_cache event is still in flight
+    user_cache.invalidate(payload.get("user_id"), propagate=False)
+    response_cache.invalidate(payload.get("user_id"), propagate=False)
+
+
+invalidation_bus.register(RESPONSE_CACHE, _invalidate_answers)
+response_cache.on_invalidate = lambda user_id: invalidation_bus.publish(RESPONSE_CACHE, {"user_id": user_id})
+
+invalidation_bus.register(VECTOR_INDEX, lambda payload: invalidate_local_indexes(payload.get("user_ids")))
+LocalVectorIndex.on_invalidate = staticmethod(
+    lambda user_ids: invalidation_bus.publish(VECTOR_INDEX, {"user_ids": user_ids})
+)
+
+# Reading the announced rows is a MongoDB query, so it runs off the event loop
+invalidation_bus.register(VECTOR_ROWS, lambda payload: Database.run(add_stored_to_local_indexes, payload.get("keys") or []))
+LocalVectorIndex.on_add = staticmethod(lambda keys: invalidation_bus.publish(VECTOR_ROWS, {"keys": keys}))
@@ -0,0 +1,205 @@
+import asyncio
+import itertools
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from config.database import Database
+from config.settings import settings
+
+# Lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class Job:
+    __slots__ = ("id", "name", "payload", "priority", "attempts", "max_attempts", "created", "error")
+
+    def __init__(self, name: str, payload: Dict[str, Any], priority: int, max_attempts: int,
+                 job_id: str = None, attempts: int = 0):
+        self.id = job_id or uuid.uuid4().hex
+        self.name = name
+        self.payload = payload
+        self.priority = priority
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.created = time.time()
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "name": self.name, "payload": self.payload, "priority": self.priority,
+            "attempts": self.attempts, "max_attempts": self.max_attempts, "error": self.error,
+        }
+
+
+class MongoJobStore:
+    """
+    Durable backing for JobQueue: a job document lives in `jobs` from submit until
+    it completes, so jobs still pending after a crash or restart are picked up again.
+    Dead-lettered jobs stay with status "dead" for inspection.
+    """
+
+    def __init__(self, collection_name: str = "jobs"):
+        self.collection = Database.get_collection(collection_name)
+
+    def save(self, job: Job):
+        self.collection.replace_one(
+            {"_id": job.id},
+            {"name": job.name, "payload": job.payload, "priority": job.priority, "attempts": job.attempts,
+             "max_attempts": job.max_attempts, "status": "pending", "error": job.error},
+            upsert=True
+        )
+
+    def complete(self, job: Job):
+        self.collection.delete_one({"_id": job.id})
+
+    def dead(self, job: Job):
+        self.collection.update_one(
+            {"_id": job.id}, {"$set": {"status": "dead", "attempts": job.attempts, "error": job.error}}
+        )
+
+    def pending(self) -> List[Job]:
+        return [
+            Job(doc["name"], doc["payload"], doc["priority"], doc["max_attempts"], job_id=doc["_id"], attempts=doc["attempts"])
+            for doc in self.collection.find({"status": "pending"}).sort("priority", 1)
+        ]
+
+
+class JobQueue:
+    """
+    In-process scheduler for post-commit side effects (broadcasts, aggregates, audit).
+
+    Jobs are (name, payload) pairs dispatched to registered async handlers by a
+    fixed pool of workers in priority order. A failing job is retried with
+    exponential backoff and dead-lettered after `max_attempts`. With a store
+    (JOB_STORE=mongo) queued jobs survive restarts; otherwise they are lost on crash.
+    Before start() (scripts, tests) submit() runs the handler inline.
+    """
+
+    def __init__(self, workers: int = None, max_size: int = None, max_attempts: int = None,
+                 retry_backoff: float = None, store: MongoJobStore = None):
+        self.workers = max(1, workers or settings.JOB_WORKERS)
+        self.max_size = max_size or settings.JOB_QUEUE_MAX
+        self.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        self.retry_backoff = settings.SEED_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.store = store
+        self._handlers: Dict[str, Handler] = {}
+        self._queue: asyncio.PriorityQueue = None
+        self._tasks: List[asyncio.Task] = []
+        self._sequence = itertools.count()  # FIFO within a priority
+        self.dead_letters: "deque[Job]" = deque(maxlen=settings.JOB_DEAD_LETTER_MAX)
+        self.stats = {"submitted": 0, "completed": 0, "retried": 0, "dead": 0, "inline": 0}
+
+    def register(self, name: str, handler: Handler):
+        self._handlers[name] = handler
+
+    def handler(self, name: str):
+        """Decorator form of register()."""
+        def decorate(func: Handler) -> Handler:
+            self.register(name, func)
+            return func
+        return decorate
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_size)
+        if self.store:
+            resumed = await Database.run(self.store.pending)
+            for job in resumed:
+                self._queue.put_nowait((job.priority, next(self._sequence), job))
+            if resumed:
+                print(f"♻️ [JOBS] Resumed {len(resumed)} pending jobs")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = None):
+        """Drains queued jobs (bounded by JOB_DRAIN_TIMEOUT), then stops the workers."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout or settings.JOB_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            left = "kept in the job store" if self.store else "dropped"
+            print(f"⚠️ [JOBS] Shutdown drain timed out; {self._queue.qsize()} jobs {left}")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, name: str, payload: Dict[str, Any], priority: int = PRIORITY_NORMAL,
+                     max_attempts: int = None) -> str:
+        """Schedules a job and returns its id; waits only if the queue is full (backpressure)."""
+        if name not in self._handlers:
+            raise ValueError(f"No handler registered for job '{name}'")
+        job = Job(name, payload, priority, max_attempts or self.max_attempts)
+        self.stats["submitted"] += 1
+        if not self._tasks:
+            self.stats["inline"] += 1
+            await self._handlers[name](payload)
+            return job.id
+        if self.store:
+            await Database.run(self.store.save, job)
+        await self._queue.put((priority, next(self._sequence), job))
+        return job.id
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: Job):
+        job.attempts += 1
+        try:
+            await self._handlers[job.name](job.payload)
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            if job.attempts >= job.max_attempts:
+                self.stats["dead"] += 1
+                self.dead_letters.append(job)
+                print(f"☠️ [JOBS] {job.name} dead-lettered after {job.attempts} attempts: {job.error}")
+                if self.store:
+                    await self._store_call(self.store.dead, job)
+                return
+            self.stats["retried"] += 1
+            if self.store:
+                await self._store_call(self.store.save, job)
+            delay = self.retry_backoff * (2 ** (job.attempts - 1))
+            asyncio.get_running_loop().call_later(delay, self._requeue, job)
+            return
+        self.stats["completed"] += 1
+        if self.store:
+            await self._store_call(self.store.complete, job)
+
+    def _requeue(self, job: Job):
+        if not self._tasks:
+            return  # stopped while waiting; a durable store still holds the job
+        try:
+            self._queue.put_nowait((job.priority, next(self._sequence), job))
+        except asyncio.QueueFull:
+            # Retries must not block the loop; push the retry out a little further
+            asyncio.get_running_loop().call_later(self.retry_backoff, self._requeue, job)
+
+    @staticmethod
+    async def _store_call(func, job: Job):
+        try:
+            await Database.run(func, job)
+        except Exception as e:
+            print(f"⚠️ [JOBS] Job store update failed for {job.name}: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "workers": len(self._tasks),
+            "dead_letters": [job.to_dict() for job in self.dead_letters],
+        }
+
+
+job_queue = JobQueue(store=MongoJobStore() if settings.JOB_STORE == "mongo" else None)
@@ -0,0 +1,49 @@
+"""
+Post-commit side effects, run by the job queue off the request path.
+Each handler takes the JSON/BSON-serializable payload it was submitted with.
+"""
+from typing import Any, Dict
+from repositories.aggregate_repository import AsyncAggregateRepository
+from repositories.audit_repository import AsyncAuditRepository
+from services.response_cache import response_cache
+from services.job_queue import job_queue, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from services.websocket_manager import manager
+
+BROADCAST = "dashboard.broadcast"
+AGGREGATES = "aggregates.apply"
+AUDIT = "audit.record"
+
+
+@job_queue.handler(BROADCAST)
+async def broadcast(payload: Dict[str, Any]):
+    await manager.send_personal_message(payload["message"], payload["user_id"])
+
+
+@job_queue.handler(AGGREGATES)
+async def apply_aggregates(payload: Dict[str, Any]):
+    await AsyncAggregateRepository().apply(payload["transactions"])
+    # Answers cached between the commit and this job quoted the old totals
+    for user_id in {tx["user_id"] for tx in payload["transactions"]}:
+        response_cache.invalidate(user_id)
+
+
+@job_queue.handler(AUDIT)
+async def record_audit(payload: Dict[str, Any]):
+    await AsyncAuditRepository().record(
+        payload["user_id"], payload["event"], payload["details"], event_id=payload.get("event_id")
+    )
+
+
+async def after_commit(user_id: str, event: str, transaction: Dict[str, Any], message: Dict[str, Any] = None,
+                       update_aggregates: bool = True, event_id: str = None):
+    """Schedules the standard follow-ups of a committed balance change."""
+    if message:
+        await job_queue.submit(BROADCAST, {"user_id": user_id, "message": message}, priority=PRIORITY_HIGH)
+    if update_aggregates:
+        # Not idempotent ($inc), so a single attempt: a failure is dead-lettered, fixable by rebuild()
+        await job_queue.submit(AGGREGATES, {"transactions": [transaction]}, priority=PRIORITY_NORMAL, max_attempts=1)
+    await job_queue.submit(
+        AUDIT,
+        {"user_id": user_id, "event": event, "details": transaction, "event_id": event_id},
+        priority=PRIORITY_LOW
+    )
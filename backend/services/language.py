@@ -0,0 +1,25 @@
+import re
+
+# Frequent function words that rarely appear in the other language
+FRENCH_WORDS = {
+    "je", "tu", "il", "nous", "vous", "mon", "ma", "mes", "le", "la", "les", "un", "une", "des", "du",
+    "est", "et", "ou", "pour", "avec", "sur", "dans", "quel", "quelle", "quels", "quelles", "combien",
+    "payer", "paye", "solde", "compte", "carte", "facture", "virement", "oui", "non", "annuler",
+    "ai", "j'ai", "c'est", "qu'est-ce", "mois", "dernier", "dépensé", "depense", "épargne",
+}
+ENGLISH_WORDS = {
+    "i", "you", "my", "the", "a", "an", "is", "are", "and", "or", "for", "with", "on", "in", "what",
+    "how", "much", "many", "pay", "balance", "account", "card", "bill", "transfer", "yes", "no",
+    "cancel", "did", "do", "spend", "spent", "month", "last", "when", "due",
+}
+WORD = re.compile(r"[a-zàâçéèêëîïôûùüÿœ'-]+")
+
+
+def detect_language(text: str) -> str:
+    """Returns "fr" or "en" (the two languages the assistant speaks); ties go to English."""
+    words = WORD.findall(text.casefold())
+    french = sum(word in FRENCH_WORDS for word in words)
+    english = sum(word in ENGLISH_WORDS for word in words)
+    if re.search(r"[àâçéèêëîïôûùüÿœ]", text.casefold()):
+        french += 1
+    return "fr" if french > english else "en"
@@ -0,0 +1,130 @@
+import re
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from models.transaction import TransactionFilters
+
+# Keyword (English / French) -> stored transaction categories. Only generic category
+# words: a merchant name (e.g. "uber", "hydro") also matches rows outside its usual category.
+CATEGORY_KEYWORDS = {
+    "groceries": ["Groceries"], "grocery": ["Groceries"], "supermarket": ["Groceries"],
+    "épicerie": ["Groceries"], "epicerie": ["Groceries"], "épiceries": ["Groceries"],
+    "food": ["Groceries", "Dining"], "nourriture": ["Groceries", "Dining"],
+    "dining": ["Dining"], "restaurant": ["Dining"], "restaurants": ["Dining"], "coffee": ["Dining"], "café": ["Dining"],
+    "transport": ["Transport"], "transit": ["Transport"], "gas": ["Transport"], "essence": ["Transport"],
+    "subscription": ["Subscription"], "subscriptions": ["Subscription"], "abonnement": ["Subscription"], "abonnements": ["Subscription"],
+    "utilities": ["Utilities"], "utility": ["Utilities"], "électricité": ["Utilities"],
+    "rent": ["Rent"], "loyer": ["Rent"],
+    "shopping": ["Shopping"], "achats": ["Shopping"], "magasinage": ["Shopping"],
+    "health": ["Health"], "pharmacy": ["Health"], "santé": ["Health"], "sante": ["Health"], "pharmacie": ["Health"],
+    "entertainment": ["Entertainment"], "movies": ["Entertainment"], "divertissement": ["Entertainment"], "cinéma": ["Entertainment"],
+    "electronics": ["Electronics"], "électronique": ["Electronics"],
+    "income": ["Income"], "salary": ["Income"], "paycheck": ["Income"], "salaire": ["Income"], "revenu": ["Income"], "revenus": ["Income"],
+    "suspicious": ["Suspicious"], "fraud": ["Suspicious"], "fraude": ["Suspicious"], "suspect": ["Suspicious"],
+}
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6, "july": 7,
+    "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "janvier": 1, "février": 2, "fevrier": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6, "juillet": 7,
+    "août": 8, "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11, "décembre": 12, "decembre": 12,
+}
+
+# 1,500 / 1,500.00 (thousands separators) or 12.50 / 12,50 (decimal point or comma)
+_NUMBER = r"(?:\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:[.,]\d{1,2})?)"
+_AMOUNT = rf"\$?\s*({_NUMBER})\s*(?:\$|dollars?)?"
+THOUSANDS = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?")
+BETWEEN = re.compile(rf"\b(?:between|entre)\s+{_AMOUNT}\s+(?:and|et)\s+{_AMOUNT}")
+MINIMUM = re.compile(rf"\b(?:over|above|more than|greater than|at least|plus de|au-dessus de|supérieur à|superieur a|au moins)\s+{_AMOUNT}")
+MAXIMUM = re.compile(rf"\b(?:under|below|less than|at most|moins de|en dessous de|au-dessous de|inférieur à|inferieur a|au plus)\s+{_AMOUNT}")
+LAST_DAYS = re.compile(r"\b(?:last|past)\s+(\d+)\s+days?\b|\b(?:les|des)\s+(\d+)\s+derniers\s+jours\b")
+MONTH_NAME = re.compile(r"\b(" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\b(?:\s+(\d{4}))?")
+WORD = re.compile(r"[\wÀ-ÿ'-]+")
+
+
+def _month_start(year: int, month: int) -> datetime:
+    return datetime(year, month, 1)
+
+
+def _next_month(start: datetime) -> datetime:
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def _amount(value: str) -> float:
+    if THOUSANDS.fullmatch(value):
+        return float(value.replace(",", ""))
+    return float(value.replace(",", "."))
+
+
+def parse_date_range(text: str, now: datetime) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Returns [date_from, date_to) for the first relative or named period found, else (None, None)."""
+    today = datetime(now.year, now.month, now.day)
+    this_month = _month_start(now.year, now.month)
+
+    if re.search(r"\btoday\b|\baujourd'hui\b", text):
+        return today, today + timedelta(days=1)
+    if re.search(r"\byesterday\b|\bhier\b", text):
+        return today - timedelta(days=1), today
+    match = LAST_DAYS.search(text)
+    if match:
+        days = int(match.group(1) or match.group(2))
+        return today - timedelta(days=days), today + timedelta(days=1)
+    week_start = today - timedelta(days=today.weekday())
+    if re.search(r"\blast week\b|\bla semaine (?:dernière|derniere|passée|passee)\b", text):
+        return week_start - timedelta(days=7), week_start
+    if re.search(r"\bthis week\b|\bcette semaine\b", text):
+        return week_start, week_start + timedelta(days=7)
+    if re.search(r"\blast month\b|\ble mois (?:dernier|passé|passe)\b", text):
+        previous = (this_month - timedelta(days=1)).replace(day=1)
+        return previous, this_month
+    if re.search(r"\bthis month\b|\bce mois(?:-ci)?\b", text):
+        return this_month, _next_month(this_month)
+    if re.search(r"\blast year\b|\bl'année (?:dernière|passée)\b|\bl'annee (?:derniere|passee)\b", text):
+        return datetime(now.year - 1, 1, 1), datetime(now.year, 1, 1)
+    if re.search(r"\bthis year\b|\bcette année\b|\bcette annee\b", text):
+        return datetime(now.year, 1, 1), datetime(now.year + 1, 1, 1)
+
+    match = MONTH_NAME.search(text)
+    # "may" is also an English modal verb; only treat it as a month with a year or "in"
+    if match and (match.group(1) != "may" or match.group(2) or re.search(r"\b(?:in|en)\s+may\b", text)):
+        month = MONTHS[match.group(1)]
+        year = int(match.group(2)) if match.group(2) else (now.year if month <= now.month else now.year - 1)
+        start = _month_start(year, month)
+        return start, _next_month(start)
+    return None, None
+
+
+def parse_filters(text: str, now: datetime = None) -> TransactionFilters:
+    """
+    Extracts date range, amount bounds and categories from a natural-language
+    query (English or French), e.g. "groceries over $100 last month".
+    Anything not recognized is left unset so the search is not narrowed by mistake.
+    """
+    text = text.casefold()
+    date_from, date_to = parse_date_range(text, now or datetime.now())
+
+    min_amount = max_amount = None
+    match = BETWEEN.search(text)
+    if match:
+        low, high = sorted((_amount(match.group(1)), _amount(match.group(2))))
+        min_amount, max_amount = low, high
+    else:
+        match = MINIMUM.search(text)
+        if match:
+            min_amount = _amount(match.group(1))
+        match = MAXIMUM.search(text)
+        if match:
+            max_amount = _amount(match.group(1))
+
+    categories = []
+    for word in WORD.findall(text):
+        for category in CATEGORY_KEYWORDS.get(word, []):
+            if category not in categories:
+                categories.append(category)
+
+    return TransactionFilters(
+        date_from=date_from,
+        date_to=date_to,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        categories=categories or None
+    )
@@ -0,0 +1,105 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from config.settings import settings
+
+
+class _CachedAnswer:
+    __slots__ = ("vector", "language", "version", "answer", "created")
+
+    def __init__(self, vector: np.ndarray, language: str, version: int, answer: str):
+        self.vector = vector
+        self.language = language
+        self.version = version
+        self.answer = answer
+        self.created = time.monotonic()
+
+
+class SemanticResponseCache:
+    """
+    Per-user cache of assistant answers keyed by question embedding.
+
+    A lookup hits when a cached question in the same language is at least
+    `threshold` cosine-similar and was answered against the user's current
+    data version. Writes call invalidate(user_id), which bumps the version
+    and drops every answer for that user. `on_invalidate` (set by
+    services.invalidation) forwards invalidations to the other workers.
+    """
+
+    def __init__(self, threshold: float = None, max_per_user: int = None, ttl: float = None):
+        self.threshold = settings.RESPONSE_CACHE_THRESHOLD if threshold is None else threshold
+        self.max_per_user = settings.RESPONSE_CACHE_SIZE if max_per_user is None else max_per_user
+        self.ttl = settings.RESPONSE_CACHE_TTL if ttl is None else ttl
+        self._entries: Dict[str, List[_CachedAnswer]] = {}
+        self._versions: Dict[str, int] = {}
+        self._epoch = 0  # bumped by invalidate() without a user, so every version moves
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.on_invalidate: Optional[Callable[[Optional[str]], None]] = None
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _version(self, user_id: str) -> int:
+        return self._epoch + self._versions.get(user_id, 0)
+
+    def lookup(self, user_id: str, vector: List[float], language: str) -> Tuple[Optional[str], int]:
+        """Returns (answer or None, current data version); pass the version back to store()."""
+        query = self._unit(vector)
+        now = time.monotonic()
+        with self._lock:
+            version = self._version(user_id)
+            entries = [e for e in self._entries.get(user_id, []) if now - e.created < self.ttl]
+            self._entries[user_id] = entries
+            best, best_score = None, self.threshold
+            for entry in entries:
+                if entry.language != language or entry.version != version:
+                    continue
+                score = float(entry.vector @ query)
+                if score >= best_score:
+                    best, best_score = entry, score
+            if best is None:
+                self.misses += 1
+                return None, version
+            self.hits += 1
+            return best.answer, version
+
+    def store(self, user_id: str, vector: List[float], language: str, version: int, answer: str):
+        """Caches an answer computed against `version`; dropped if the data changed meanwhile."""
+        with self._lock:
+            if self._version(user_id) != version:
+                return
+            entries = self._entries.setdefault(user_id, [])
+            entries.append(_CachedAnswer(self._unit(vector), language, version, answer))
+            del entries[:-self.max_per_user]
+
+    def invalidate(self, user_id: str = None, propagate: bool = True):
+        """Bumps the data version of one user (or all users) and forgets their answers."""
+        with self._lock:
+            if user_id is None:
+                self._epoch += 1
+                self._entries = {}
+            else:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+                self._entries.pop(user_id, None)
+        if propagate and self.on_invalidate:
+            self.on_invalidate(user_id)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._entries),
+                "entries": sum(len(entries) for entries in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+response_cache = SemanticResponseCache()
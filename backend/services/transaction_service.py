@@ -1,79 +1,209 @@
-from typing import List, Dict, Any
-from repositories.transaction_repository import TransactionRepository
-from repositories.user_repository import UserRepository
+import asyncio
+import base64
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterable, Optional
+from bson import ObjectId
+from config.database import Database
+from config.settings import settings
+from repositories.transaction_repository import TransactionRepository, AsyncTransactionRepository, fingerprint
+from repositories.user_repository import UserRepository, AsyncUserRepository
+from repositories.aggregate_repository import AggregateRepository, AsyncAggregateRepository, NON_SPENDING_CATEGORIES
 from services.embedding_service import EmbeddingService
+from services.embedding_pipeline import EmbeddingPipeline, batched
+from services.seed_checkpoint import SeedCheckpoint
+from services.query_parser import parse_filters
+from services.response_cache import response_cache
+from services.jobs import after_commit, BROADCAST
+from services.job_queue import job_queue, PRIORITY_HIGH
+from services.vector_store_writer import vector_store_writer, new_idempotency_key
+from pydantic import ValidationError
+from models.transaction import TransactionCreate
+from models.transaction import TransactionFilters
 from data.mock_data import MOCK_TRANSACTIONS, MOCK_USERS
 
+# replace: clear and reload everything; sync: upsert changed rows only
+SEED_MODES = ("replace", "sync")
+
+
 class TransactionService:
     def __init__(self):
         self.repository = TransactionRepository()
         self.user_repository = UserRepository()
+        self.async_repository = AsyncTransactionRepository(self.repository)
+        self.async_user_repository = AsyncUserRepository(self.user_repository)
+        self.aggregate_repository = AggregateRepository()
+        self.async_aggregate_repository = AsyncAggregateRepository(self.aggregate_repository)
         self.embedding_service = EmbeddingService()
 
-    def seed_database(self):
-        """Seeds the database with mock data and embeddings."""
-        print("🚀 Starting database seeding...")
-        
+    def seed_database(
+        self,
+        batch_size: int = None,
+        concurrency: int = None,
+        users: Iterable[Dict[str, Any]] = None,
+        transactions: Iterable[Dict[str, Any]] = None,
+        checkpoint: SeedCheckpoint = None,
+        embedding_backend=None,
+        on_progress: Callable[[Dict[str, Any]], None] = None,
+        mode: str = "replace",
+    ):
+        """
+        Seeds users and embedded transactions, by default from the mock data.
+
+        `users` and `transactions` can be any iterables (e.g. the lazy readers in
+        data/fixtures.py); both are consumed chunk by chunk, so memory stays flat
+        for large fixtures. A checkpoint that already has progress resumes the run
+        instead of clearing the collections.
+
+        mode="replace" clears both collections and embeds everything. mode="sync"
+        upserts users by user_id and transactions by record_key (see fingerprint),
+        skips unchanged rows and re-embeds only rows whose description changed.
+        Stored rows without a record_key are fingerprinted first so they match.
+        Rows missing from the source are left in place.
+        """
+        if mode not in SEED_MODES:
+            raise ValueError(f"Unknown seed mode '{mode}'. Expected one of: {', '.join(SEED_MODES)}")
+        users = MOCK_USERS if users is None else users
+        transactions = MOCK_TRANSACTIONS if transactions is None else transactions
+        checkpoint = checkpoint or SeedCheckpoint()
+        batch_size = max(1, batch_size or settings.SEED_BATCH_SIZE)
+        sync = mode == "sync"
+        print(f"🚀 Starting database seeding ({mode})...")
+
+        if checkpoint.resuming:
+            print(f"♻️ Resuming after {checkpoint.users_done} users and {checkpoint.transactions_done} transactions")
+        elif not sync:
+            self.user_repository.clear_collection()
+            self.repository.clear_collection()
+
         # Seed Users
-        self.user_repository.create_many(MOCK_USERS)
-        print(f" Seeding {len(MOCK_USERS)} users...")
+        user_counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        for chunk in batched(islice(users, checkpoint.users_done, None), batch_size):
+            if sync:
+                for key, value in self.user_repository.sync_many(chunk).items():
+                    user_counts[key] += value
+            else:
+                user_counts["inserted"] += self.user_repository.insert_many(chunk)
+            checkpoint.mark_users(len(chunk))
+        print(f" Seeded {checkpoint.users_done} users: {user_counts}")
 
-        self.repository.clear_collection()
-        
-        transactions_to_insert = []
-        for tx in MOCK_TRANSACTIONS:
-            try:
-                # Generate embedding
-                vector_embedding = self.embedding_service.embed_query(tx["description"])
-                
-                # Create document with embedding
-                doc = tx.copy()
-                doc["embedding"] = vector_embedding
-                transactions_to_insert.append(doc)
-            except Exception as e:
-                print(f"⚠️ Failed to generate embedding for {tx['merchant']}: {e}")
-        
-        if transactions_to_insert:
-            result = self.repository.create_many(transactions_to_insert)
+        if sync:
+            # Rows seeded before fingerprints existed would otherwise all be inserted again
+            backfill = self.repository.backfill_fingerprints(batch_size)
+            if backfill["backfilled"] or backfill["duplicates"]:
+                print(f"🔑 Fingerprinted legacy transactions: {backfill}")
+
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "embedded": 0}
+
+        def store(documents: List[Dict[str, Any]]):
+            sequence = [doc.pop("_seq") for doc in documents]
+            counts["embedded"] += len(documents)
+            if sync:
+                for key, value in self.repository.sync_many(documents).items():
+                    counts[key] += value
+            else:
+                # Rows stored before an interruption are skipped by record_key
+                counts["inserted"] += len(self.repository.insert_unordered(documents))
+            checkpoint.mark_transactions(sequence)
+
+        def to_embed(rows: Iterable[Dict[str, Any]]):
+            """Sync mode: settles unchanged and text-unchanged rows here; only the rest reach the embedder."""
+            for chunk in batched(rows, batch_size):
+                stored = self.repository.seed_state([tx["record_key"] for tx in chunk])
+                settled, metadata_only = [], []
+                for tx in chunk:
+                    current = stored.get(tx["record_key"])
+                    if current and current.get("content_hash") == tx["content_hash"]:
+                        counts["unchanged"] += 1
+                        settled.append(tx["_seq"])
+                    elif current and current.get("text_hash") == tx["text_hash"]:
+                        metadata_only.append(tx)
+                    else:
+                        yield tx
+                if metadata_only:
+                    settled += [tx.pop("_seq") for tx in metadata_only]
+                    counts["updated"] += self.repository.sync_many(metadata_only)["updated"]
+                checkpoint.mark_transactions(settled)
+
+        skip = checkpoint.transactions_done
+        pending = (
+            {**tx, **fingerprint(tx), "_seq": seq}
+            for seq, tx in enumerate(islice(transactions, skip, None), start=skip)
+        )
+        if sync:
+            pending = to_embed(pending)
+
+        # Embed descriptions in concurrent batches and stream each batch into Mongo
+        pipeline = EmbeddingPipeline(
+            embedding_backend or self.embedding_service, batch_size=batch_size, concurrency=concurrency
+        )
+        stats = pipeline.run(pending, store, on_progress)
+        stats["resumed_from"] = skip
+        stats["users"] = user_counts
+        stats["transactions"] = counts
+        print(f"📈 Embedded {stats['rows']} transactions at {stats['rows_per_second']} rows/s: {counts}")
+
+        if stats["failed_rows"]:
+            checkpoint.save(force=True)
+            print(f"⚠️ {stats['failed_rows']} transactions failed; rerun with the same checkpoint to retry them")
+        else:
+            checkpoint.complete()
+
+        if sync and (counts["updated"] or counts["inserted"]):
+            # sync_many doesn't patch local indexes; they (and other workers') reload on the next search
+            self.repository.vector_index.reset()
+        # Spending totals are rebuilt server-side from whatever was inserted
+        self.aggregate_repository.rebuild()
+        response_cache.invalidate()
+
+        if sync:
             return {
-                "message": f"Successfully inserted {len(MOCK_USERS)} users and {len(result.inserted_ids)} transactions."
+                "message": (
+                    f"Synced users ({user_counts['inserted']} inserted, {user_counts['updated']} updated, "
+                    f"{user_counts['unchanged']} unchanged) and transactions ({counts['inserted']} inserted, "
+                    f"{counts['updated']} updated, {counts['unchanged']} unchanged, {counts['embedded']} embedded)."
+                ),
+                "stats": stats
             }
-        return {"message": "Users inserted, but no transactions inserted."}
+        if stats["rows"]:
+            return {
+                "message": f"Successfully inserted {checkpoint.users_done} users and {stats['rows']} transactions.",
+                "stats": stats
+            }
+        return {"message": "Users inserted, but no transactions inserted.", "stats": stats}
 
 
     async def add_transaction(self, transaction: Dict[str, Any], user_id: str):
-        """Adds a new transaction and notifies the user via WebSocket."""
-        # 1. Generate Embedding
-        try:
-            vector_embedding = self.embedding_service.embed_query(transaction["description"])
-            transaction["embedding"] = vector_embedding
-        except Exception as e:
-            print(f"⚠️ Failed to generate embedding: {e}")
-            transaction["embedding"] = []
-
-        # 2. Insert into DB
+        """
+        Records a new transaction. The balance change and the transaction row are
+        written before returning; embedding the row, the dashboard broadcast, the
+        spending aggregates and the audit entry are handed to background workers.
+        """
         transaction["user_id"] = user_id
-        result = self.repository.create_many([transaction]) # reusing create_many for single insert for now
-        
-        # 3. Broadcast Update AND Persist to DB
-        from services.websocket_manager import manager
-        
-        # Fetch updated user profile (e.g. balance)
-        user = self.user_repository.get_user(user_id)
-        if user:
-            # Simple logic: deduct amount from first account found (usually Chequing)
-            # In a real app, you'd specify which account ID to deduct from
-            account = user.get("accounts", [{}])[0]
-            account_type = account.get("type", "chequing")
-            current_balance = account.get("balance", 0)
-            
-            new_balance = current_balance - transaction.get("amount", 0)
-            
-            # --- CRITICAL FIX: Persist new balance to Database ---
-            # This ensures that when the Avatar retrieves the user profile ("Where vector search is going on"),
-            # it sees the UPDATED balance, not the stale one.
-            self.user_repository.update_account_balance(user_id, account_type, new_balance)
-            
+
+        # 1. Critical path: deduct from the first account (usually Chequing) with a single atomic $inc
+        # In a real app, you'd specify which account ID to deduct from
+        # --- CRITICAL FIX: Persist new balance to Database ---
+        # This ensures that when the Avatar retrieves the user profile ("Where vector search is going on"),
+        # it sees the UPDATED balance, not the stale one.
+        account = await self.async_user_repository.increment_primary_balance(user_id, -transaction.get("amount", 0))
+        response_cache.invalidate(user_id)
+
+        # 2. Store the row next to the debit; only its embedding is computed in the background
+        transaction["idempotency_key"] = new_idempotency_key()
+        await self.async_repository.insert_pending(transaction)
+        key = await self.embedding_service.add_to_vector_store(transaction)
+
+        # 3. Broadcast, aggregates and audit off the request path
+        update_payload = None
+        new_balance = None
+        if account:
+            new_balance = round(account["balance"], 2)
             update_payload = {
                 "type": "balance_update",
                 "new_balance": new_balance,
@@ -82,12 +212,330 @@ class TransactionService:
                     "amount": transaction["amount"]
                 }
             }
-            print(f"📡 Broadcasting update to {user_id}: {update_payload}")
-            await manager.send_personal_message(update_payload, user_id)
-            
-        return result
-
-    def search_transactions(self, query: str, user_id: str = None) -> List[Dict[str, Any]]:
-        """Semantic search for transactions."""
-        query_embedding = self.embedding_service.embed_query(query)
-        return self.repository.vector_search(query_embedding, user_id=user_id)
+            print(f"📡 Scheduling update for {user_id}: {update_payload}")
+        await after_commit(user_id, "transaction.created", transaction, update_payload, event_id=key)
+
+        return {"status": "accepted", "idempotency_key": key, "new_balance": new_balance}
+
+    async def ingest_stream(self, stream: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Bulk ingestion of an NDJSON feed (one TransactionCreate object per line).
+        Rows are validated as they arrive and processed in INGEST_CHUNK_SIZE chunks, so
+        memory stays bounded however long the stream is. Rows whose external_id was
+        already ingested are skipped before they are embedded; rows without one are
+        always inserted. Rows whose embedding fails are stored `embedding_pending` and
+        retried by the vector writer.
+        """
+        stats = {"rows": 0, "inserted": 0, "duplicates": 0, "invalid": 0, "chunks": 0, "errors": []}
+        started = time.perf_counter()
+        chunk: List[Dict[str, Any]] = []
+        async for line_number, line in self._ndjson_lines(stream):
+            stats["rows"] += 1
+            try:
+                chunk.append(TransactionCreate(**json.loads(line)).model_dump())
+            except (ValueError, TypeError, ValidationError) as e:
+                stats["invalid"] += 1
+                if len(stats["errors"]) < settings.INGEST_MAX_ERRORS:
+                    stats["errors"].append({"line": line_number, "error": str(e).splitlines()[0]})
+                continue
+            if len(chunk) >= settings.INGEST_CHUNK_SIZE:
+                await self._ingest_chunk(chunk, stats)
+                chunk = []
+        if chunk:
+            await self._ingest_chunk(chunk, stats)
+
+        elapsed = time.perf_counter() - started
+        stats["elapsed_seconds"] = round(elapsed, 2)
+        stats["rows_per_second"] = round(stats["rows"] / elapsed, 1) if elapsed > 0 else 0.0
+        print(f"📥 Ingested {stats['inserted']}/{stats['rows']} rows in {stats['chunks']} chunks at {stats['rows_per_second']} rows/s")
+        return stats
+
+    @staticmethod
+    async def _ndjson_lines(stream: AsyncIterator[bytes]):
+        """Re-splits arbitrary network chunks into (line number, non-empty line)."""
+        buffer = b""
+        line_number = 0
+        async for data in stream:
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                if line.strip():
+                    yield line_number, line
+        if buffer.strip():
+            yield line_number + 1, buffer
+
+    async def _ingest_chunk(self, rows: List[Dict[str, Any]], stats: Dict[str, Any]):
+        stats["chunks"] += 1
+        for row in rows:
+            # Identical rows can be real (two same-day coffees), so only a feed id dedupes
+            external_id = row.pop("external_id", None)
+            if external_id:
+                row["external_id"] = external_id
+                row["idempotency_key"] = f"feed:{external_id}"
+            else:
+                row["idempotency_key"] = new_idempotency_key()
+
+        # 1. Drop replayed feed rows before paying for their embeddings
+        received = len(rows)
+        feed_keys = [row["idempotency_key"] for row in rows if row.get("external_id")]
+        seen = await self.async_repository.existing_idempotency_keys(feed_keys) if feed_keys else set()
+        fresh = []
+        for row in rows:
+            if row["idempotency_key"] not in seen:
+                seen.add(row["idempotency_key"])  # also a repeat within this chunk
+                fresh.append(row)
+        rows = fresh
+        await self._embed_rows(rows)
+
+        # 2. Unordered insert: one bad or duplicate row (e.g. a concurrent replay) doesn't stop the rest
+        written = await self.async_repository.insert_unordered(rows) if rows else []
+        inserted = [rows[i] for i in written]
+        stats["inserted"] += len(inserted)
+        stats["duplicates"] += received - len(inserted)
+        if not inserted:
+            return
+        # Rows whose embedding failed are stored pending; the vector writer retries them
+        for tx in inserted:
+            if tx.get("embedding_pending"):
+                await vector_store_writer.add(tx)
+
+        # 3. One balance update per user for the whole chunk, then aggregates in one bulk write
+        deltas: Dict[str, float] = defaultdict(float)
+        latest: Dict[str, Dict[str, Any]] = {}
+        for tx in inserted:
+            deltas[tx["user_id"]] -= tx["amount"]
+            latest[tx["user_id"]] = tx
+        accounts = await self.async_user_repository.increment_primary_balances(
+            {user_id: round(delta, 2) for user_id, delta in deltas.items()}
+        )
+        await self.async_aggregate_repository.apply(inserted)
+
+        # 4. One coalesced dashboard update per user per chunk
+        for user_id, account in accounts.items():
+            response_cache.invalidate(user_id)
+            await job_queue.submit(BROADCAST, {"user_id": user_id, "message": {
+                "type": "balance_update",
+                "new_balance": round(account["balance"], 2),
+                "latest_transaction": {"merchant": latest[user_id]["merchant"], "amount": latest[user_id]["amount"]},
+                "ingested": sum(1 for tx in inserted if tx["user_id"] == user_id)
+            }}, priority=PRIORITY_HIGH)
+
+    async def _embed_rows(self, rows: List[Dict[str, Any]]):
+        """Embeds descriptions in INGEST_EMBED_BATCH_SIZE batches, INGEST_EMBED_CONCURRENCY at a time."""
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max(1, settings.INGEST_EMBED_CONCURRENCY))
+
+        async def embed(batch: List[Dict[str, Any]]):
+            async with semaphore:
+                try:
+                    vectors = await loop.run_in_executor(
+                        None, self.embedding_service.embed_documents, [row["description"] for row in batch]
+                    )
+                except Exception as e:
+                    # Like single inserts: stored as embedding_pending for the vector writer to retry
+                    print(f"⚠️ Failed to embed {len(batch)} ingested rows; queued for retry: {e}")
+                    for row in batch:
+                        row["embedding_pending"] = True
+                    return
+            for row, vector in zip(batch, vectors):
+                row["embedding"] = vector
+
+        size = max(1, settings.INGEST_EMBED_BATCH_SIZE)
+        await asyncio.gather(*(embed(rows[i:i + size]) for i in range(0, len(rows), size)))
+
+    async def get_spending_summary(self, user_id: str, months: int = 3) -> Dict[str, Any]:
+        """
+        Spending totals from the precomputed aggregates (no scan, no embedding):
+        the latest `months` months by category, plus all-time categories and top merchants.
+        """
+        rows = await self.async_aggregate_repository.get_summary(user_id)
+        periods: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            period = periods.setdefault(row["period"], {"total": 0.0, "category": {}, "merchant": {}})
+            period[row["dimension"]][row["key"]] = {"total": round(row["total"], 2), "count": row["count"]}
+            if row["dimension"] == "category" and row["key"] not in NON_SPENDING_CATEGORIES:
+                period["total"] = round(period["total"] + row["total"], 2)
+
+        def ranked(values: Dict[str, Dict[str, Any]], top: int = None):
+            items = sorted(values.items(), key=lambda item: -item[1]["total"])
+            return dict(items[:top] if top else items)
+
+        recent = sorted((p for p in periods if p != "all"), reverse=True)[:months]
+        all_time = periods.get("all", {"total": 0.0, "category": {}, "merchant": {}})
+        return {
+            "months": {
+                p: {"total": periods[p]["total"], "categories": ranked(periods[p]["category"])}
+                for p in recent
+            },
+            "all_time": {
+                "total": all_time["total"],
+                "categories": ranked(all_time["category"]),
+                "top_merchants": ranked(all_time["merchant"], top=5)
+            }
+        }
+
+    @staticmethod
+    def encode_cursor(transaction: Dict[str, Any]) -> str:
+        """Opaque page cursor holding the (date, _id) of the last row served."""
+        date = transaction["date"]
+        payload = {
+            "d": date.isoformat() if isinstance(date, datetime) else date,
+            "t": isinstance(date, datetime),
+            "i": str(transaction["_id"])
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            date = datetime.fromisoformat(payload["d"]) if payload["t"] else payload["d"]
+            return date, ObjectId(payload["i"])
+        except Exception as e:
+            raise ValueError("Invalid pagination cursor") from e
+
+    async def list_transactions(self, user_id: str, limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """One page of history plus the cursor for the next page (None on the last page)."""
+        limit = max(1, min(limit, settings.HISTORY_PAGE_MAX))
+        after = self.decode_cursor(cursor) if cursor else None
+        # Fetch one extra row to know whether another page exists
+        rows = await self.async_repository.list_transactions(user_id, limit=limit + 1, after=after)
+        page = rows[:limit]
+        next_cursor = self.encode_cursor(page[-1]) if len(rows) > limit else None
+        for row in page:
+            row.pop("_id", None)
+        return {"transactions": page, "next_cursor": next_cursor}
+
+    async def export_transactions(self, user_id: str, fmt: str = "ndjson") -> AsyncIterator[str]:
+        """
+        Yields the user's full history as NDJSON or CSV text, one cursor batch at a time,
+        so memory stays flat regardless of history length.
+        """
+        batch_size = settings.EXPORT_BATCH_SIZE
+        rows = self.repository.iter_transactions(user_id, batch_size=batch_size)
+        fields = ["date", "merchant", "amount", "category", "description", "user_id"]
+        try:
+            if fmt == "csv":
+                yield ",".join(fields) + "\n"
+            while True:
+                batch = await Database.run(lambda: list(islice(rows, batch_size)))
+                if not batch:
+                    break
+                if fmt == "csv":
+                    buffer = io.StringIO()
+                    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+                    writer.writerows(batch)
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(json.dumps(row, default=str) + "\n" for row in batch)
+        finally:
+            await Database.run(rows.close)
+
+    async def search_transactions(
+        self,
+        query: str,
+        user_id: str = None,
+        limit: int = 5,
+        filters: TransactionFilters = None,
+        num_candidates: int = None,
+        query_embedding: List[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Transaction search according to SEARCH_MODE.
+        Pass `query_embedding` when the caller already embedded the query.
+        Date/amount/category constraints parsed from the query (or passed as `filters`)
+        are pushed down as pre-filters, so only matching transactions are scored.
+        In hybrid mode the $text search and the query embedding start together; a confident
+        keyword hit cancels the embedding call, otherwise both rankings are fused with RRF.
+        A filtered search that matches nothing is re-run unfiltered, since a parsed
+        constraint can be wrong (e.g. a word that names a merchant, not a category).
+        """
+        if filters is None:
+            filters = parse_filters(query)
+        if filters.is_empty():
+            filters = None
+        embedded = {}
+
+        async def embed():
+            if query_embedding is not None:
+                return query_embedding
+            if "vector" not in embedded:
+                embedded["vector"] = await self.embedding_service.aembed_query(query)
+            return embedded["vector"]
+
+        results = await self._search(query, user_id, limit, filters, num_candidates, embed)
+        if results or not filters:
+            return results
+        print("⚠️ Filtered search returned nothing, retrying without filters")
+        return await self._search(query, user_id, limit, None, num_candidates, embed)
+
+    async def _search(
+        self, query: str, user_id: str, limit: int, filters: Optional[TransactionFilters],
+        num_candidates: Optional[int], embed
+    ) -> List[Dict[str, Any]]:
+        mode = settings.SEARCH_MODE.lower()
+        if mode == "lexical":
+            return await self._text_search(query, user_id, limit, filters)
+
+        async def semantic_search(query_embedding):
+            try:
+                return await self.async_repository.vector_search(
+                    query_embedding, user_id=user_id, limit=limit, filters=filters, num_candidates=num_candidates
+                )
+            except Exception as e:
+                if not filters:
+                    raise
+                # e.g. an Atlas index without the filter fields; an unfiltered ranking still answers
+                print(f"⚠️ Filtered vector search failed, retrying without filters: {e}")
+                return await self.async_repository.vector_search(
+                    query_embedding, user_id=user_id, limit=limit, num_candidates=num_candidates
+                )
+
+        if mode != "hybrid":
+            return await semantic_search(await embed())
+
+        embedding_task = asyncio.create_task(embed())
+        try:
+            lexical = await self._text_search(query, user_id, limit, filters)
+            if self._lexical_confident(query, lexical):
+                embedding_task.cancel()
+                return lexical
+            embedding = await embedding_task
+        except BaseException:
+            embedding_task.cancel()
+            raise
+        semantic = await semantic_search(embedding)
+        return self.fuse_rankings([lexical, semantic], limit=limit)
+
+    async def _text_search(
+        self, query: str, user_id: str, limit: int, filters: TransactionFilters = None
+    ) -> List[Dict[str, Any]]:
+        try:
+            return await self.async_repository.text_search(query, user_id=user_id, limit=limit, filters=filters)
+        except Exception as e:
+            # e.g. the text index has not been created yet; vector results still answer the query
+            print(f"⚠️ Text search failed: {e}")
+            return []
+
+    @staticmethod
+    def _lexical_confident(query: str, results: List[Dict[str, Any]]) -> bool:
+        """A short keyword query whose top hit is the merchant it names ("Netflix", "Hydro One")."""
+        terms = query.split()
+        if not results or not terms or len(terms) > settings.SEARCH_LEXICAL_MAX_TERMS:
+            return False
+        normalized = " ".join(query.casefold().split())
+        merchant = " ".join(str(results[0].get("merchant", "")).casefold().split())
+        return bool(merchant) and (merchant in normalized or normalized in merchant)
+
+    @staticmethod
+    def fuse_rankings(rankings: List[List[Dict[str, Any]]], limit: int = 5, k: int = None) -> List[Dict[str, Any]]:
+        """Reciprocal-rank fusion: each list contributes 1 / (k + rank) per document."""
+        k = settings.SEARCH_RRF_K if k is None else k
+        fused: Dict[tuple, Dict[str, Any]] = {}
+        for ranking in rankings:
+            for rank, tx in enumerate(ranking, start=1):
+                key = (tx.get("user_id"), str(tx.get("date")), tx.get("merchant"), tx.get("amount"), tx.get("description"))
+                entry = fused.setdefault(key, {**tx, "score": 0.0})
+                entry["score"] += 1.0 / (k + rank)
+        return sorted(fused.values(), key=lambda tx: -tx["score"])[:limit]
@@ -0,0 +1,197 @@
+import asyncio
+import uuid
+from collections import deque
+from typing import Any, Dict, List
+from config.settings import settings
+
+
+def new_idempotency_key() -> str:
+    """Unique key for one recorded transaction; repeated identical purchases are distinct rows."""
+    return uuid.uuid4().hex
+
+
+class VectorStoreWriter:
+    """
+    Asynchronous embedding pipeline behind EmbeddingService.add_to_vector_store.
+
+    Transactions are stored on the request path (TransactionRepository.insert_pending);
+    only their vectors come from here. Queued records are embedded in micro-batches
+    and attached to the stored rows by idempotency key (which also syncs the local
+    vector index). Rows still flagged `embedding_pending` after a crash or redeploy
+    are queued again by start(). close() flushes whatever is still queued.
+    """
+
+    def __init__(
+        self,
+        repository=None,
+        embedding_service=None,
+        batch_size: int = None,
+        linger: float = None,
+        max_retries: int = None,
+        retry_backoff: float = None,
+    ):
+        self._repository = repository
+        self._embedding_service = embedding_service
+        self.batch_size = max(1, batch_size or settings.VECTOR_WRITE_BATCH_SIZE)
+        self.linger = settings.VECTOR_WRITE_LINGER if linger is None else linger
+        self.max_retries = settings.SEED_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = settings.SEED_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self._pending: "deque[Dict[str, Any]]" = deque()
+        # Events are created in start() so they bind to the server's event loop (Python 3.9)
+        self._wakeup: asyncio.Event = None
+        self._idle: asyncio.Event = None
+        self._task: asyncio.Task = None
+        self._closing = False
+        self.stats = {"queued": 0, "written": 0, "missing": 0, "retries": 0, "dead": 0, "inline": 0}
+        self.dead_letters: "deque[Dict[str, Any]]" = deque(maxlen=settings.JOB_DEAD_LETTER_MAX)
+
+    # Created lazily: both import each other's modules and need a live Database
+    @property
+    def repository(self):
+        if self._repository is None:
+            from repositories.transaction_repository import TransactionRepository
+            self._repository = TransactionRepository()
+        return self._repository
+
+    @property
+    def embedding_service(self):
+        if self._embedding_service is None:
+            from services.embedding_service import EmbeddingService
+            self._embedding_service = EmbeddingService()
+        return self._embedding_service
+
+    async def start(self):
+        if self._task is None:
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._wakeup.set()
+            self._task = asyncio.create_task(self._run())
+            from config.database import Database
+            try:
+                resumed = await Database.run(self.repository.pending_embeddings)
+            except Exception as e:
+                print(f"⚠️ [VECTOR DB] Could not load pending embeddings: {e}")
+                resumed = []
+            queued = {record["idempotency_key"] for record in self._pending}
+            resumed = [record for record in resumed if record["idempotency_key"] not in queued]
+            for record in resumed:
+                self.enqueue(record)
+            if resumed:
+                print(f"♻️ [VECTOR DB] Re-queued {len(resumed)} transactions still waiting for embeddings")
+
+    def enqueue(self, record: Dict[str, Any]) -> str:
+        """Queues a stored transaction record for embedding and returns its idempotency key."""
+        record = dict(record)
+        record.setdefault("idempotency_key", new_idempotency_key())
+        self._pending.append(record)
+        self.stats["queued"] += 1
+        if self._task is not None:
+            self._idle.clear()
+            self._wakeup.set()
+        return record["idempotency_key"]
+
+    async def add(self, record: Dict[str, Any]) -> str:
+        """
+        Queues a record, or embeds and writes it inline before start() (scripts, tests),
+        where nothing would ever drain the queue. Returns its idempotency key.
+        """
+        if self._task is not None:
+            return self.enqueue(record)
+        record = {**record, "idempotency_key": record.get("idempotency_key") or new_idempotency_key()}
+        self.stats["inline"] += 1
+        try:
+            await self._write([record])
+        except Exception as e:
+            # The row is stored and still embedding_pending; the next start() retries it
+            print(f"⚠️ [VECTOR DB] Inline embedding failed for {record['idempotency_key']}: {e}")
+        return record["idempotency_key"]
+
+    async def flush(self, timeout: float = None):
+        """Waits until every queued record has been written."""
+        if self._task is None:
+            return
+        await asyncio.wait_for(self._idle.wait(), timeout)
+
+    async def close(self):
+        """Stops accepting work after draining the queue (bounded by VECTOR_WRITE_FLUSH_TIMEOUT)."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), settings.VECTOR_WRITE_FLUSH_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            print(f"⚠️ [VECTOR DB] Shutdown flush timed out; {len(self._pending)} records not indexed")
+        self._task = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self._pending), "dead_letters": list(self.dead_letters)}
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                self._idle.set()
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # Let a micro-batch build up unless it is already full or we are flushing
+            if len(self._pending) < self.batch_size and not self._closing and self.linger:
+                await asyncio.sleep(self.linger)
+
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            attempt = 0
+            while True:
+                try:
+                    await self._write(batch)
+                    break
+                except Exception as e:
+                    attempt += 1
+                    if attempt > self.max_retries:
+                        # Don't let one bad batch hold up the queue; the rows stay
+                        # embedding_pending and are picked up again on the next start()
+                        self.stats["dead"] += len(batch)
+                        self.dead_letters.append({
+                            "idempotency_keys": [record["idempotency_key"] for record in batch],
+                            "error": f"{type(e).__name__}: {e}",
+                        })
+                        print(f"☠️ [VECTOR DB] Giving up on {len(batch)} records after {attempt} attempts: {e}")
+                        break
+                    self.stats["retries"] += 1
+                    print(f"⚠️ [VECTOR DB] Write of {len(batch)} records failed (attempt {attempt}): {e}")
+                    if not self._closing:
+                        await asyncio.sleep(min(self.retry_backoff * (2 ** (attempt - 1)), 60))
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        loop = asyncio.get_running_loop()
+        texts = [record.get("description", "") for record in batch]
+        # A failure propagates to the retry loop; the rows themselves are already stored
+        vectors = await self._embed(loop, texts)
+        documents = [{**record, "embedding": vector} for record, vector in zip(batch, vectors)]
+        from config.database import Database
+        updated = await Database.run(self.repository.set_embeddings, documents)
+        # Answers cached since the request returned may predate this row
+        from services.response_cache import response_cache
+        for user_id in {record.get("user_id") for record in batch if record.get("user_id")}:
+            response_cache.invalidate(user_id)
+        self.stats["written"] += updated
+        self.stats["missing"] += len(documents) - updated
+        print(f"✅ [VECTOR DB] Indexed {updated} transaction vectors")
+
+    async def _embed(self, loop, texts: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                return await loop.run_in_executor(None, self.embedding_service.embed_documents, texts)
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+                attempt += 1
+
+
+vector_store_writer = VectorStoreWriter()
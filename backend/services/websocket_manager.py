@@ -1,36 +1,135 @@
-from typing import List, Dict
+import asyncio
+from collections import deque
+from typing import Deque, List, Dict
 from fastapi import WebSocket
+from config.settings import settings
+from services.backplane import Backplane, create_backplane
+
+# Snapshot messages: a newer one fully supersedes an older one still waiting in the queue
+COALESCIBLE_TYPES = {"balance_update", "full_state_update"}
+
+class _Connection:
+    """One socket with a bounded outbound queue drained by its own writer task."""
+
+    def __init__(self, websocket: WebSocket, user_id: str, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.manager = manager
+        self.queue: Deque[dict] = deque()
+        self._ready = asyncio.Event()
+        self.writer = asyncio.create_task(self._write())
+
+    def offer(self, message: dict) -> bool:
+        """Queues a message without blocking. Returns False if the consumer is too slow."""
+        stats = self.manager.stats
+        if len(self.queue) >= settings.WS_COALESCE_AFTER and message.get("type") in COALESCIBLE_TYPES:
+            superseded = [queued for queued in self.queue if queued.get("type") == message["type"]]
+            for queued in superseded:
+                self.queue.remove(queued)
+            stats["coalesced"] += len(superseded)
+        if len(self.queue) >= settings.WS_MAX_QUEUE:
+            stats["dropped"] += 1
+            return False
+        self.queue.append(message)
+        self._ready.set()
+        return True
+
+    async def _write(self):
+        try:
+            while True:
+                await self._ready.wait()
+                while self.queue:
+                    message = self.queue.popleft()
+                    await asyncio.wait_for(self.websocket.send_json(message), timeout=settings.WS_SEND_TIMEOUT)
+                    self.manager.stats["sent"] += 1
+                self._ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ [WS] Evicting dead connection for {self.user_id}: {e!r}")
+            await self.manager.evict(self)
+
+    def stop(self):
+        if self.writer is not asyncio.current_task():
+            self.writer.cancel()
 
 class ConnectionManager:
-    def __init__(self):
-        # Maps user_id -> List of WebSockets (in case user has multiple tabs open)
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    def __init__(self, backplane: Backplane = None):
+        # Maps user_id -> List of connections (in case user has multiple tabs open)
+        self.active_connections: Dict[str, List[_Connection]] = {}
+        # Messages go through the backplane so the worker holding the socket delivers them
+        self.backplane = backplane or create_backplane()
+        self._started = False
+        self.stats = {"sent": 0, "dropped": 0, "coalesced": 0, "evicted": 0}
+
+    async def start(self):
+        if not self._started:
+            self._started = True
+            await self.backplane.start(self.deliver_local)
+
+    async def stop(self):
+        if self._started:
+            self._started = False
+            await self.backplane.stop()
 
     async def connect(self, websocket: WebSocket, user_id: str):
         await websocket.accept()
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        self.active_connections[user_id].append(_Connection(websocket, user_id, self))
         print(f"🔌 User {user_id} connected via WebSocket.")
 
+    def _remove(self, connection: _Connection):
+        connections = self.active_connections.get(connection.user_id)
+        if connections and connection in connections:
+            connections.remove(connection)
+            connection.stop()
+            if not connections:
+                del self.active_connections[connection.user_id]
+
     def disconnect(self, websocket: WebSocket, user_id: str):
-        if user_id in self.active_connections:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
+        for connection in list(self.active_connections.get(user_id, [])):
+            if connection.websocket is websocket:
+                self._remove(connection)
         print(f"🔌 User {user_id} disconnected.")
 
+    async def evict(self, connection: _Connection):
+        """Drops a dead or too-slow consumer and closes its socket."""
+        self.stats["evicted"] += 1
+        self._remove(connection)
+        try:
+            # A stalled peer must not hold up the fan-out loop that evicted it
+            await asyncio.wait_for(connection.websocket.close(), timeout=settings.WS_SEND_TIMEOUT)
+        except Exception:
+            pass
+
     async def send_personal_message(self, message: dict, user_id: str):
-        print(f"📡 [WS] Attempting to send message to {user_id}. Active users: {list(self.active_connections.keys())}")
-        if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                    print(f"✅ [WS] Sent to {user_id}")
-                except Exception as e:
-                    print(f"❌ [WS] Failed to send to {user_id}: {e}")
-        else:
-            print(f"⚠️ [WS] User {user_id} not connected. Message dropped.")
+        """Publishes a message for the user; safe to call from any worker."""
+        await self.start()
+        await self.backplane.publish(user_id, message)
+
+    async def deliver_local(self, user_id: str, message: dict) -> bool:
+        """
+        Fans the message out to this worker's sockets for the user without waiting on
+        any of them. Returns False if this worker holds no socket for the user.
+        """
+        if user_id not in self.active_connections:
+            return False
+        for connection in list(self.active_connections[user_id]):
+            if not connection.offer(message):
+                print(f"⚠️ [WS] Send queue full for {user_id}; evicting slow consumer.")
+                await self.evict(connection)
+        return True
+
+    def metrics(self) -> dict:
+        """Counters plus the current queue depth of every local connection."""
+        return {
+            **self.stats,
+            "connections": sum(len(c) for c in self.active_connections.values()),
+            "queue_depth": {
+                user_id: [len(c.queue) for c in connections]
+                for user_id, connections in self.active_connections.items()
+            }
+        }
 
 manager = ConnectionManager()
@@ -0,0 +1,71 @@
+"""
+Integration tests. They need real services, because mongomock can't run arrayFilters
+or conditional multi-element updates:
+
+    TEST_MONGO_URI=mongodb://localhost:27017 python -m pytest tests
+    TEST_REDIS_URL=redis://localhost:6379/15 python -m pytest tests
+
+Tests whose service isn't configured are skipped. Pub/sub tests fall back to an
+in-process fakeredis server (pip install fakeredis) when TEST_REDIS_URL is unset.
+"""
+import os
+import socket
+import sys
+import threading
+import uuid
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def mongo_db():
+    """A throwaway database wired into config.database.Database for the test."""
+    uri = os.getenv("TEST_MONGO_URI")
+    if not uri:
+        pytest.skip("TEST_MONGO_URI is not set")
+    from pymongo import MongoClient
+    from config.database import Database
+    from repositories.user_cache import user_cache
+
+    client = MongoClient(uri)
+    name = f"neurobank_test_{uuid.uuid4().hex[:8]}"
+    previous = (Database.client, Database.db)
+    Database.client, Database.db = client, client[name]
+    user_cache.invalidate()
+    try:
+        yield Database.db
+    finally:
+        Database.client, Database.db = previous
+        client.drop_database(name)
+        client.close()
+        user_cache.invalidate()
+
+
+@pytest.fixture
+def redis_url():
+    url = os.getenv("TEST_REDIS_URL")
+    if not url:
+        pytest.skip("TEST_REDIS_URL is not set")
+    return url
+
+
+@pytest.fixture(scope="session")
+def pubsub_url():
+    """TEST_REDIS_URL when set, otherwise a fakeredis server on a free local port."""
+    url = os.getenv("TEST_REDIS_URL")
+    if url:
+        yield url
+        return
+    fakeredis = pytest.importorskip("fakeredis")
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = fakeredis.TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"redis://127.0.0.1:{port}/0"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,87 @@
+"""apply_payment's account resolution and the update it sends, checked without a MongoDB server."""
+import pytest
+from repositories.user_repository import UserRepository
+
+ACCOUNTS = [
+    {"account_id": "acc_chq", "type": "Chequing", "balance": 1000.0},
+    {"account_id": "acc_sav", "type": "Savings", "balance": 0.0},
+    {"account_id": "acc_tfsa", "type": "TFSA Savings", "balance": 500.0},
+]
+
+
+class RecordingCollection:
+    """Stands in for the users collection and records the conditional update."""
+
+    def __init__(self):
+        self.calls = []
+
+    def find_one_and_update(self, query, update, **kwargs):
+        self.calls.append({"query": query, "update": update, **kwargs})
+        return None  # the guard failed, so nothing is patched into the cache
+
+
+@pytest.fixture
+def repo():
+    repo = UserRepository.__new__(UserRepository)
+    repo.collection = RecordingCollection()
+    repo.get_user = lambda user_id: {"user_id": user_id, "accounts": ACCOUNTS}
+    return repo
+
+
+@pytest.mark.parametrize("account, expected", [
+    ("acc_sav", "acc_sav"),
+    ("Savings", "acc_sav"),
+    ("  savings ", "acc_sav"),
+    ("TFSA Savings", "acc_tfsa"),
+    ("Sav", None),
+    ("", None),
+    (None, None),
+])
+def test_find_account_matches_id_or_exact_type(account, expected):
+    found = UserRepository.find_account(ACCOUNTS, account)
+    assert (found or {}).get("account_id") == expected
+
+
+def test_transfer_filters_by_exact_account_ids(repo):
+    assert repo.apply_payment("u1", "Chequing", 30.0, target_type="Savings") is None
+
+    [call] = repo.collection.calls
+    assert call["query"] == {
+        "user_id": "u1",
+        "accounts": {"$elemMatch": {"account_id": "acc_chq", "balance": {"$gte": 30.0}}},
+        "accounts.account_id": {"$all": ["acc_chq", "acc_sav"]},
+    }
+    assert call["update"] == {"$inc": {"accounts.$[src].balance": -30.0, "accounts.$[dst].balance": 30.0}}
+    assert call["array_filters"] == [
+        {"src.account_id": "acc_chq", "src.balance": {"$gte": 30.0}},
+        {"dst.account_id": "acc_sav"},
+    ]
+
+
+def test_bill_payment_only_matches_an_unpaid_bill(repo):
+    repo.apply_payment("u1", "acc_chq", 120.0, bill_id="bill_1")
+
+    [call] = repo.collection.calls
+    assert call["query"]["bills"] == {"$elemMatch": {"bill_id": "bill_1", "status": "Unpaid"}}
+    assert call["update"]["$set"] == {"bills.$[bill].status": "Paid"}
+    assert call["array_filters"][-1] == {"bill.bill_id": "bill_1", "bill.status": "Unpaid"}
+
+
+def test_card_payment_targets_one_card(repo):
+    repo.apply_payment("u1", "Chequing", 50.0, card_id="cc_1")
+
+    [call] = repo.collection.calls
+    assert call["query"]["credit_cards.card_id"] == "cc_1"
+    assert call["update"]["$inc"]["credit_cards.$[card].current_balance"] == -50.0
+    assert call["array_filters"][-1] == {"card.card_id": "cc_1"}
+
+
+def test_transfer_to_the_same_account_is_rejected(repo):
+    with pytest.raises(ValueError):
+        repo.apply_payment("u1", "Savings", 10.0, target_type="acc_sav")
+    assert repo.collection.calls == []
+
+
+def test_unknown_account_sends_no_update(repo):
+    assert repo.apply_payment("u1", "Sav", 10.0, target_type="Chequing") is None
+    assert repo.collection.calls == []
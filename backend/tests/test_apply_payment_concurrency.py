@@ -0,0 +1,88 @@
+"""Concurrent apply_payment calls against one user document must never overdraw or double-pay."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pytest
+from repositories.user_repository import UserRepository
+
+WORKERS = 32
+
+
+def make_user():
+    return {
+        "user_id": "stress_user",
+        "name": "Stress Test",
+        "email": "stress@example.com",
+        "accounts": [
+            {"account_id": "acc_chq", "type": "Chequing", "balance": 1000.0, "currency": "CAD"},
+            {"account_id": "acc_sav", "type": "Savings", "balance": 0.0, "currency": "CAD"},
+            {"account_id": "acc_tfsa", "type": "TFSA Savings", "balance": 500.0, "currency": "CAD"},
+        ],
+        "credit_cards": [
+            {"card_id": "cc_1", "name": "Visa", "limit": 5000.0, "current_balance": 300.0, "due_date": datetime(2030, 1, 1)},
+        ],
+        "bills": [
+            {"bill_id": "bill_1", "merchant": "Hydro One", "amount": 120.0, "due_date": datetime(2030, 1, 1),
+             "status": "Unpaid", "category": "Utilities"},
+        ],
+    }
+
+
+def run_concurrently(calls: int, func):
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        return list(pool.map(lambda _: func(), range(calls)))
+
+
+def balances(db):
+    user = db["users"].find_one({"user_id": "stress_user"})
+    return {acc["account_id"]: acc["balance"] for acc in user["accounts"]}, user
+
+
+def test_concurrent_transfers_never_overdraw(mongo_db):
+    mongo_db["users"].insert_one(make_user())
+    repo = UserRepository()
+
+    results = run_concurrently(100, lambda: repo.apply_payment("stress_user", "Chequing", 30.0, target_type="Savings"))
+
+    succeeded = sum(1 for result in results if result)
+    accounts, _ = balances(mongo_db)
+    assert succeeded == 33  # floor(1000 / 30)
+    assert accounts["acc_chq"] == pytest.approx(1000.0 - 30.0 * succeeded)
+    assert accounts["acc_sav"] == pytest.approx(30.0 * succeeded)
+    assert accounts["acc_tfsa"] == 500.0  # exact type match: "Savings" must not touch "TFSA Savings"
+
+
+def test_concurrent_bill_payments_pay_once(mongo_db):
+    mongo_db["users"].insert_one(make_user())
+    repo = UserRepository()
+
+    results = run_concurrently(50, lambda: repo.apply_payment("stress_user", "Chequing", 120.0, bill_id="bill_1"))
+
+    accounts, user = balances(mongo_db)
+    assert sum(1 for result in results if result) == 1
+    assert accounts["acc_chq"] == pytest.approx(880.0)
+    assert user["bills"][0]["status"] == "Paid"
+
+
+def test_concurrent_card_payments_and_transfers_share_the_balance(mongo_db):
+    mongo_db["users"].insert_one(make_user())
+    repo = UserRepository()
+
+    def pay_or_transfer(i):
+        if i % 2:
+            return repo.apply_payment("stress_user", "Chequing", 50.0, card_id="cc_1")
+        return repo.apply_payment("stress_user", "Chequing", 50.0, target_type="Savings")
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(pay_or_transfer, range(60)))
+
+    accounts, user = balances(mongo_db)
+    succeeded = sum(1 for result in results if result)
+    assert succeeded == 20  # 1000 / 50
+    assert accounts["acc_chq"] == pytest.approx(0.0)
+    assert user["credit_cards"][0]["current_balance"] >= 0
+
+
+def test_same_source_and_target_is_rejected(mongo_db):
+    mongo_db["users"].insert_one(make_user())
+    with pytest.raises(ValueError):
+        UserRepository().apply_payment("stress_user", "Savings", 10.0, target_type="acc_sav")
@@ -0,0 +1,150 @@
+"""
+RedisBackplane across processes: each worker is a separate process with its own
+subscription, as under `uvicorn --workers N` or several pods.
+
+Delivery and event fan-out run against fakeredis unless TEST_REDIS_URL is set; the
+reconnect test needs a real Redis, whose CLIENT KILL actually drops the connection.
+"""
+import asyncio
+import multiprocessing
+import queue
+import time
+import pytest
+
+WAIT = 10.0
+
+
+def _worker(url, user_id, inbox, ready, stop):
+    asyncio.run(_serve(url, user_id, inbox, ready, stop))
+
+
+async def _serve(url, user_id, inbox, ready, stop):
+    from services.backplane import RedisBackplane
+
+    backplane = RedisBackplane(url)
+
+    async def deliver(target, message):
+        # This worker holds a socket for `user_id` only
+        if target != user_id:
+            return False
+        inbox.put(("message", message))
+        return True
+
+    async def on_event(event):
+        inbox.put(("event", event))
+
+    backplane.event_handler = on_event
+    await backplane.start(deliver)
+    ready.set()
+    while not stop.is_set():
+        await asyncio.sleep(0.05)
+    await backplane.stop()
+
+
+@pytest.fixture
+def workers(pubsub_url, monkeypatch):
+    """Starts one worker process per user id; yields {user_id: inbox}."""
+    monkeypatch.setenv("BACKPLANE_RECONNECT_BACKOFF", "0.1")
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    started = []
+
+    def start(*user_ids):
+        inboxes = {}
+        for user_id in user_ids:
+            inbox, ready = context.Queue(), context.Event()
+            process = context.Process(target=_worker, args=(pubsub_url, user_id, inbox, ready, stop), daemon=True)
+            process.start()
+            assert ready.wait(WAIT), f"worker for {user_id} did not subscribe"
+            started.append(process)
+            inboxes[user_id] = inbox
+        return inboxes
+
+    yield start
+    stop.set()
+    for process in started:
+        process.join(WAIT)
+        if process.is_alive():
+            process.terminate()
+
+
+def _drain(inbox, timeout=0.5):
+    items = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            items.append(inbox.get(timeout=0.05))
+        except queue.Empty:
+            pass
+    return items
+
+
+async def _publisher(url):
+    from services.backplane import RedisBackplane
+
+    backplane = RedisBackplane(url)
+    received = []
+
+    async def deliver(target, message):
+        return False
+
+    async def on_event(event):
+        received.append(event)
+
+    backplane.event_handler = on_event
+    await backplane.start(deliver)
+    return backplane, received
+
+
+def test_personal_message_reaches_only_the_worker_holding_the_socket(workers, pubsub_url):
+    inboxes = workers("user_a", "user_b")
+
+    async def publish():
+        backplane, _ = await _publisher(pubsub_url)
+        await backplane.publish("user_a", {"type": "balance_update", "balance": 10})
+        await backplane.publish("user_b", {"type": "balance_update", "balance": 20})
+        await backplane.stop()
+
+    asyncio.run(publish())
+    assert _drain(inboxes["user_a"]) == [("message", {"type": "balance_update", "balance": 10})]
+    assert _drain(inboxes["user_b"]) == [("message", {"type": "balance_update", "balance": 20})]
+
+
+def test_events_reach_every_other_worker(workers, pubsub_url):
+    inboxes = workers("user_a", "user_b")
+
+    async def publish():
+        backplane, received = await _publisher(pubsub_url)
+        await backplane.publish_event({"topic": "response_cache.invalidate", "payload": {"user_id": "user_a"}})
+        await asyncio.sleep(0.5)
+        await backplane.stop()
+        return received
+
+    assert asyncio.run(publish()) == []  # the sender skips its own event
+    for inbox in inboxes.values():
+        [(kind, event)] = _drain(inbox)
+        assert kind == "event"
+        assert event["payload"] == {"user_id": "user_a"}
+
+
+def test_worker_resubscribes_after_losing_redis(redis_url, workers):
+    inboxes = workers("user_a")
+
+    async def drop_and_publish():
+        import redis.asyncio as redis
+
+        admin = redis.from_url(redis_url)
+        await admin.client_kill_filter(_type="pubsub")
+        try:
+            # Pub/sub has no replay, so publish until the worker is subscribed again
+            deadline = time.monotonic() + WAIT
+            while time.monotonic() < deadline:
+                if await admin.publish("neurobank:ws:personal", '{"user_id": "user_a", "message": {"n": 1}}'):
+                    return True
+                await asyncio.sleep(0.1)
+            return False
+        finally:
+            await admin.close()
+
+    assert asyncio.run(drop_and_publish()), "worker never resubscribed"
+    assert ("message", {"n": 1}) in _drain(inboxes["user_a"], timeout=2.0)
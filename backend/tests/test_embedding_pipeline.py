@@ -0,0 +1,93 @@
+"""EmbeddingPipeline batching, retries and ordering with a deterministic embedding backend."""
+import threading
+from data.fixtures import HashEmbeddingBackend
+from services.embedding_pipeline import EmbeddingPipeline
+
+
+class FlakyBackend(HashEmbeddingBackend):
+    """Fails the first `failures` calls for each distinct batch, then embeds normally."""
+
+    def __init__(self, failures: int = 1, dimensions: int = 8):
+        super().__init__(dimensions)
+        self.failures = failures
+        self.calls = []
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+            attempts = self._attempts.get(tuple(texts), 0)
+            self._attempts[tuple(texts)] = attempts + 1
+        if attempts < self.failures:
+            raise RuntimeError("rate limited")
+        return super().embed_documents(texts)
+
+
+def make_docs(n):
+    return [{"row": i, "description": f"purchase {i}"} for i in range(n)]
+
+
+def collect():
+    batches = []
+    return batches, batches.append
+
+
+def test_batches_are_sized_and_delivered_in_order():
+    backend = FlakyBackend(failures=0)
+    batches, sink = collect()
+
+    stats = EmbeddingPipeline(backend, batch_size=4, concurrency=1, max_retries=0).run(make_docs(10), sink)
+
+    assert [len(texts) for texts in backend.calls] == [4, 4, 2]
+    assert [[doc["row"] for doc in batch] for batch in batches] == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert stats["rows"] == 10 and stats["batches"] == 3 and stats["failed_rows"] == 0
+
+
+def test_failed_batches_are_retried_and_keep_vectors_aligned():
+    backend = FlakyBackend(failures=2)
+    batches, sink = collect()
+
+    stats = EmbeddingPipeline(backend, batch_size=4, concurrency=1, max_retries=2, retry_backoff=0).run(
+        make_docs(10), sink
+    )
+
+    # Each batch fails twice and succeeds on the third attempt, before the next batch starts
+    assert [len(texts) for texts in backend.calls] == [4, 4, 4, 4, 4, 4, 2, 2, 2]
+    assert stats["failed_batches"] == 0 and stats["rows"] == 10
+    reference = HashEmbeddingBackend(8)
+    documents = [doc for batch in batches for doc in batch]
+    assert [doc["row"] for doc in documents] == list(range(10))
+    for doc in documents:
+        assert doc["embedding"] == reference.embed_documents([doc["description"]])[0]
+
+
+def test_batch_is_dropped_once_retries_are_exhausted():
+    backend = FlakyBackend(failures=5)
+    batches, sink = collect()
+
+    stats = EmbeddingPipeline(backend, batch_size=5, concurrency=1, max_retries=1, retry_backoff=0).run(
+        make_docs(10), sink
+    )
+
+    assert len(backend.calls) == 4  # two batches, one retry each
+    assert batches == []
+    assert stats["failed_batches"] == 2 and stats["failed_rows"] == 10 and stats["rows"] == 0
+
+
+def test_concurrent_batches_deliver_every_row_once():
+    backend = FlakyBackend(failures=1)
+    batches, sink = collect()
+
+    stats = EmbeddingPipeline(backend, batch_size=3, concurrency=4, max_retries=1, retry_backoff=0).run(
+        make_docs(50), sink
+    )
+
+    assert sorted(doc["row"] for batch in batches for doc in batch) == list(range(50))
+    assert all(len(batch) == 3 for batch in batches if batch[-1]["row"] != 49)
+    # Rows keep their input order inside a batch whatever order batches finish in
+    for batch in batches:
+        rows = [doc["row"] for doc in batch]
+        assert rows == list(range(rows[0], rows[0] + len(rows)))
+    assert len(backend.calls) == 2 * len(batches)
+    assert stats["rows"] == 50 and stats["failed_batches"] == 0
@@ -0,0 +1,13 @@
+"""Every query shape in config.indexes.QUERY_SHAPES must be served by an index."""
+from config.indexes import ensure_indexes, find_collscans
+
+
+def test_repository_queries_use_an_index(mongo_db):
+    ensure_indexes(mongo_db)
+    assert find_collscans(mongo_db) == []
+
+
+def test_ensure_indexes_is_idempotent(mongo_db):
+    ensure_indexes(mongo_db)
+    ensure_indexes(mongo_db)  # a restart must not fail on indexes that already exist
+    assert find_collscans(mongo_db) == []
@@ -0,0 +1,72 @@
+"""Labelled corpus for the deterministic intent fast path (services.intent_engine)."""
+from datetime import datetime
+import pytest
+from services.intent_engine import IntentEngine
+from services.language import detect_language
+
+# (utterance, expected intent or None for LLM fallback)
+CORPUS = [
+    ("What's my balance?", "balance"),
+    ("what is my balance", "balance"),
+    ("Show me my account balances please", "balance"),
+    ("How much is in my savings account balance?", "balance"),
+    ("Quel est mon solde ?", "balance"),
+    ("Donne-moi le solde de mon compte épargne", "balance"),
+    ("What's my credit card balance?", "card_balance"),
+    ("How much do I owe on my Visa?", "card_balance"),
+    ("Quel est le solde de ma carte de crédit ?", "card_balance"),
+    ("When are my bills due?", "due_dates"),
+    ("What are my upcoming due dates?", "due_dates"),
+    ("Quand mes factures sont-elles dues ?", "due_dates"),
+    ("When is my next payment due?", "due_dates"),
+    ("Pay my hydro bill", None),
+    ("Payer mes factures", None),
+    ("Quelles sont mes prochaines échéances ?", "due_dates"),
+    ("How did my balance change last month?", None),
+    ("How much did I spend on groceries?", None),
+    ("What is an e-Transfer?", None),
+    ("Did I pay Netflix?", None),
+    ("Why is my balance so low?", None),
+    ("Comment puis-je demander un prêt ?", None),
+    ("Is my credit score good?", None),
+]
+
+REPLY_CORPUS = [
+    ("Yes AI", "confirm"),
+    ("Yes, A.I.", "confirm"),
+    ("Oui IA", "confirm"),
+    ("No, cancel that", "cancel"),
+    ("Annuler", "cancel"),
+    ("Wait, how much was it?", "other"),
+]
+
+PROFILE = {
+    "accounts": [{"type": "Chequing", "balance": 1234.5}],
+    "credit_cards": [{"name": "Visa", "current_balance": 300.0, "limit": 5000.0, "due_date": datetime(2030, 1, 15)}],
+    "bills": [
+        {"merchant": "Hydro One", "amount": 120.0, "due_date": datetime(2030, 1, 5), "status": "Unpaid"},
+        {"merchant": "Rogers", "amount": 80.0, "due_date": datetime(2030, 1, 1), "status": "Paid"},
+    ],
+}
+
+
+@pytest.mark.parametrize("text, expected", CORPUS)
+def test_classify(text, expected):
+    assert IntentEngine.classify(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", REPLY_CORPUS)
+def test_classify_reply(text, expected):
+    assert IntentEngine.classify_reply(text) == expected
+
+
+def test_corpus_covers_both_languages():
+    assert {detect_language(text) for text, _ in CORPUS} == {"en", "fr"}
+
+
+@pytest.mark.parametrize("language, expected", [
+    ("en", "Upcoming due dates: Hydro One $120.00 on January 5; Visa $300.00 on January 15."),
+    ("fr", "Prochaines échéances : Hydro One 120,00 $ le 5 janvier; Visa 300,00 $ le 15 janvier."),
+])
+def test_due_dates_skip_paid_bills_and_sort_by_date(language, expected):
+    assert IntentEngine.answer("due_dates", PROFILE, language) == expected
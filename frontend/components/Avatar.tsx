@@ -36,6 +36,9 @@ export default function Avatar({ userId }: AvatarProps) {
 
     const isSessionActive = useRef(false);
     const isSpeakingRef = useRef(false);
+    const speechQueueRef = useRef<Promise<void>>(Promise.resolve());
+    const pendingSentencesRef = useRef(0);
+    const turnChunksRef = useRef(0); // chunks received for the streamed turn in progress
 
     // Auto-scroll transcript
     useEffect(() => {
@@ -110,6 +113,8 @@ export default function Avatar({ userId }: AvatarProps) {
             websocketRef.current.close();
         }
 
+        turnChunksRef.current = 0;
+
         // FORCE PRODUCTION WS URL
         const wsUrl = "wss://backend-1093567910779.us-central1.run.app";
         const ws = new WebSocket(`${wsUrl}/api/v1/avatar/ws?user_id=${uid}`);
@@ -117,7 +122,19 @@ export default function Avatar({ userId }: AvatarProps) {
         ws.onopen = () => console.log("WS Connected");
         ws.onmessage = async (event) => {
             const msg = JSON.parse(event.data);
-            if (msg.type === "avatar_response") {
+            if (msg.type === "avatar_response_chunk") {
+                // Streamed sentence: queue it so the avatar starts speaking on the first one
+                turnChunksRef.current += 1;
+                enqueueSpeech(msg.text);
+            } else if (msg.type === "avatar_response_end") {
+                // A turn that failed before its first sentence only sends the apology here
+                if (turnChunksRef.current === 0 && msg.text) {
+                    enqueueSpeech(msg.text);
+                }
+                turnChunksRef.current = 0;
+                setTranscript(prev => [...prev, { role: 'ai', text: msg.text }]);
+                updateSuggestions(msg.text);
+            } else if (msg.type === "avatar_response") {
                 setTranscript(prev => [...prev, { role: 'ai', text: msg.text }]);
 
                 // Dynamic suggestions based on AI response context
@@ -135,6 +152,24 @@ export default function Avatar({ userId }: AvatarProps) {
         websocketRef.current = ws;
     };
 
+    const enqueueSpeech = (text: string) => {
+        if (!synthesizerRef.current) return;
+        pendingSentencesRef.current += 1;
+        isSpeakingRef.current = true;
+        setStatus("Speaking...");
+        speechQueueRef.current = speechQueueRef.current.then(async () => {
+            try {
+                await synthesizerRef.current?.speakTextAsync(text);
+            } finally {
+                pendingSentencesRef.current -= 1;
+                if (pendingSentencesRef.current === 0) {
+                    isSpeakingRef.current = false;
+                    setStatus("Listening...");
+                }
+            }
+        });
+    };
+
     const updateSuggestions = (text: string) => {
         const lowerText = text.toLowerCase();
 
@@ -158,7 +193,8 @@ export default function Avatar({ userId }: AvatarProps) {
             setTranscript(prev => [...prev, { role: 'user', text }]);
             websocketRef.current.send(JSON.stringify({
                 type: "text_input",
-                text: text
+                text: text,
+                stream: true
             }));
         } else {
             // If not connected, treating it as a wake word or initial command
@@ -218,7 +254,8 @@ export default function Avatar({ userId }: AvatarProps) {
                 if (websocketRef.current && websocketRef.current.readyState === WebSocket.OPEN) {
                     websocketRef.current.send(JSON.stringify({
                         type: "text_input",
-                        text: text
+                        text: text,
+                        stream: true
                     }));
                 }
             }